@@ -1,11 +1,27 @@
 import os
 import sys
 import json
+import time
+import asyncio
+import functools
+import itertools
 import uvicorn
-import requests
 from pathlib import Path
-from fastapi import FastAPI, HTTPException
+from typing import Optional
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse, Response
+
+# Optional faster encoders for large payloads (the library tree)
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
 
 # --- CONFIGURATION ---
 if sys.platform == "win32":
@@ -15,25 +31,66 @@ else:
     SETTINGS_DIR = Path.home() / ".datawijs-sap"
 
 SETTINGS_FILE = SETTINGS_DIR / "settings.json"
+CACHE_DIR = SETTINGS_DIR / "cache"
 SETTINGS_DIR.mkdir(parents=True, exist_ok=True)
 
+STARTED_AT = time.monotonic()
+
 # --- IMPORTS ---
+# Only what the first requests need; the generator stack (python-pptx, lxml, Pillow)
+# and requests are imported on first use, see _generation_services() / _hubspot_service()
 try:
     from app.models import (
-        SettingsModel, ResolveRequest, GenerateRequest,
+        SettingsModel, ResolveRequest, BatchResolveRequest, GenerateRequest, BatchGenerateRequest,
         TransListPayload, TransLoadPayload, TransSavePayload
     )
     from app.services.library_service import LibraryService
+    from app.services.library_index import LibraryIndex
+    from app.services.settings_store import SettingsStore
     from app.services.translation_service import TranslationService
-    from app.services.generator_service import GeneratorService
+    from app.services.job_service import JobService
+    from app.services.warmup_service import WarmupService
 except ImportError:
     from models import (
-        SettingsModel, ResolveRequest, GenerateRequest,
+        SettingsModel, ResolveRequest, BatchResolveRequest, GenerateRequest, BatchGenerateRequest,
         TransListPayload, TransLoadPayload, TransSavePayload
     )
     from services.library_service import LibraryService
+    from services.library_index import LibraryIndex
+    from services.settings_store import SettingsStore
     from services.translation_service import TranslationService
-    from services.generator_service import GeneratorService
+    from services.job_service import JobService
+    from services.warmup_service import WarmupService
+
+SETTINGS = SettingsStore(SETTINGS_FILE)
+
+@functools.lru_cache(maxsize=None)
+def _generation_services():
+    """(GeneratorService, DeckCache, ImageService), imported and pointed at CACHE_DIR on first use."""
+    try:
+        from app.services.generator_service import GeneratorService
+        from app.services.deck_cache import DeckCache
+        from app.services.image_service import ImageService
+    except ImportError:
+        from services.generator_service import GeneratorService
+        from services.deck_cache import DeckCache
+        from services.image_service import ImageService
+
+    ImageService.CACHE.root = CACHE_DIR / "images"
+    GeneratorService.FRAGMENTS.root = CACHE_DIR / "fragments"
+    GeneratorService.OUTPUTS.root = CACHE_DIR / "outputs"
+    return GeneratorService, DeckCache, ImageService
+
+@functools.lru_cache(maxsize=None)
+def _hubspot_service():
+    """HubSpotService (and requests), imported on first use."""
+    try:
+        from app.services.hubspot_service import HubSpotService
+    except ImportError:
+        from services.hubspot_service import HubSpotService
+
+    HubSpotService.CACHE_FILE = CACHE_DIR / "hubspot_companies.json"
+    return HubSpotService
 
 # --- APP SETUP ---
 app = FastAPI(title="SAP Backend")
@@ -52,80 +109,234 @@ app.add_middleware(
 def read_root():
     return {"status": "online", "message": "SAP Backend"}
 
+@app.get("/health")
+def get_health():
+    """
+    Answers as soon as the server is listening (no settings or disk access): `status` ok means up,
+    `ready` means warm: the warm-up has finished (or is turned off), so first requests no longer pay for it.
+    """
+    warmup = WarmupService.state()
+    return {
+        "status": "ok",
+        "ready": warmup["status"] in ("done", "skipped"),
+        "uptime": round(time.monotonic() - STARTED_AT, 3),
+        "warmup": warmup
+    }
+
 # --- SETTINGS ---
 
 @app.get("/settings")
 def get_settings():
-    if not SETTINGS_FILE.exists():
-        return {"library_path": "", "output_path": "", "languages": [], "industries": []}
-
     try:
-        with open(SETTINGS_FILE, "r") as f:
-            data = json.load(f)
-            # Ensure lists exist
-            if "languages" not in data: data["languages"] = []
-            if "industries" not in data: data["industries"] = []
-            return data
+        data = SETTINGS.raw()
     except (OSError, json.JSONDecodeError) as e:
         return {"error": f"Failed to load settings: {str(e)}"}
 
+    if data is None:
+        return {"library_path": "", "output_path": "", "languages": [], "industries": []}
+    # Ensure lists exist
+    if "languages" not in data: data["languages"] = []
+    if "industries" not in data: data["industries"] = []
+    return data
+
 @app.post("/settings")
 def save_settings(settings: SettingsModel):
     try:
-        with open(SETTINGS_FILE, "w") as f:
-            json.dump(settings.model_dump(), f, indent=4)
+        SETTINGS.save(settings)
         return {"status": "success"}
     except OSError as e:
         raise HTTPException(status_code=500, detail=f"Failed to save settings: {str(e)}")
 
+def _current_settings() -> Optional[SettingsModel]:
+    """The saved settings, or None before the first save."""
+    try:
+        return SETTINGS.get()
+    except (OSError, ValueError) as e:
+        raise HTTPException(status_code=500, detail=f"Could not read settings: {e}")
+
 # --- LIBRARY ---
 
+def _watched_library() -> Optional[LibraryIndex]:
+    """The index of the configured library (kept current by its watcher), or None when unset."""
+    settings = _current_settings()
+    path_str = settings.library_path if settings else ""
+    if not path_str or not Path(path_str).exists():
+        return None
+    return LibraryIndex.watch(Path(path_str))
+
+def _encoded_response(payload, request: Request) -> Response:
+    """msgpack when the client accepts it (and it is installed), otherwise JSON, through orjson when available."""
+    if msgpack is not None and "application/msgpack" in request.headers.get("accept", ""):
+        return Response(msgpack.packb(payload), media_type="application/msgpack")
+    if orjson is not None:
+        return Response(orjson.dumps(payload), media_type="application/json")
+    return Response(json.dumps(payload, separators=(",", ":")), media_type="application/json")
+
 @app.get("/library")
-def get_library():
+def get_library(request: Request, format: str = "tree"):
+    """
+    The full library tree. format=compact returns parallel arrays (see LibraryIndex.compact_tree)
+    instead of nested nodes with absolute paths and icon classes.
+    """
     try:
-        if not SETTINGS_FILE.exists(): return []
-        with open(SETTINGS_FILE, "r") as f:
-            settings = json.load(f)
-            path_str = settings.get("library_path", "")
+        index = _watched_library()
+        if format == "compact":
+            payload = index.compact_tree() if index else LibraryIndex.empty_compact_tree()
+        else:
+            payload = index.tree() if index else []
+    except (OSError, HTTPException) as e:
+        print(f"Library Scan Error: {e}")
+        payload = LibraryIndex.empty_compact_tree() if format == "compact" else []
+    return _encoded_response(payload, request)
 
-        if not path_str or not Path(path_str).exists(): return []
+@app.get("/library/level")
+def get_library_level(path: str = "", cursor: str = "", limit: int = LibraryIndex.PAGE_SIZE):
+    """One page of one tree level, for lazy expansion in the LibraryPanel."""
+    index = _watched_library()
+    if index is None:
+        return {"path": "", "nodes": [], "total": 0, "next_cursor": None, "version": 0}
 
-        return LibraryService.scan_directory(Path(path_str))
-    except (OSError, json.JSONDecodeError) as e:
-        print(f"Library Scan Error: {e}")
-        return []
+    try:
+        return index.level(Path(path) if path else None, cursor or None, min(max(limit, 1), 1000))
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Folder not found in library: {path}")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/library/changes")
+def get_library_changes(since: int = 0):
+    """Tree deltas (added / removed / renamed nodes) after a version; `reset` asks for a reload."""
+    index = _watched_library()
+    if index is None:
+        return {"version": 0, "reset": since != 0, "changes": []}
+    return index.changes_since(since)
+
+@app.get("/library/events")
+async def stream_library_events(since: int = 0):
+    """Pushes tree deltas as Server-Sent Events while the library changes."""
+    index = _watched_library()
+    if index is None:
+        raise HTTPException(status_code=404, detail="Library path not set")
+
+    async def event_source():
+        version = since
+        for tick in itertools.count():
+            if index.version != version:
+                delta = index.changes_since(version)
+                version = delta["version"]
+                yield f"event: library\ndata: {json.dumps(delta)}\n\n"
+            elif tick % 15 == 0:
+                # Comment line: keeps the connection alive and notices a client that left
+                yield ": ping\n\n"
+            await asyncio.sleep(1.0)
+
+    return StreamingResponse(event_source(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+def _drop_index() -> Optional[LibraryIndex]:
+    try:
+        return _watched_library()
+    except HTTPException:
+        return None
 
 @app.post("/library/resolve")
 def resolve_drop(req: ResolveRequest):
-    return LibraryService.resolve_dropped_path(req.path)
+    return LibraryService.resolve_dropped_paths([req.path], _drop_index())
 
-# --- GENERATION ---
+@app.post("/library/resolve/batch")
+def resolve_drop_batch(req: BatchResolveRequest):
+    """Resolves a whole multi-selection in one call: files in the order dropped, each once."""
+    return LibraryService.resolve_dropped_paths(req.paths, _drop_index())
 
-@app.post("/session/generate")
-async def generate_session(req: GenerateRequest):
-    if not SETTINGS_FILE.exists():
-        raise HTTPException(status_code=500, detail="Settings not found")
+# --- GENERATION ---
 
+def _load_generation_settings() -> SettingsModel:
     try:
-        with open(SETTINGS_FILE, "r") as f:
-            settings = json.load(f)
-            lib_path = Path(settings.get("library_path", ""))
-            out_root = Path(settings.get("output_path", ""))
-
-        if not lib_path.exists():
-            raise HTTPException(status_code=404, detail="Library path not found")
-
-        # Delegate logic to Service
-        result = GeneratorService.generate_session(req, lib_path, out_root)
-        return result
-
-    except HTTPException:
-        # Re-raise intentional HTTP exceptions (like 404s from above)
-        raise
-    except Exception as e:
-        # Catch unexpected errors (like permissions or merging crashes)
+        settings = SETTINGS.get()
+    except (OSError, ValueError) as e:
         print(f"FATAL ERROR: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+    if settings is None:
+        raise HTTPException(status_code=500, detail="Settings not found")
+
+    if not Path(settings.library_path).exists():
+        raise HTTPException(status_code=404, detail="Library path not found")
+    return settings
+
+@app.post("/session/generate")
+def generate_session(req: GenerateRequest):
+    """Queues the generation as a background job and returns its id immediately."""
+    settings = _load_generation_settings()
+
+    # Delegate logic to Service, on the job worker pool
+    GeneratorService, _, _ = _generation_services()
+    job = JobService.submit(
+        "generate", GeneratorService.generate_session,
+        req, Path(settings.library_path), Path(settings.output_path), settings
+    )
+    return {"job_id": job.id, "status": job.status}
+
+@app.post("/session/generate/batch")
+def generate_batch(req: BatchGenerateRequest):
+    """Queues one playlist for many customers; results are reported per customer."""
+    settings = _load_generation_settings()
+    session_requests = [
+        GenerateRequest(session_name=req.session_name, date=req.date, sections=req.sections, **t.model_dump())
+        for t in req.targets
+    ]
+
+    GeneratorService, _, _ = _generation_services()
+    job = JobService.submit(
+        "batch", GeneratorService.generate_batch,
+        session_requests, Path(settings.library_path), Path(settings.output_path), settings
+    )
+    return {"job_id": job.id, "status": job.status}
+
+@app.get("/session/jobs/{job_id}")
+def get_job(job_id: str):
+    job = JobService.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.snapshot()
+
+@app.delete("/session/jobs/{job_id}")
+def cancel_job(job_id: str):
+    if not JobService.get(job_id):
+        raise HTTPException(status_code=404, detail="Job not found")
+    return {"cancelled": JobService.cancel(job_id)}
+
+@app.get("/session/jobs/{job_id}/events")
+async def stream_job_events(job_id: str):
+    """Streams job progress as Server-Sent Events until the job finishes."""
+    job = JobService.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    async def event_source():
+        seq = 0
+        while True:
+            events = job.events_since(seq)
+            for event in events:
+                yield f"event: {event['stage']}\ndata: {json.dumps(event)}\n\n"
+            seq += len(events)
+            if events and events[-1]["stage"] == "done":
+                break
+            await asyncio.sleep(0.2)
+
+    return StreamingResponse(event_source(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+# --- CACHES ---
+
+@app.get("/cache/stats")
+def get_cache_stats():
+    GeneratorService, DeckCache, ImageService = _generation_services()
+    HubSpotService = _hubspot_service()
+    return {
+        "decks": DeckCache.stats(),
+        "images": ImageService.stats(),
+        "fragments": GeneratorService.FRAGMENTS.stats(),
+        "outputs": GeneratorService.OUTPUTS.stats(),
+        "hubspot": HubSpotService.stats()
+    }
 
 # --- TRANSLATIONS ---
 
@@ -153,34 +364,63 @@ def save_trans(req: TransSavePayload):
 # --- HUBSPOT ---
 
 @app.get("/hubspot/companies")
-def get_hubspot_companies():
-    if not SETTINGS_FILE.exists(): return []
-
+def get_hubspot_companies(refresh: bool = False):
+    """Every HubSpot company, from the local directory cache (see HubSpotService); `refresh` syncs first."""
+    HubSpotService = _hubspot_service()
+    from requests import RequestException
     try:
-        with open(SETTINGS_FILE, "r") as f:
-            api_key = json.load(f).get("hubspot_api_key", "")
+        settings = SETTINGS.get()
+        api_key = settings.hubspot_api_key if settings else ""
         if not api_key: return []
-
-        url = "https://api.hubapi.com/crm/v3/objects/companies"
-        headers = {"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"}
-        params = {"limit": 100, "properties": "name,industry", "sort": "name"}
-
-        response = requests.get(url, headers=headers, params=params)
-        response.raise_for_status()
-        data = response.json()
-
-        return [
-            {
-                "name": r["properties"].get("name"),
-                "code": r["id"],
-                "industry": r["properties"].get("industry", "")
-            }
-            for r in data.get("results", []) if r["properties"].get("name")
-        ]
-    except (requests.RequestException, OSError, json.JSONDecodeError, KeyError) as e:
-        # Catch specific errors: Network issues, File I/O, JSON parsing, or missing keys
+        return HubSpotService.companies(api_key, refresh=refresh)
+    except (RequestException, OSError, ValueError, KeyError) as e:
+        # Catch specific errors: Network issues, File I/O, JSON parsing / invalid settings, or missing keys
         print(f"HubSpot Error: {e}")
         return []
 
+# --- WARM-UP ---
+
+def _warm_library():
+    index = _watched_library()
+    return len(index.folders()) if index else 0
+
+def _warm_translations():
+    index = _watched_library()
+    if index is None:
+        return 0
+    return TranslationService.preload(index.root / rel / "translations.json" for rel in index.folders())
+
+def _warm_hubspot():
+    settings = SETTINGS.get()
+    api_key = settings.hubspot_api_key if settings else ""
+    return _hubspot_service().preload(api_key) if api_key else 0
+
+def _warm_generator():
+    _generation_services()
+    return "imported"
+
+def _warmup_tasks():
+    """Run in this order once the port is bound; each one is also done lazily on first use."""
+    return {
+        "library": _warm_library,
+        "translations": _warm_translations,
+        "hubspot": _warm_hubspot,
+        "generator": _warm_generator
+    }
+
+def _warmup_enabled() -> bool:
+    try:
+        settings = SETTINGS.get()
+    except (OSError, ValueError):
+        return True
+    return settings is None or settings.warmup_on_start
+
 if __name__ == "__main__":
-    uvicorn.run(app, host="127.0.0.1", port=8000)
\ No newline at end of file
+    # Electron passes the port it will talk to
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8000
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port))
+    if _warmup_enabled():
+        WarmupService.start(_warmup_tasks(), after=lambda: server.started)
+    else:
+        WarmupService.skip()
+    server.run()
\ No newline at end of file
@@ -14,11 +14,25 @@ class SettingsModel(BaseModel):
     hubspot_api_key: str = ""
     languages: List[KeyLabel] = []
     industries: List[KeyLabel] = []
+    image_dpi: int = 150
+    image_recompress: bool = False
+    # How exercises reach the output folder: "copy", "hardlink" or "reflink"
+    exercise_copy_mode: str = "copy"
+    # Merge decks zip to zip, one at a time, instead of building the output deck in memory
+    streaming_merge: bool = False
+    # Decks processed concurrently within one session (0: one worker process per core)
+    deck_workers: int = 0
+    # Import the generator and index the library in the background right after startup
+    warmup_on_start: bool = True
 
 # --- LIBRARY MODELS ---
 class ResolveRequest(BaseModel):
     path: str
 
+class BatchResolveRequest(BaseModel):
+    # Dropped paths in playlist order
+    paths: List[str]
+
 # --- GENERATION MODELS ---
 class SectionRequest(BaseModel):
     title: str
@@ -33,6 +47,18 @@ class GenerateRequest(BaseModel):
     language_code: str
     sections: List[SectionRequest]
 
+class BatchTarget(BaseModel):
+    customer_name: str
+    customer_industry: str
+    industry_code: str
+    language_code: str
+
+class BatchGenerateRequest(BaseModel):
+    session_name: str
+    date: str
+    sections: List[SectionRequest]
+    targets: List[BatchTarget]
+
 # --- TRANSLATION MODELS ---
 class TransListPayload(BaseModel):
     rootPath: str
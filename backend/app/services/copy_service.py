@@ -0,0 +1,115 @@
+import os
+import sys
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import List, Tuple, Dict, Callable, Optional
+
+class CopyService:
+    """
+    File materialization for generated output:
+    - Hardlinks or reflinks (copy-on-write clones) when the filesystem allows it
+    - Falls back to a regular copy (with metadata) everywhere else
+    - Skips destinations that already hold the same file
+    - Copies many files concurrently, since the time goes to I/O waits (network shares)
+    """
+
+    MODES = ("copy", "hardlink", "reflink")
+    MAX_WORKERS = 8
+
+    # Linux ioctl that clones a file's extents (btrfs, XFS, overlay on top of those)
+    _FICLONE = 0x40049409
+
+    @staticmethod
+    def is_unchanged(src: Path, dest: Path) -> bool:
+        """Same file, or a copy made by copy2: equal size and modification time."""
+        try:
+            dest_stat = os.stat(dest)
+        except OSError:
+            return False
+        src_stat = os.stat(src)
+        if (src_stat.st_dev, src_stat.st_ino) == (dest_stat.st_dev, dest_stat.st_ino):
+            return True
+        return src_stat.st_size == dest_stat.st_size and src_stat.st_mtime_ns == dest_stat.st_mtime_ns
+
+    @classmethod
+    def _reflink(cls, src: Path, dest: Path) -> bool:
+        """Copy-on-write clone of src at dest. Returns False when the platform or filesystem has none."""
+        if sys.platform.startswith("linux"):
+            import fcntl
+            try:
+                with open(src, "rb") as fsrc, open(dest, "wb") as fdest:
+                    fcntl.ioctl(fdest.fileno(), cls._FICLONE, fsrc.fileno())
+            except OSError:
+                if os.path.lexists(dest):
+                    os.unlink(dest)
+                return False
+            shutil.copystat(src, dest)
+            return True
+
+        if sys.platform == "darwin":
+            import ctypes
+            libc = ctypes.CDLL(None, use_errno=True)
+            # clonefile() keeps the metadata itself (APFS)
+            return libc.clonefile(os.fsencode(src), os.fsencode(dest), 0) == 0
+
+        return False
+
+    @classmethod
+    def place(cls, src: Path, dest: Path, mode: str = "copy") -> str:
+        """
+        Puts `src` at `dest` using `mode`, falling back to a copy.
+        An existing destination is replaced, never written through (it may be a hardlink).
+        Returns 'skipped', 'link', 'reflink' or 'copy'.
+        """
+        if cls.is_unchanged(src, dest):
+            return "skipped"
+        if os.path.lexists(dest):
+            os.unlink(dest)
+
+        if mode == "hardlink":
+            try:
+                os.link(src, dest)
+                return "link"
+            except OSError:
+                # Different volume, or a filesystem without hardlinks (FAT, some shares)
+                pass
+        elif mode == "reflink" and cls._reflink(src, dest):
+            return "reflink"
+
+        shutil.copy2(src, dest)
+        return "copy"
+
+    @classmethod
+    def link_or_copy(cls, src: Path, dest: Path) -> str:
+        """Places `src` at `dest` as a hardlink when possible. Returns the outcome of place()."""
+        return cls.place(src, dest, "hardlink")
+
+    @classmethod
+    def place_many(cls, pairs: List[Tuple[Path, Path]], mode: str = "copy",
+                   writer: Optional[Callable[[Path, Path], Optional[str]]] = None) -> Dict[Path, str]:
+        """
+        Places every (src, dest) pair on a thread pool. Destinations must be distinct.
+        `writer(src, dest)` may produce a destination itself and return its outcome;
+        when it returns None the file is placed as usual.
+        Returns dest -> outcome; failed files map to 'error' (and are logged), the others still go through.
+        """
+        if mode not in cls.MODES:
+            print(f"WARNING: Unknown copy mode '{mode}', copying instead")
+            mode = "copy"
+
+        def run(pair: Tuple[Path, Path]) -> str:
+            src, dest = pair
+            try:
+                outcome = writer(src, dest) if writer else None
+                return outcome or cls.place(src, dest, mode)
+            except Exception as e:
+                # One bad file (unreadable, or a writer that choked on it) must not stop the rest
+                print(f"ERROR copying {src.name}: {e}")
+                return "error"
+
+        if len(pairs) <= 1:
+            return {dest: run((src, dest)) for src, dest in pairs}
+
+        with ThreadPoolExecutor(max_workers=min(cls.MAX_WORKERS, len(pairs)), thread_name_prefix="sap-copy") as pool:
+            return {dest: outcome for (_, dest), outcome in zip(pairs, pool.map(run, pairs))}
@@ -0,0 +1,91 @@
+import os
+import zipfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Any, Tuple
+from pptx import Presentation
+
+class DeckCache:
+    """
+    Bounded LRU cache of parsed library decks, shared across generation requests.
+    - Keyed by path + mtime + size, so an edited deck is parsed again
+    - Evicts least recently used decks once the estimated memory budget is exceeded
+    - Cached decks are read-only sources: SlideMerger deep-copies what it needs
+    """
+
+    MAX_BYTES = 512 * 1024 * 1024
+
+    _entries: "OrderedDict[str, Tuple[Tuple[int, int], Any, int]]" = OrderedDict()
+    _lock = threading.Lock()
+    _total_bytes = 0
+    _hits = 0
+    _misses = 0
+    _evictions = 0
+
+    @staticmethod
+    def _estimate_bytes(path: Path) -> int:
+        """Uncompressed package size: a fair proxy for the memory a parsed deck holds."""
+        try:
+            with zipfile.ZipFile(path) as zf:
+                return sum(info.file_size for info in zf.infolist())
+        except (OSError, zipfile.BadZipFile):
+            return os.path.getsize(path)
+
+    @classmethod
+    def get(cls, path: Path):
+        """Returns the parsed Presentation for `path`, parsing it only on a miss."""
+        key = str(path)
+        stat = os.stat(path)
+        signature = (stat.st_mtime_ns, stat.st_size)
+
+        with cls._lock:
+            entry = cls._entries.get(key)
+            if entry and entry[0] == signature:
+                cls._entries.move_to_end(key)
+                cls._hits += 1
+                return entry[1]
+            cls._misses += 1
+
+        # Parse outside the lock so other decks stay available meanwhile
+        prs = Presentation(str(path))
+        cls._store(key, signature, prs, cls._estimate_bytes(path))
+        return prs
+
+    @classmethod
+    def _store(cls, key: str, signature: Tuple[int, int], prs, cost: int):
+        with cls._lock:
+            old = cls._entries.pop(key, None)
+            if old:
+                cls._total_bytes -= old[2]
+            if cost <= cls.MAX_BYTES:
+                cls._entries[key] = (signature, prs, cost)
+                cls._total_bytes += cost
+                while cls._total_bytes > cls.MAX_BYTES:
+                    _, (_, _, evicted_cost) = cls._entries.popitem(last=False)
+                    cls._total_bytes -= evicted_cost
+                    cls._evictions += 1
+
+    @classmethod
+    def put(cls, path: Path, prs):
+        """Registers a deck that was just written to `path`, so it is not parsed back in."""
+        stat = os.stat(path)
+        cls._store(str(path), (stat.st_mtime_ns, stat.st_size), prs, cls._estimate_bytes(path))
+
+    @classmethod
+    def clear(cls):
+        with cls._lock:
+            cls._entries.clear()
+            cls._total_bytes = 0
+
+    @classmethod
+    def stats(cls) -> Dict[str, Any]:
+        with cls._lock:
+            return {
+                "entries": len(cls._entries),
+                "bytes": cls._total_bytes,
+                "max_bytes": cls.MAX_BYTES,
+                "hits": cls._hits,
+                "misses": cls._misses,
+                "evictions": cls._evictions
+            }
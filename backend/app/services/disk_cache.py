@@ -0,0 +1,140 @@
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Optional, Dict, Any
+
+class DiskCache:
+    """
+    A folder of cache entries (files or directories) named by a fingerprint:
+    - Entries are written to a temp name and renamed into place, so readers never see partial data
+    - Hits refresh the entry's access time (set explicitly, so noatime mounts do not matter);
+      the mtime is left alone, since readers may key on it
+    - The folder is pruned back under `max_bytes`, least recently used entries first: after every
+      store, or (without `auto_prune`) when the owner calls prune() at a point where no entry is in use
+    - Keeps a running byte total, so the folder is only listed when it is over budget; entries
+      written by other processes are counted through add_bytes() (see take_added())
+    """
+
+    def __init__(self, root: Path, max_bytes: int, auto_prune: bool = True):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.auto_prune = auto_prune
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        # Bytes in the folder (None until it was listed once); bytes stored since take_added()
+        self._total: Optional[int] = None
+        self._added = 0
+
+    def path_for(self, key: str, suffix: str = "") -> Path:
+        return self.root / f"{key}{suffix}"
+
+    def lookup(self, key: str, suffix: str = "") -> Optional[Path]:
+        path = self.path_for(key, suffix)
+        if path.exists():
+            try:
+                os.utime(path, ns=(time.time_ns(), path.stat().st_mtime_ns))
+            except OSError:
+                pass
+            self.hits += 1
+            return path
+        self.misses += 1
+        return None
+
+    def store(self, key: str, suffix: str, writer: Callable[[Path], None]) -> Path:
+        """Calls writer(tmp_path) and moves the result into the cache."""
+        self.root.mkdir(parents=True, exist_ok=True)
+        path = self.path_for(key, suffix)
+        tmp_path = self.root / f".{key}.{os.getpid()}.{threading.get_ident()}.tmp{suffix}"
+        try:
+            writer(tmp_path)
+            if path.exists():
+                # Another worker produced the same entry meanwhile; both are identical
+                self._remove(tmp_path)
+            else:
+                size = self._size(tmp_path)
+                os.replace(tmp_path, path)
+                with self._lock:
+                    self._added += size
+                    if self._total is not None:
+                        self._total += size
+        except BaseException:
+            self._remove(tmp_path)
+            raise
+        if self.auto_prune:
+            self.prune()
+        return path
+
+    def discard(self, key: str, suffix: str = ""):
+        path = self.path_for(key, suffix)
+        try:
+            size = self._size(path)
+        except OSError:
+            return
+        self._remove(path)
+        self.add_bytes(-size)
+
+    def add_bytes(self, size: int):
+        """Counts entries written (or removed) elsewhere, e.g. by a worker process."""
+        with self._lock:
+            if self._total is not None:
+                self._total += size
+
+    def take_added(self) -> int:
+        """Bytes stored by this process since the last call (a worker reports them to its parent)."""
+        with self._lock:
+            added, self._added = self._added, 0
+            return added
+
+    @staticmethod
+    def _remove(path: Path):
+        if path.is_dir():
+            shutil.rmtree(path, ignore_errors=True)
+        else:
+            try:
+                path.unlink()
+            except OSError:
+                pass
+
+    @staticmethod
+    def _size(path: Path) -> int:
+        if not path.is_dir():
+            return path.stat().st_size
+        total = 0
+        for dir_path, _, files in os.walk(path):
+            for f in files:
+                try:
+                    total += os.path.getsize(os.path.join(dir_path, f))
+                except OSError:
+                    pass
+        return total
+
+    def prune(self):
+        with self._lock:
+            if self._total is not None and self._total <= self.max_bytes:
+                return
+            entries = []
+            try:
+                for entry in os.scandir(self.root):
+                    if entry.name.startswith('.'):
+                        continue
+                    path = Path(entry.path)
+                    entries.append((entry.stat().st_atime, self._size(path), path))
+            except OSError:
+                return
+
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries, key=lambda e: e[0]):
+                if total <= self.max_bytes:
+                    break
+                self._remove(path)
+                total -= size
+            self._total = total
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "root": str(self.root), "max_bytes": self.max_bytes, "bytes": self._total,
+            "hits": self.hits, "misses": self.misses
+        }
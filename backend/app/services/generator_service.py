@@ -1,8 +1,17 @@
 import os
-import re
-import shutil
+import gc
+import json
+import zipfile
+import hashlib
+import tempfile
+import threading
+import multiprocessing
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor, as_completed, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, Tuple, Set
+from lxml import etree
 from pptx import Presentation
 
 # Import TranslationService to build context
@@ -14,95 +23,115 @@ except ImportError:
     except ImportError:
         import translation_service as TranslationService
 
+try:
+    from app.services.library_index import LibraryIndex
+    from app.services.merge_service import SlideMerger
+    from app.services.deck_cache import DeckCache
+    from app.services.image_service import ImageService
+    from app.services.substitution_service import PlaceholderSubstitutor
+    from app.services.disk_cache import DiskCache
+    from app.services.copy_service import CopyService
+    from app.services.stream_merge_service import StreamingMerger
+    from app.services.memory_monitor import MemoryMonitor
+except ImportError:
+    from .library_index import LibraryIndex
+    from .merge_service import SlideMerger
+    from .deck_cache import DeckCache
+    from .image_service import ImageService
+    from .substitution_service import PlaceholderSubstitutor
+    from .disk_cache import DiskCache
+    from .copy_service import CopyService
+    from .stream_merge_service import StreamingMerger
+    from .memory_monitor import MemoryMonitor
+
 class GeneratorService:
     """
     Handles the generation of the final session output:
     - Finds best matching files
-    - Copies exercises
-    - Merges PPTX files
+    - Copies exercises (filling in placeholders in Word/Excel ones)
+    - Merges PPTX files (package-level slide cloning, see SlideMerger; or zip-level streaming, see StreamingMerger)
     - Replaces placeholders (text & images)
+    - Keeps every processed deck as a cached fragment, so unchanged topics are reused
+    - Keeps whole outputs per request + input manifest, so repeated requests are materialized
     """
 
+    # Processed decks, named after a fingerprint of their inputs (overridden by main.py).
+    # Pruned once per session, after the merge (see _prune_caches)
+    FRAGMENTS = DiskCache(Path(tempfile.gettempdir()) / "sap-fragments", 1024 * 1024 * 1024, auto_prune=False)
+    # Bump when processing changes, so fragments made by older code are not reused
+    FRAGMENT_VERSION = 1
+
+    # Complete session outputs, named after a fingerprint of request + inputs (overridden by main.py)
+    OUTPUTS = DiskCache(Path(tempfile.gettempdir()) / "sap-outputs", 2 * 1024 * 1024 * 1024)
+    OUTPUT_MANIFEST = "manifest.json"
+    # Bump when the output of a request changes, so older cached outputs are not reused
+    OUTPUT_VERSION = 2
+
+    # Exercises whose text parts get placeholders filled in (others are copied as-is)
+    SUBSTITUTED_EXERCISES = ('.docx', '.docm', '.dotx', '.xlsx', '.xlsm', '.xltx')
+
+    # Pool workers are always spawned: forking the server (watcher, job and warm-up threads
+    # running) could hand a child a lock another thread held, and hang it
+    POOL_START_METHOD = "spawn"
+
+    # Worker processes for deck processing, kept between sessions so they start only once.
+    # Sessions running at the same time share it; it is only replaced while no session uses it.
+    _deck_pool: Optional[ProcessPoolExecutor] = None
+    _deck_pool_size = 0
+    _deck_pool_users = 0
+    # Worker pids, as reported by the decks they processed (for MemoryMonitor)
+    _deck_pool_pids: Set[int] = set()
+    _deck_pool_lock = threading.Lock()
+
     @staticmethod
-    def find_best_matches(library_path: Path, topic: str, lang: str, ind: str) -> List[Path]:
+    def _codes_for(labels, code: str) -> List[str]:
         """
-        Finds the most specific file version (Topic_Lang_Ind) or falls back to generic.
+        Expands a language/industry code with the 'matches' aliases from the settings.
+        The code itself may also be an alias, in which case it resolves to its owner.
         """
-        base_topic = Path(topic).stem
-        found_files = []
-
-        # Priority: Specific > Lang > Ind > Generic
-        candidates = [
-            f"{base_topic}_{lang}_{ind}",
-            f"{base_topic}_{ind}_{lang}",
-            f"{base_topic}_{lang}",
-            f"{base_topic}_{ind}",
-            base_topic
-        ]
-
-        best_file = None
-        for root, _, files in os.walk(library_path):
-            for cand in candidates:
-                for f in files:
-                    f_path = Path(root) / f
-                    if f_path.stem == cand:
-                        best_file = f_path
-                        break
-                if best_file:
-                    break
-            if best_file:
+        codes = [code]
+        target = code.lower().strip()
+        for item in labels or []:
+            aliases = [m for m in item.matches if m]
+            if item.code.lower() == target or target in (m.lower() for m in aliases):
+                codes = [item.code] + aliases + [code]
                 break
 
-        if best_file:
-            found_files.append(best_file)
-            solution_name = f"{best_file.stem}_solution{best_file.suffix}"
-            solution_path = best_file.parent / solution_name
-            if solution_path.exists():
-                found_files.append(solution_path)
-
-        return found_files
+        seen, unique = set(), []
+        for c in codes:
+            if c and c.lower() not in seen:
+                seen.add(c.lower())
+                unique.append(c)
+        return unique
 
-    @staticmethod
-    def _find_screenshot(topic_folder: Path, shape_name: str, lang: str, ind: str) -> Optional[Path]:
+    @classmethod
+    def find_best_matches(cls, library_path: Path, topic: str, lang: str, ind: str, settings=None) -> List[Path]:
         """
-        Looks for a matching image in the 'screenshots' subfolder.
+        Finds the most specific file version (Topic_Lang_Ind) or falls back to generic.
+        Lookups are served from the LibraryIndex instead of walking the library.
         """
-        screenshots_dir = topic_folder / "screenshots"
-        if not screenshots_dir.exists():
-            return None
-
-        extensions = ['.png', '.jpg', '.jpeg']
-        candidates = [
-            f"{shape_name}_{lang}_{ind}",
-            f"{shape_name}_{ind}_{lang}",
-            f"{shape_name}_{lang}",
-            f"{shape_name}_{ind}",
-            shape_name
-        ]
-
-        try:
-            files = os.listdir(screenshots_dir)
-            for cand in candidates:
-                for ext in extensions:
-                    target = f"{cand}{ext}"
-                    for f in files:
-                        if f.lower() == target.lower():
-                            return screenshots_dir / f
-        except OSError:
-            pass
-        return None
+        langs = cls._codes_for(settings.languages if settings else [], lang)
+        inds = cls._codes_for(settings.industries if settings else [], ind)
+        return LibraryIndex.get(library_path).resolve(topic, langs, inds)
 
     @staticmethod
-    def _replace_image_contain(slide, shape, image_path: Path) -> bool:
+    def _replace_image_contain(slide, shape, image_path: Path, dpi: int = ImageService.DEFAULT_DPI,
+                               recompress: bool = False, merger: Optional[SlideMerger] = None) -> bool:
         """
         Replaces a shape with an image, maintaining aspect ratio (contain) and centering.
+        The image is downsampled to the shape's size at `dpi` before embedding, and
+        registered through `merger` so identical images share one media part.
         """
         try:
             old_left, old_top = shape.left, shape.top
             old_width, old_height = shape.width, shape.height
+            image_path = ImageService.prepare_image(image_path, old_width, old_height, dpi, recompress)
 
             # Insert new image - python-pptx expects string or stream
-            new_pic = slide.shapes.add_picture(str(image_path), 0, 0)
+            if merger:
+                new_pic = merger.add_picture(slide, str(image_path), 0, 0)
+            else:
+                new_pic = slide.shapes.add_picture(str(image_path), 0, 0)
 
             native_width = new_pic.width
             native_height = new_pic.height
@@ -139,54 +168,494 @@ class GeneratorService:
             print(f"ERROR replacing image: {e}")
             return False
 
+    @classmethod
+    def _process_slide(cls, slide, screenshots: Dict[str, Path], substitutor: PlaceholderSubstitutor, options: Dict[str, Any]) -> int:
+        """
+        Fills in placeholders (shapes, tables, groups, notes) and swaps named shapes for screenshots.
+        `screenshots` is the ImageService index of the deck's folder, `options` holds
+        lang, ind, dpi, recompress and the merger of the deck being processed.
+        Returns the number of images placed.
+        """
+        substitutor.substitute_slide(slide)
+
+        images_placed = 0
+        # Copy the shape list: replacing an image removes the original shape
+        for shape in list(slide.shapes):
+            img_path = ImageService.find_screenshot(screenshots, shape.name, options["lang"], options["ind"])
+            if img_path and cls._replace_image_contain(
+                slide, shape, img_path, options["dpi"], options["recompress"], options["merger"]
+            ):
+                images_placed += 1
+        return images_placed
+
+    @staticmethod
+    def _stat_entry(path: Path) -> List[Any]:
+        """[path, mtime, size] of a file, or [path, None, None] when it does not exist."""
+        try:
+            stat = os.stat(path)
+            return [str(path), stat.st_mtime_ns, stat.st_size]
+        except OSError:
+            return [str(path), None, None]
+
+    @classmethod
+    def _fragment_key(cls, deck_path: Path, context: Dict[str, Any], screenshots: Dict[str, Path], options: Dict[str, Any]) -> str:
+        """
+        Fingerprint of everything a processed deck depends on: the source file, the
+        resolved context (translation files + system variables), the screenshots and the image options.
+        """
+        payload = json.dumps({
+            "version": cls.FRAGMENT_VERSION,
+            "deck": cls._stat_entry(deck_path),
+            "context": context,
+            "screenshots": [cls._stat_entry(path) for _, path in sorted(screenshots.items())],
+            "options": options
+        }, sort_keys=True, default=str)
+        return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+    @classmethod
+    def _build_fragment(cls, deck_path: Path, library_path: Path, system_vars: Dict[str, Any],
+                        options: Dict[str, Any], share: bool = True) -> Tuple[Path, Any, int]:
+        """
+        Returns (fragment path, Presentation, images placed) for one deck with its
+        placeholders and screenshots filled in. When an identical fragment was made
+        before, the Presentation is None and nothing is processed.
+        With `share`, a freshly processed deck is handed to the DeckCache for merging.
+        """
+        context = TranslationService.build_file_context(
+            library_path, deck_path, options["lang"], options["ind"], system_vars
+        )
+        screenshots = ImageService.screenshot_index(deck_path.parent)
+        key = cls._fragment_key(deck_path, context, screenshots, options)
+
+        cached = cls.FRAGMENTS.lookup(key, ".pptx")
+        if cached:
+            return cached, None, 0
+
+        prs = Presentation(str(deck_path))
+        substitutor = PlaceholderSubstitutor(context)
+        slide_options = dict(options, merger=SlideMerger(prs))
+        images_placed = sum(cls._process_slide(slide, screenshots, substitutor, slide_options) for slide in prs.slides)
+
+        fragment = cls.FRAGMENTS.store(key, ".pptx", lambda tmp_path: prs.save(str(tmp_path)))
+        if share:
+            DeckCache.put(fragment, prs)
+        return fragment, prs, images_placed
+
+    @classmethod
+    def _process_deck(cls, deck_path: Path, library_path: Path, system_vars: Dict[str, Any],
+                      options: Dict[str, Any]) -> Tuple[Path, bool, int, int, Tuple[int, int]]:
+        """
+        Process pool entry point: builds one fragment, returns (fragment path, reused, images placed,
+        pid, bytes added to the fragment and image caches), so the parent can keep their totals.
+        """
+        fragment, prs, images_placed = cls._build_fragment(deck_path, library_path, system_vars, options, share=False)
+        reused = prs is None
+        # python-pptx packages are reference cycles: free the deck before the next one arrives
+        prs = None
+        gc.collect()
+        added = (cls.FRAGMENTS.take_added(), ImageService.CACHE.take_added())
+        return fragment, reused, images_placed, os.getpid(), added
+
+    @classmethod
+    def _worker_config(cls) -> Tuple[Tuple[Path, int], ...]:
+        return tuple((cache.root, cache.max_bytes) for cache in (cls.FRAGMENTS, cls.OUTPUTS, ImageService.CACHE))
+
+    @classmethod
+    def _init_worker(cls, *caches: Tuple[Path, int]):
+        """
+        Pool initializer for the deck and batch workers. Spawned workers import this module
+        afresh, so the cache locations and limits main.py configured are passed along; the
+        rest a worker touches (parsed translations, screenshot indexes) is memoized per process.
+        Workers never share decks, so their DeckCache stays empty.
+        """
+        for cache, (root, max_bytes) in zip((cls.FRAGMENTS, cls.OUTPUTS, ImageService.CACHE), caches):
+            cache.root, cache.max_bytes = root, max_bytes
+
+    @classmethod
+    def _new_pool(cls, workers: int) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context(cls.POOL_START_METHOD),
+            initializer=cls._init_worker, initargs=cls._worker_config()
+        )
+
+    @classmethod
+    @contextmanager
+    def _use_deck_pool(cls, size: int):
+        """
+        The shared deck pool, created with `size` workers when there is none yet. A pool of
+        another size is only replaced while no session uses it: shutting it down would cancel
+        the decks of a session still waiting for them.
+        """
+        with cls._deck_pool_lock:
+            if cls._deck_pool is None or (cls._deck_pool_size != size and cls._deck_pool_users == 0):
+                if cls._deck_pool is not None:
+                    cls._deck_pool.shutdown(wait=False)
+                cls._deck_pool = cls._new_pool(size)
+                cls._deck_pool_size = size
+                cls._deck_pool_pids = set()
+            pool = cls._deck_pool
+            cls._deck_pool_users += 1
+        try:
+            yield pool
+        finally:
+            with cls._deck_pool_lock:
+                cls._deck_pool_users -= 1
+
+    @classmethod
+    def _discard_deck_pool(cls, pool: ProcessPoolExecutor):
+        """Drops a broken pool (every session using it has failed already); the next session starts a new one."""
+        with cls._deck_pool_lock:
+            if cls._deck_pool is pool:
+                cls._deck_pool = None
+                cls._deck_pool_pids = set()
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    @staticmethod
+    def _deck_pool_workers(settings) -> int:
+        """Size of the shared deck pool: the configured number of workers, or one per CPU."""
+        configured = settings.deck_workers if settings else 0
+        return max(1, configured or os.cpu_count() or 1)
+
+    @classmethod
+    def _deck_workers(cls, settings, decks: int) -> int:
+        """Decks one session processes at the same time."""
+        return max(1, min(decks, cls._deck_pool_workers(settings)))
+
+    @classmethod
+    def _build_fragments(cls, decks: List[Path], library_path: Path, system_vars: Dict[str, Any],
+                         options: Dict[str, Any], streaming: bool, workers: int, job=None, pool_size: int = 0):
+        """
+        Processes every deck into a fragment, returning ([(deck, fragment, Presentation or None)], images, reused).
+        With several workers the decks are processed in worker processes and only the fragment
+        paths come back (merging reads the fragment files); the order of `decks` is kept.
+        Falls back to processing here when the pool cannot run.
+        """
+        if workers > 1:
+            with cls._use_deck_pool(max(pool_size, workers)) as pool:
+                try:
+                    return cls._build_fragments_parallel(pool, decks, library_path, system_vars, options, workers, job)
+                except BrokenProcessPool as e:
+                    cls._discard_deck_pool(pool)
+                    print(f"WARNING: Deck workers failed ({e}), processing decks one by one")
+
+        fragments: List[Tuple[Path, Path, Any]] = []
+        images_placed = topics_reused = 0
+        for i, deck_path in enumerate(decks):
+            try:
+                # The first deck that builds becomes the merge target (fragments[0]), so it must
+                # not end up in the shared DeckCache; decks before it may have failed
+                fragment, fresh_prs, placed = cls._build_fragment(
+                    deck_path, library_path, system_vars, options, share=bool(fragments) and not streaming
+                )
+            except Exception as e:
+                # Narrowed for specific file processing errors
+                print(f"ERROR processing {deck_path.name}: {e}")
+                continue
+            reused = fresh_prs is None
+            fragments.append((deck_path, fragment, None if streaming else fresh_prs))
+            if streaming:
+                # python-pptx packages are reference cycles: free the deck (and its blobs) right away
+                fresh_prs = None
+                gc.collect()
+            images_placed += placed
+            topics_reused += reused
+
+            cls._progress(
+                job, "processed", f"{'Reused' if reused else 'Processed'} {deck_path.name}",
+                current=i + 1, total=len(decks), reused=reused
+            )
+        return fragments, images_placed, topics_reused
+
+    @classmethod
+    def _build_fragments_parallel(cls, pool: ProcessPoolExecutor, decks: List[Path], library_path: Path,
+                                  system_vars: Dict[str, Any], options: Dict[str, Any], workers: int, job=None):
+        """
+        Hands the decks to the shared pool, at most `workers` at a time, so a session
+        running alongside this one keeps its share of the pool.
+        """
+        built: List[Optional[Tuple[Path, bool, int, int, Tuple[int, int]]]] = [None] * len(decks)
+        pending: Dict[Any, int] = {}
+        queued = iter(enumerate(decks))
+        done = 0
+        try:
+            while True:
+                for i, deck_path in queued:
+                    pending[pool.submit(cls._process_deck, deck_path, library_path, system_vars, options)] = i
+                    if len(pending) >= workers:
+                        break
+                if not pending:
+                    break
+
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    i = pending.pop(future)
+                    done += 1
+                    try:
+                        built[i] = future.result()
+                    except BrokenProcessPool:
+                        raise
+                    except Exception as e:
+                        print(f"ERROR processing {decks[i].name}: {e}")
+                        continue
+                    with cls._deck_pool_lock:
+                        cls._deck_pool_pids.add(built[i][3])
+                    cls.FRAGMENTS.add_bytes(built[i][4][0])
+                    ImageService.CACHE.add_bytes(built[i][4][1])
+                    reused = built[i][1]
+                    cls._progress(
+                        job, "processed", f"{'Reused' if reused else 'Processed'} {decks[i].name}",
+                        current=done, total=len(decks), reused=reused
+                    )
+        except BaseException:
+            # Cancellation (or a crash) should not wait for the submitted decks
+            for future in pending:
+                future.cancel()
+            raise
+
+        fragments = [(decks[i], entry[0], None) for i, entry in enumerate(built) if entry]
+        images_placed = sum(entry[2] for entry in built if entry)
+        topics_reused = sum(entry[1] for entry in built if entry)
+        return fragments, images_placed, topics_reused
+
+    @classmethod
+    def _prune_caches(cls):
+        """
+        Prunes the fragment and image caches, once a session has merged. Never done by the deck
+        workers or during a session: it could remove entries the session still has to read.
+        """
+        cls.FRAGMENTS.prune()
+        ImageService.CACHE.prune()
+
+    # --- OUTPUT CACHE ---
+
+    @classmethod
+    def _output_key(cls, req, plan: Dict[str, Any], library_path: Path, options: Dict[str, Any]) -> str:
+        """Fingerprint of a request and the manifest of every input file it resolved to."""
+        files = list(plan["pptx"]) + [path for path, _ in plan["exercises"]]
+        folders = sorted({library_path} | {path.parent for path in files})
+
+        payload = json.dumps({
+            "version": [cls.FRAGMENT_VERSION, cls.OUTPUT_VERSION],
+            "request": req.model_dump(),
+            "options": options,
+            "inputs": [cls._stat_entry(path) for path in files],
+            "translations": [cls._stat_entry(folder / "translations.json") for folder in folders],
+            "screenshots": [
+                cls._stat_entry(shot)
+                for path in plan["pptx"]
+                for _, shot in sorted(ImageService.screenshot_index(path.parent).items())
+            ]
+        }, sort_keys=True, default=str)
+        return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+    @classmethod
+    def _store_output(cls, key: str, target_dir: Path, outputs: List[Path], result: Dict[str, Any]):
+        """Links (or copies) the generated files into the output cache, with the result that produced them."""
+        def write(entry_dir: Path):
+            files = []
+            for path in outputs:
+                rel = path.relative_to(target_dir)
+                dest = entry_dir / rel
+                dest.parent.mkdir(parents=True, exist_ok=True)
+                CopyService.link_or_copy(path, dest)
+                stat = os.stat(dest)
+                files.append([rel.as_posix(), stat.st_mtime_ns, stat.st_size])
+            with open(entry_dir / cls.OUTPUT_MANIFEST, "w", encoding="utf-8") as f:
+                json.dump({"result": result, "files": files}, f)
+
+        try:
+            cls.OUTPUTS.store(key, "", write)
+        except OSError as e:
+            print(f"WARNING: Could not cache output: {e}")
+
+    @classmethod
+    def _restore_output(cls, key: str, target_dir: Path) -> Optional[Dict[str, Any]]:
+        """
+        Materializes a cached output into target_dir. Entries whose files changed since
+        they were stored (e.g. an output edited in place through a hardlink) are discarded.
+        """
+        entry_dir = cls.OUTPUTS.lookup(key)
+        if entry_dir is None:
+            return None
+
+        try:
+            with open(entry_dir / cls.OUTPUT_MANIFEST, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+            for rel, mtime, size in manifest["files"]:
+                stat = os.stat(entry_dir / rel)
+                if (stat.st_mtime_ns, stat.st_size) != (mtime, size):
+                    raise ValueError(f"{rel} was modified")
+
+            for rel, _, _ in manifest["files"]:
+                dest = target_dir / rel
+                dest.parent.mkdir(parents=True, exist_ok=True)
+                CopyService.link_or_copy(entry_dir / rel, dest)
+        except (OSError, ValueError, KeyError, json.JSONDecodeError) as e:
+            print(f"WARNING: Discarding cached output: {e}")
+            cls.OUTPUTS.discard(key)
+            return None
+
+        result = dict(manifest["result"])
+        result.update(target_dir=str(target_dir), topics_reused=result.get("topics_total", 0), output_reused=True)
+        return result
+
+    @staticmethod
+    def _plan_exercise_names(exercises: List[Tuple[Path, str]], exercises_dir: Path) -> List[Tuple[Path, Path]]:
+        """
+        Destination of every exercise: its own name, or prefixed with the section title
+        when an earlier exercise of the session already took that name.
+        Names are compared case-insensitively, like the filesystems they end up on.
+        """
+        taken = set()
+        placements = []
+        for file_path, section_title in exercises:
+            final_name = file_path.name
+            if final_name.casefold() in taken:
+                safe_title = section_title.replace("/", "-").replace("\\", "-")
+                final_name = f"{safe_title} - {file_path.name}"
+                counter = 1
+                while final_name.casefold() in taken:
+                    final_name = f"{safe_title} - {file_path.stem}_{counter}{file_path.suffix}"
+                    counter += 1
+            taken.add(final_name.casefold())
+            placements.append((file_path, exercises_dir / final_name))
+        return placements
+
+    @classmethod
+    def _substitute_exercise(cls, src: Path, dest: Path, library_path: Path,
+                             system_vars: Dict[str, Any], options: Dict[str, Any]) -> Optional[str]:
+        """
+        Writes a Word/Excel exercise with its placeholders filled in (same context as the decks).
+        Returns 'substituted', None when the file has no placeholders and is placed as usual,
+        or 'unfilled' when filling in failed and the file was copied as-is.
+        """
+        if src.suffix.lower() not in cls.SUBSTITUTED_EXERCISES:
+            return None
+        try:
+            context = TranslationService.build_file_context(
+                library_path, src, options["lang"], options["ind"], system_vars
+            )
+            if PlaceholderSubstitutor(context).substitute_package(src, dest):
+                return "substituted"
+        except Exception as e:
+            # Any failure is this file's alone: it is still copied as-is, the session goes on
+            print(f"WARNING: Could not fill in placeholders in {src.name}: {e}")
+            CopyService.place(src, dest, "copy")
+            return "unfilled"
+        return None
+
     @staticmethod
-    def _apply_text_replacements(text_frame, context: Dict[str, str]):
-        """
-        Replaces [% key %] placeholders in text.
-        """
-        if not text_frame or not text_frame.text:
-            return
-        text = text_frame.text
-
-        # Fixed: Removed redundant escape for closing bracket
-        pattern = re.compile(r'\[%\s*([\w\-]+)\s*%]')
-        matches = pattern.findall(text)
-        if not matches:
-            return
-
-        new_text = text
-        replaced = False
-        for key in matches:
-            val = None
-            if key in context:
-                val = context[key]
-            elif key.lower() in context:
-                val = context[key.lower()]
-
-            if val is not None:
-                key_pattern = re.compile(r'\[%\s*' + re.escape(key) + r'\s*%]', re.IGNORECASE)
-                new_text = key_pattern.sub(str(val), new_text)
-                replaced = True
-
-        if replaced:
+    def _progress(job, stage: str, message: str, **data):
+        """Logs a progress step and forwards it to the running job (if any)."""
+        print(f"INFO: {message}")
+        if job:
+            job.emit(stage, message, **data)
+
+    @classmethod
+    def plan_session(cls, sections, library_path: Path, lang: str, ind: str, settings=None) -> Dict[str, Any]:
+        """
+        Resolves every file a session needs, without touching the output folder.
+        The plan only depends on the playlist, language and industry, so it can be
+        shared by every customer that uses the same combination.
+        """
+        pptx_merge_list = []
+        exercises = []
+
+        # A. Intro
+        intro_matches = cls.find_best_matches(library_path, "Intro", lang, ind, settings)
+        if intro_matches:
+            pptx_merge_list.append(intro_matches[0])
+
+        # B. Sections & Topics
+        for section in sections:
+            for topic in section.topics:
+                for file_path in cls.find_best_matches(library_path, topic, lang, ind, settings):
+                    if file_path.suffix.lower() == '.pptx':
+                        pptx_merge_list.append(file_path)
+                    else:
+                        exercises.append((file_path, section.title))
+
+        # C. Outro
+        outro_matches = cls.find_best_matches(library_path, "Outro", lang, ind, settings)
+        if outro_matches:
+            pptx_merge_list.append(outro_matches[0])
+
+        return {"pptx": pptx_merge_list, "exercises": exercises}
+
+    @classmethod
+    def _merge_in_memory(cls, fragments: List[Tuple[Path, Path, Any]], output_pptx: Path, job=None) -> int:
+        """
+        Merges the fragments with python-pptx: the whole output deck lives in memory until it is saved.
+        Returns the number of decks that could not be merged.
+        """
+        # python-pptx expects string path or file-like object
+        _, master_fragment, prs = fragments[0]
+        if prs is None:
+            prs = Presentation(str(master_fragment))
+        merger = SlideMerger(prs)
+
+        failed = 0
+        for i, (deck_path, fragment, _) in enumerate(fragments[1:], start=2):
             try:
-                text_frame.text = new_text
-            except (AttributeError, ValueError):
-                pass
+                # Cached decks are shared, the merger only reads from them
+                merger.append_presentation(DeckCache.get(fragment))
+            except Exception as e:
+                print(f"ERROR merging {deck_path.name}: {e}")
+                failed += 1
+            cls._progress(job, "merged", f"Merged {deck_path.name}", current=i, total=len(fragments))
+
+        # Save - python-pptx save() accepts string path
+        if output_pptx.exists():
+            # May be hardlinked into the output cache: replace it instead of writing through the link
+            output_pptx.unlink()
+        prs.save(str(output_pptx))
+        return failed
 
     @classmethod
-    def generate_session(cls, req, library_path: Path, output_path: Path) -> Dict[str, Any]:
+    def _merge_streaming(cls, fragments: List[Tuple[Path, Path, Any]], output_pptx: Path, job=None) -> int:
+        """
+        Merges the fragment files zip to zip, one at a time (see StreamingMerger); memory stays flat.
+        Returns the number of decks that could not be merged.
+        """
+        failed = 0
+        with StreamingMerger(fragments[0][1], output_pptx) as merger:
+            for i, (deck_path, fragment, _) in enumerate(fragments[1:], start=2):
+                try:
+                    merger.append(fragment)
+                except (OSError, KeyError, zipfile.BadZipFile, zipfile.LargeZipFile, etree.XMLSyntaxError) as e:
+                    # Parts written before the failure stay unreferenced, the deck itself is skipped
+                    print(f"ERROR merging {deck_path.name}: {e}")
+                    failed += 1
+                cls._progress(job, "merged", f"Merged {deck_path.name}", current=i, total=len(fragments))
+        return failed
+
+    @classmethod
+    def _deck_worker_pids(cls) -> List[int]:
+        with cls._deck_pool_lock:
+            return list(cls._deck_pool_pids)
+
+    @staticmethod
+    def _folder_name(req) -> str:
+        """The output folder of a session, below output_path."""
+        return f"{req.date}_{req.customer_name}_{req.session_name}".replace(" ", "_")
+
+    @classmethod
+    def generate_session(cls, req, library_path: Path, output_path: Path, settings=None, job=None, plan=None,
+                         deck_workers: Optional[int] = None) -> Dict[str, Any]:
         """
         Main orchestration function.
+        `settings` (SettingsModel) supplies the language/industry aliases used for matching.
+        `job` (JobService Job) receives progress events and may cancel between steps.
+        `plan` (from plan_session) skips file resolution when it was already done.
+        `deck_workers` overrides settings.deck_workers (batch items process their decks in-process).
         """
         # 1. Setup Folders
-        folder_name = f"{req.date}_{req.customer_name}_{req.session_name}".replace(" ", "_")
-        target_dir = output_path / folder_name
+        target_dir = output_path / cls._folder_name(req)
         target_dir.mkdir(parents=True, exist_ok=True)
         exercises_dir = target_dir / "exercises"
         exercises_dir.mkdir(exist_ok=True)
 
-        print(f"INFO: Generating session for {req.customer_name}")
+        cls._progress(job, "start", f"Generating session for {req.customer_name}")
 
         # 2. System Variables
         system_vars = {
@@ -202,128 +671,168 @@ class GeneratorService:
             "language": req.language_code
         }
 
-        files_copied = 0
-        pptx_merge_list = []
-
         # 3. Gather Files
-        # A. Intro
-        intro_matches = cls.find_best_matches(library_path, "Intro", req.language_code, req.industry_code)
-        if intro_matches:
-            pptx_merge_list.append(intro_matches[0])
-
-        # B. Sections & Topics
-        for section in req.sections:
-            for topic in section.topics:
-                matches = cls.find_best_matches(library_path, topic, req.language_code, req.industry_code)
-                for file_path in matches:
-                    if file_path.suffix.lower() == '.pptx':
-                        pptx_merge_list.append(file_path)
-                    else:
-                        # Copy Exercises with Section Prefix
-                        dest_folder = exercises_dir
-                        final_name = file_path.name
-                        dest_path = dest_folder / final_name
-
-                        if dest_path.exists():
-                            safe_title = section.title.replace("/", "-").replace("\\", "-")
-                            final_name = f"{safe_title} - {file_path.name}"
-                            dest_path = dest_folder / final_name
-                            counter = 1
-                            while dest_path.exists():
-                                final_name = f"{safe_title} - {file_path.stem}_{counter}{file_path.suffix}"
-                                dest_path = dest_folder / final_name
-                                counter += 1
-
-                        try:
-                            shutil.copy2(file_path, dest_path)
-                            files_copied += 1
-                        except OSError:
-                            pass
-
-        # C. Outro
-        outro_matches = cls.find_best_matches(library_path, "Outro", req.language_code, req.industry_code)
-        if outro_matches:
-            pptx_merge_list.append(outro_matches[0])
-
-        # 4. Merge & Process PPTX
-        if pptx_merge_list:
-            print(f"INFO: Merging {len(pptx_merge_list)} presentations...")
+        if plan is None:
+            plan = cls.plan_session(req.sections, library_path, req.language_code, req.industry_code, settings)
+        pptx_merge_list = plan["pptx"]
+        options = {
+            "lang": req.language_code,
+            "ind": req.industry_code,
+            "dpi": settings.image_dpi if settings else ImageService.DEFAULT_DPI,
+            "recompress": settings.image_recompress if settings else False
+        }
 
-            master_path = pptx_merge_list[0]
-            master_context = TranslationService.build_file_context(
-                library_path, master_path, req.language_code, req.industry_code, system_vars
+        # Same request, same inputs: materialize the earlier output instead of generating
+        output_key = cls._output_key(req, plan, library_path, options)
+        cached = cls._restore_output(output_key, target_dir)
+        if cached:
+            cls._progress(job, "cached", f"Reused the cached output for {req.customer_name}", files=cached["files_count"])
+            return cached
+
+        # Resident memory of this run (and of the deck workers), reported as peak_memory_mb
+        with MemoryMonitor(cls._deck_worker_pids) as memory:
+            # Copy Exercises with Section Prefix (names are planned up front, files copied concurrently)
+            topics_reused = 0
+            placements = cls._plan_exercise_names(plan["exercises"], exercises_dir)
+            outcomes = CopyService.place_many(
+                placements, settings.exercise_copy_mode if settings else "copy",
+                writer=lambda src, dest: cls._substitute_exercise(src, dest, library_path, system_vars, options)
+            )
+            outputs: List[Path] = [dest for dest, outcome in outcomes.items() if outcome != "error"]
+            files_copied = len(outputs)
+            files_skipped = sum(1 for outcome in outcomes.values() if outcome == "skipped")
+            # Files missing from (or incomplete in) the output; such outputs are not cached
+            errors = sum(1 for outcome in outcomes.values() if outcome in ("error", "unfilled"))
+
+            cls._progress(
+                job, "resolved",
+                f"Resolved {len(pptx_merge_list)} presentations and {files_copied} exercises ({files_skipped} unchanged)",
+                presentations=len(pptx_merge_list), exercises=files_copied, exercises_unchanged=files_skipped
             )
 
-            # python-pptx expects string path or file-like object
-            prs = Presentation(str(master_path))
-
-            # Process Master Slides
-            for slide in prs.slides:
-                for shape in slide.shapes:
-                    if shape.has_text_frame:
-                        cls._apply_text_replacements(shape.text_frame, master_context)
-
-                    img_path = cls._find_screenshot(master_path.parent, shape.name, req.language_code, req.industry_code)
-                    if img_path:
-                        cls._replace_image_contain(slide, shape, img_path)
+            # 4. Process Topics (reusing cached fragments) & Merge
+            if pptx_merge_list:
+                print(f"INFO: Merging {len(pptx_merge_list)} presentations...")
+                # Streaming keeps a single deck in memory at a time, so nothing is shared or held on to
+                streaming = settings.streaming_merge if settings else False
+                workers = deck_workers or cls._deck_workers(settings, len(pptx_merge_list))
+                fragments, images_placed, topics_reused = cls._build_fragments(
+                    pptx_merge_list, library_path, system_vars, options, streaming, workers, job,
+                    pool_size=cls._deck_pool_workers(settings)
+                )
+                errors += len(pptx_merge_list) - len(fragments)
 
-            # Process Sub-Presentations
-            for i in range(1, len(pptx_merge_list)):
-                sub_path = pptx_merge_list[i]
-                file_context = TranslationService.build_file_context(
-                    library_path, sub_path, req.language_code, req.industry_code, system_vars
+                cls._progress(
+                    job, "images", f"Placed {images_placed} screenshots, reused {topics_reused} topics",
+                    images=images_placed, topics_reused=topics_reused
                 )
 
-                try:
-                    sub_prs = Presentation(str(sub_path))
-                    for slide in sub_prs.slides:
-                        # Layout
-                        layout_idx = sub_prs.slide_layouts.index(slide.slide_layout)
-                        try:
-                            slide_layout = prs.slide_layouts[layout_idx]
-                        except IndexError:
-                            slide_layout = prs.slide_layouts[0]
-
-                        new_slide = prs.slides.add_slide(slide_layout)
-
-                        for shape in slide.shapes:
-                            # Placeholders
-                            if shape.is_placeholder:
-                                try:
-                                    ph_idx = shape.placeholder_format.idx
-                                    new_ph = new_slide.placeholders[ph_idx]
-                                    if shape.has_text_frame:
-                                        new_ph.text = shape.text_frame.text
-                                        cls._apply_text_replacements(new_ph.text_frame, file_context)
-                                except KeyError:
-                                    pass
-
-                            # Normal Shapes
-                            else:
-                                img_match = cls._find_screenshot(sub_path.parent, shape.name, req.language_code, req.industry_code)
-                                if img_match:
-                                    # Create temp picture to swap
-                                    temp_pic = new_slide.shapes.add_picture(str(img_match), shape.left, shape.top, shape.width, shape.height)
-                                    cls._replace_image_contain(new_slide, temp_pic, img_match)
-
-                                elif shape.has_text_frame:
-                                    new_shape = new_slide.shapes.add_textbox(
-                                        shape.left, shape.top, shape.width, shape.height
-                                    )
-                                    new_shape.text = shape.text
-                                    cls._apply_text_replacements(new_shape.text_frame, file_context)
-
-                except Exception as e:
-                    # Narrowed for specific file processing errors
-                    print(f"ERROR processing {sub_path.name}: {e}")
-
-            # Save - python-pptx save() accepts string path
-            output_pptx = target_dir / "slides.pptx"
-            prs.save(str(output_pptx))
-            files_copied += 1
+                if fragments:
+                    output_pptx = target_dir / "slides.pptx"
+                    if streaming:
+                        errors += cls._merge_streaming(fragments, output_pptx, job)
+                    else:
+                        errors += cls._merge_in_memory(fragments, output_pptx, job)
+                    cls._progress(job, "saved", f"Saved {output_pptx.name}", path=str(output_pptx))
+                    files_copied += 1
+                    outputs.append(output_pptx)
 
-        return {
+        cls._prune_caches()
+        result = {
             "status": "success",
             "target_dir": str(target_dir),
-            "files_count": files_copied
-        }
\ No newline at end of file
+            "files_count": files_copied,
+            "topics_reused": topics_reused,
+            "topics_total": len(pptx_merge_list),
+            "output_reused": False,
+            "errors": errors,
+            "peak_memory_mb": memory.peak_mb
+        }
+        if errors:
+            # A retry with the same inputs should generate again, not get this output back
+            print(f"WARNING: {errors} files failed for {req.customer_name}, the output is not cached")
+        else:
+            cls._store_output(output_key, target_dir, outputs, result)
+        return result
+
+    @classmethod
+    def _run_batch_item(cls, req, library_path: Path, output_path: Path, settings, plan) -> Dict[str, Any]:
+        """Process pool entry point: one customer of a batch."""
+        try:
+            # Customers already run one per core: no nested deck pool
+            result = cls.generate_session(req, library_path, output_path, settings, plan=plan, deck_workers=1)
+        except Exception as e:
+            print(f"ERROR: Batch generation failed for {req.customer_name}: {e}")
+            result = {"status": "error", "error": str(e)}
+        result["customer_name"] = req.customer_name
+        return result
+
+    @classmethod
+    def generate_batch(cls, session_requests, library_path: Path, output_path: Path, settings=None, job=None) -> Dict[str, Any]:
+        """
+        Generates the same playlist for many customers.
+        File plans are resolved once per language/industry combination, then the
+        sessions are built in parallel on a process pool sized to the machine.
+        """
+        # Aliased codes (e.g. a HubSpot industry) share the plan of the code they map to
+        plans, plan_keys = {}, []
+        for req in session_requests:
+            key = (
+                tuple(cls._codes_for(settings.languages if settings else [], req.language_code)),
+                tuple(cls._codes_for(settings.industries if settings else [], req.industry_code))
+            )
+            if key not in plans:
+                plans[key] = cls.plan_session(req.sections, library_path, req.language_code, req.industry_code, settings)
+            plan_keys.append(key)
+
+        cls._progress(job, "resolved", f"Resolved {len(plans)} file plans for {len(session_requests)} customers", plans=len(plans))
+
+        results: List[Optional[Dict[str, Any]]] = [None] * len(session_requests)
+        # Two customers writing into one output folder at the same time would mix their files:
+        # the first one is generated, the others fail (case-folded, as on Windows and macOS)
+        folders: Dict[str, int] = {}
+        for i, req in enumerate(session_requests):
+            first = folders.setdefault(cls._folder_name(req).casefold(), i)
+            if first != i:
+                results[i] = {
+                    "status": "error", "customer_name": req.customer_name,
+                    "error": f"Same output folder as customer {first + 1} ({session_requests[first].customer_name})"
+                }
+
+        todo = [i for i, result in enumerate(results) if result is None]
+        workers = max(1, min(len(todo), os.cpu_count() or 1))
+        with cls._new_pool(workers) as pool:
+            futures = {
+                pool.submit(
+                    cls._run_batch_item, session_requests[i], library_path, output_path, settings, plans[plan_keys[i]]
+                ): i
+                for i in todo
+            }
+            try:
+                for done, future in enumerate(as_completed(futures), start=1):
+                    i = futures[future]
+                    try:
+                        results[i] = future.result()
+                    except BrokenProcessPool as e:
+                        # A worker died (e.g. out of memory); customers that finished keep their results
+                        print(f"ERROR: Batch worker failed for {session_requests[i].customer_name}: {e}")
+                        results[i] = {"status": "error", "error": f"Worker process failed: {e}",
+                                      "customer_name": session_requests[i].customer_name}
+                    cls._progress(
+                        job, "generated",
+                        f"{'Generated' if results[i]['status'] == 'success' else 'Failed'} session for {session_requests[i].customer_name}",
+                        current=done, total=len(session_requests), customer_name=session_requests[i].customer_name
+                    )
+            except BaseException:
+                # Cancellation (or a crash) should not wait for the queued customers
+                for future in futures:
+                    future.cancel()
+                raise
+
+        failed = sum(1 for r in results if r["status"] != "success")
+        return {
+            "status": "success" if not failed else "partial",
+            "succeeded": len(results) - failed,
+            "failed": failed,
+            "results": results
+        }
@@ -0,0 +1,259 @@
+import os
+import json
+import time
+import hashlib
+import tempfile
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import List, Dict, Any, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+class HubSpotService:
+    """
+    The HubSpot company directory, as used by the configuration panel:
+    - One pooled session (keep-alive, retries with backoff on 429/5xx) and a timeout on every call
+    - Follows cursor pagination, so every company is listed, not just the first page
+    - Keeps the directory in a JSON file: it is served at once, and refreshed in the background
+      when older than TTL, fetching only companies modified since the last sync
+    - A periodic full sync drops deleted companies (the search API does not report them)
+    """
+
+    # Overridable, e.g. to point at a local stub server
+    BASE_URL = "https://api.hubapi.com"
+    # Overridden by main.py (next to the other caches)
+    CACHE_FILE = Path(tempfile.gettempdir()) / "sap-hubspot-companies.json"
+
+    TIMEOUT = (5, 30)  # (connect, read) seconds
+    PAGE_SIZE = 100
+    TTL = 15 * 60
+    FULL_SYNC_INTERVAL = 24 * 60 * 60
+    # The search API stops paging after this many results; larger deltas use a full sync
+    SEARCH_LIMIT = 10000
+    PROPERTIES = ("name", "industry", "hs_lastmodifieddate")
+
+    _session: Optional[requests.Session] = None
+    _lock = threading.Lock()
+    _state: Optional[Dict[str, Any]] = None
+    _refreshing = False
+
+    # --- HTTP ---
+
+    @classmethod
+    def _get_session(cls) -> requests.Session:
+        if cls._session is None:
+            retry = Retry(
+                total=3, backoff_factor=0.5, status_forcelist=(429, 500, 502, 503, 504),
+                allowed_methods=("GET", "POST"), respect_retry_after_header=True
+            )
+            session = requests.Session()
+            session.mount("https://", HTTPAdapter(max_retries=retry, pool_maxsize=4))
+            session.mount("http://", HTTPAdapter(max_retries=retry, pool_maxsize=4))
+            cls._session = session
+        return cls._session
+
+    @classmethod
+    def _request(cls, method: str, path: str, api_key: str, **kwargs) -> Dict[str, Any]:
+        headers = {"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"}
+        response = cls._get_session().request(method, cls.BASE_URL + path, headers=headers, timeout=cls.TIMEOUT, **kwargs)
+        response.raise_for_status()
+        return response.json()
+
+    @staticmethod
+    def _modified_ms(record: Dict[str, Any]) -> int:
+        value = record["properties"].get("hs_lastmodifieddate") or record.get("updatedAt")
+        if not value:
+            return 0
+        if str(value).isdigit():
+            return int(value)
+        return int(datetime.fromisoformat(str(value).replace("Z", "+00:00")).timestamp() * 1000)
+
+    @classmethod
+    def _fetch_all(cls, api_key: str) -> List[Dict[str, Any]]:
+        """Every company, page by page."""
+        records, after = [], None
+        while True:
+            params = {"limit": cls.PAGE_SIZE, "properties": ",".join(cls.PROPERTIES), "archived": "false"}
+            if after:
+                params["after"] = after
+            data = cls._request("GET", "/crm/v3/objects/companies", api_key, params=params)
+            records += data.get("results", [])
+            after = data.get("paging", {}).get("next", {}).get("after")
+            if not after:
+                return records
+
+    @classmethod
+    def _fetch_modified(cls, api_key: str, since_ms: int) -> Optional[List[Dict[str, Any]]]:
+        """Companies modified at or after `since_ms`, or None when there are too many to search."""
+        records, after = [], None
+        while True:
+            body = {
+                "filterGroups": [{"filters": [
+                    {"propertyName": "hs_lastmodifieddate", "operator": "GTE", "value": str(since_ms)}
+                ]}],
+                "sorts": [{"propertyName": "hs_lastmodifieddate", "direction": "ASCENDING"}],
+                "properties": list(cls.PROPERTIES),
+                "limit": cls.PAGE_SIZE
+            }
+            if after:
+                body["after"] = after
+            data = cls._request("POST", "/crm/v3/objects/companies/search", api_key, json=body)
+            if data.get("total", 0) > cls.SEARCH_LIMIT:
+                return None
+            records += data.get("results", [])
+            after = data.get("paging", {}).get("next", {}).get("after")
+            if not after:
+                return records
+
+    # --- CACHE ---
+
+    @staticmethod
+    def _key_id(api_key: str) -> str:
+        """Identifies the account a cache belongs to, without storing the key itself."""
+        return hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:16]
+
+    @classmethod
+    def _load(cls, api_key: str) -> Optional[Dict[str, Any]]:
+        """The cached directory for this key: from memory, else from disk."""
+        state = cls._state
+        if state is None:
+            try:
+                with open(cls.CACHE_FILE, "r", encoding="utf-8") as f:
+                    state = cls._state = json.load(f)
+            except (OSError, ValueError):
+                return None
+        return state if state.get("key") == cls._key_id(api_key) else None
+
+    @classmethod
+    def _save(cls, state: Dict[str, Any]):
+        cls._state = state
+        cls.CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = cls.CACHE_FILE.with_name(f".{cls.CACHE_FILE.name}.{os.getpid()}.tmp")
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(state, f)
+            os.replace(tmp_path, cls.CACHE_FILE)
+        except OSError as e:
+            # The directory still works from memory
+            print(f"WARNING: Could not write the HubSpot cache: {e}")
+
+    @classmethod
+    def _sync(cls, api_key: str, state: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Brings the cached directory up to date: incremental when possible, full otherwise."""
+        now = time.time()
+        records = None
+        full = state is None or now - state.get("full_sync_at", 0) > cls.FULL_SYNC_INTERVAL
+        if not full:
+            records = cls._fetch_modified(api_key, state["watermark"])
+            full = records is None
+
+        if full:
+            companies: Dict[str, Dict[str, Any]] = {}
+            records = cls._fetch_all(api_key)
+            watermark = 0
+        else:
+            companies = dict(state["companies"])
+            watermark = state["watermark"]
+
+        for record in records:
+            name = record["properties"].get("name")
+            if name:
+                companies[record["id"]] = {
+                    "name": name,
+                    "code": record["id"],
+                    "industry": record["properties"].get("industry") or ""
+                }
+            else:
+                companies.pop(record["id"], None)
+            # Server time, so a skewed local clock cannot skip changes
+            watermark = max(watermark, cls._modified_ms(record))
+
+        print(f"INFO: HubSpot sync ({'full' if full else 'incremental'}): {len(records)} fetched, {len(companies)} companies")
+        return {
+            "key": cls._key_id(api_key),
+            "synced_at": now,
+            "full_sync_at": now if full else state["full_sync_at"],
+            "watermark": watermark,
+            "companies": companies
+        }
+
+    @classmethod
+    def _refresh_in_background(cls, api_key: str, state: Dict[str, Any]):
+        with cls._lock:
+            if cls._refreshing:
+                return
+            cls._refreshing = True
+
+        def run():
+            try:
+                fresh = cls._sync(api_key, state)
+                with cls._lock:
+                    cls._save(fresh)
+            except (requests.RequestException, ValueError, KeyError) as e:
+                print(f"WARNING: HubSpot background refresh failed: {e}")
+            finally:
+                with cls._lock:
+                    cls._refreshing = False
+
+        threading.Thread(target=run, name="sap-hubspot-refresh", daemon=True).start()
+
+    # --- PUBLIC ---
+
+    @classmethod
+    def companies(cls, api_key: str, refresh: bool = False) -> List[Dict[str, Any]]:
+        """
+        Every company as {name, code, industry}, sorted by name.
+        The first call (or `refresh`) syncs before answering; later calls answer from
+        the cache and refresh it in the background once it is older than TTL.
+        Raises requests.RequestException when HubSpot cannot be reached and nothing is cached.
+        """
+        with cls._lock:
+            state = cls._load(api_key)
+
+        if state is None or refresh:
+            try:
+                fresh = cls._sync(api_key, state)
+            except requests.RequestException:
+                if state is None:
+                    raise
+                print("WARNING: HubSpot unreachable, serving the cached companies")
+                fresh = state
+            with cls._lock:
+                if fresh is not state:
+                    cls._save(fresh)
+                state = fresh
+        elif time.time() - state["synced_at"] > cls.TTL:
+            cls._refresh_in_background(api_key, state)
+
+        return sorted(state["companies"].values(), key=lambda c: c["name"].casefold())
+
+    @classmethod
+    def preload(cls, api_key: str) -> int:
+        """
+        Reads the cached directory from disk ahead of the first request. Returns the number of companies;
+        a cache written for another API key is left on disk (the first request replaces it) and counts 0.
+        """
+        with cls._lock:
+            state = cls._state
+            if state is None:
+                try:
+                    with open(cls.CACHE_FILE, "r", encoding="utf-8") as f:
+                        state = json.load(f)
+                except (OSError, ValueError):
+                    return 0
+            if state.get("key") != cls._key_id(api_key):
+                return 0
+            cls._state = state
+            return len(state.get("companies", {}))
+
+    @classmethod
+    def stats(cls) -> Dict[str, Any]:
+        state = cls._state
+        return {
+            "file": str(cls.CACHE_FILE),
+            "companies": len(state["companies"]) if state else 0,
+            "synced_at": state["synced_at"] if state else None
+        }
@@ -0,0 +1,158 @@
+import os
+import hashlib
+import tempfile
+import threading
+from pathlib import Path
+from typing import Dict, Any, Tuple, Optional
+from PIL import Image, UnidentifiedImageError
+
+try:
+    from app.services.disk_cache import DiskCache
+except ImportError:
+    from .disk_cache import DiskCache
+
+EMU_PER_INCH = 914400
+
+class ImageService:
+    """
+    Handles the screenshots that replace named shapes in the decks:
+    - Indexes each 'screenshots' folder once (cached across requests, invalidated by mtime)
+    - Downsamples screenshots to the size they are shown at, cached on disk (size-capped, LRU)
+    """
+
+    DEFAULT_DPI = 150
+    JPEG_QUALITY = 85
+
+    # Processed images, named after source content hash + target size (root overridden by main.py).
+    # Pruned by GeneratorService once a session has merged, not while its decks still use them
+    CACHE = DiskCache(Path(tempfile.gettempdir()) / "sap-image-cache", 512 * 1024 * 1024, auto_prune=False)
+
+    _hashes: Dict[str, Tuple[Tuple[int, int], str]] = {}
+
+    # Earlier extensions win when the same name exists in several formats
+    EXTENSIONS = ['.png', '.jpg', '.jpeg']
+
+    _indexes: Dict[str, Tuple[int, Dict[str, Path]]] = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def screenshot_index(cls, topic_folder: Path) -> Dict[str, Path]:
+        """
+        Maps the case-folded stem of every image in '<topic_folder>/screenshots'
+        to its file, so matching a shape name is a dictionary lookup.
+        """
+        screenshots_dir = topic_folder / "screenshots"
+        key = str(screenshots_dir)
+        try:
+            mtime = os.stat(screenshots_dir).st_mtime_ns
+        except OSError:
+            return {}
+
+        cached = cls._indexes.get(key)
+        if cached and cached[0] == mtime:
+            return cached[1]
+
+        index: Dict[str, Tuple[int, Path]] = {}
+        try:
+            with os.scandir(screenshots_dir) as it:
+                for entry in it:
+                    stem, ext = os.path.splitext(entry.name)
+                    ext = ext.lower()
+                    if ext not in cls.EXTENSIONS:
+                        continue
+                    rank = cls.EXTENSIONS.index(ext)
+                    folded = stem.casefold()
+                    if folded not in index or rank < index[folded][0]:
+                        index[folded] = (rank, screenshots_dir / entry.name)
+        except OSError:
+            return {}
+
+        result = {stem: path for stem, (_, path) in index.items()}
+        with cls._lock:
+            cls._indexes[key] = (mtime, result)
+        return result
+
+    @staticmethod
+    def find_screenshot(index: Dict[str, Path], shape_name: str, lang: str, ind: str) -> Optional[Path]:
+        """Most specific screenshot for a shape: Name_Lang_Ind > Name_Ind_Lang > Name_Lang > Name_Ind > Name."""
+        if not index:
+            return None
+        candidates = (
+            f"{shape_name}_{lang}_{ind}",
+            f"{shape_name}_{ind}_{lang}",
+            f"{shape_name}_{lang}",
+            f"{shape_name}_{ind}",
+            shape_name
+        )
+        for cand in candidates:
+            match = index.get(cand.casefold())
+            if match:
+                return match
+        return None
+
+    @classmethod
+    def stats(cls) -> Dict[str, Any]:
+        return dict(cls.CACHE.stats(), screenshot_folders=len(cls._indexes))
+
+    # --- RESIZE PIPELINE ---
+
+    @classmethod
+    def _content_hash(cls, path: Path) -> str:
+        """SHA-1 of the file, memoized per path + mtime + size."""
+        stat = os.stat(path)
+        signature = (stat.st_mtime_ns, stat.st_size)
+        cached = cls._hashes.get(str(path))
+        if cached and cached[0] == signature:
+            return cached[1]
+
+        with open(path, 'rb') as f:
+            digest = hashlib.sha1(f.read()).hexdigest()
+        cls._hashes[str(path)] = (signature, digest)
+        return digest
+
+    @classmethod
+    def prepare_image(cls, image_path: Path, box_width: int, box_height: int,
+                      dpi: int = DEFAULT_DPI, recompress: bool = False) -> Path:
+        """
+        Returns a version of the image no larger than needed to fill a box
+        of box_width x box_height EMU at `dpi`, optionally recompressed to JPEG.
+        Falls back to the original file when it is already small enough or unreadable.
+        """
+        if box_width <= 0 or box_height <= 0 or dpi <= 0:
+            return image_path
+
+        try:
+            with Image.open(image_path) as img:
+                width, height = img.size
+                has_alpha = img.mode in ('RGBA', 'LA', 'P') and (img.mode != 'P' or 'transparency' in img.info)
+
+                # Contain-fit inside the box, in pixels at the target density
+                scale = min(
+                    box_width / EMU_PER_INCH * dpi / width,
+                    box_height / EMU_PER_INCH * dpi / height
+                )
+                to_jpeg = recompress and not has_alpha
+                if scale >= 1 and not to_jpeg:
+                    return image_path
+                target = (max(1, round(width * min(scale, 1))), max(1, round(height * min(scale, 1))))
+
+                ext = '.jpg' if to_jpeg else image_path.suffix.lower()
+                key = f"{cls._content_hash(image_path)}_{target[0]}x{target[1]}"
+                cached = cls.CACHE.lookup(key, ext)
+                if cached:
+                    return cached
+
+                if target != (width, height):
+                    img = img.resize(target, Image.Resampling.LANCZOS)
+
+                def write(tmp_path: Path):
+                    if to_jpeg:
+                        img.convert('RGB').save(tmp_path, 'JPEG', quality=cls.JPEG_QUALITY, optimize=True)
+                    elif ext == '.png':
+                        img.save(tmp_path, 'PNG')
+                    else:
+                        img.convert('RGB').save(tmp_path, 'JPEG', quality=cls.JPEG_QUALITY)
+                return cls.CACHE.store(key, ext, write)
+        except (OSError, ValueError, UnidentifiedImageError) as e:
+            print(f"WARNING: Could not downsample {image_path.name}: {e}")
+            return image_path
@@ -0,0 +1,122 @@
+import time
+import uuid
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Callable
+
+class JobCancelled(Exception):
+    """Raised inside a running job once cancellation was requested."""
+
+class Job:
+    """
+    A unit of background work with an append-only event log:
+    - Workers report progress through emit()
+    - Long-running loops call check_cancelled() between steps
+    - Readers poll events_since() to stream the log
+    """
+
+    def __init__(self, kind: str):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.status = "queued"
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.created = time.time()
+        self.finished: Optional[float] = None
+        self._events: List[Dict[str, Any]] = []
+        self._cancel = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("success", "error", "cancelled")
+
+    def emit(self, stage: str, message: str, **data):
+        """Appends a progress event. Also acts as a cancellation checkpoint."""
+        self._append(stage, message, **data)
+        self.check_cancelled()
+
+    def _append(self, stage: str, message: str, **data):
+        with self._lock:
+            event = {"seq": len(self._events), "time": time.time(), "stage": stage, "message": message}
+            event.update(data)
+            self._events.append(event)
+
+    def events_since(self, seq: int) -> List[Dict[str, Any]]:
+        with self._lock:
+            return self._events[seq:]
+
+    def cancel(self):
+        self._cancel.set()
+
+    def check_cancelled(self):
+        if self._cancel.is_set() and not self.done:
+            raise JobCancelled()
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "result": self.result,
+            "error": self.error,
+            "events": len(self._events)
+        }
+
+class JobService:
+    """
+    Runs blocking work (session generation) on a worker pool so the API stays responsive.
+    Finished jobs are kept for a while so clients can collect their results.
+    """
+
+    MAX_WORKERS = 2
+    MAX_FINISHED_JOBS = 50
+
+    _executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="sap-job")
+    _jobs: Dict[str, Job] = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def submit(cls, kind: str, fn: Callable[..., Dict[str, Any]], *args, **kwargs) -> Job:
+        """Schedules fn(*args, job=job, **kwargs) and returns the job immediately."""
+        job = Job(kind)
+        with cls._lock:
+            cls._jobs[job.id] = job
+            cls._prune()
+        cls._executor.submit(cls._run, job, fn, args, kwargs)
+        return job
+
+    @classmethod
+    def _run(cls, job: Job, fn: Callable[..., Dict[str, Any]], args, kwargs):
+        try:
+            job.check_cancelled()
+            job.status = "running"
+            job.result = fn(*args, job=job, **kwargs)
+            job.status = "success"
+        except JobCancelled:
+            job.status = "cancelled"
+        except Exception as e:
+            print(f"ERROR: Job {job.id} failed: {e}")
+            job.error = str(e)
+            job.status = "error"
+        finally:
+            job.finished = time.time()
+            job._append("done", f"Job {job.status}", status=job.status)
+
+    @classmethod
+    def _prune(cls):
+        finished = sorted((j for j in cls._jobs.values() if j.done), key=lambda j: j.finished)
+        for job in finished[:max(0, len(finished) - cls.MAX_FINISHED_JOBS)]:
+            del cls._jobs[job.id]
+
+    @classmethod
+    def get(cls, job_id: str) -> Optional[Job]:
+        return cls._jobs.get(job_id)
+
+    @classmethod
+    def cancel(cls, job_id: str) -> bool:
+        job = cls._jobs.get(job_id)
+        if not job or job.done:
+            return False
+        job.cancel()
+        return True
@@ -0,0 +1,539 @@
+import os
+import json
+import time
+import base64
+import itertools
+import threading
+from bisect import bisect_right
+from collections import deque
+from pathlib import Path
+from typing import List, Dict, Optional, Tuple, Sequence, Any, Set, Iterable, Deque
+
+try:
+    from app.services.library_service import LibraryService
+    from app.services.library_watcher import LibraryWatcher
+except ImportError:
+    try:
+        from .library_service import LibraryService
+        from .library_watcher import LibraryWatcher
+    except ImportError:
+        from library_service import LibraryService
+        from library_watcher import LibraryWatcher
+
+class LibraryIndex:
+    """
+    In-memory model of a library folder, built with a single walk:
+    - Maps file stems to their locations (variant lookup is a dictionary hit)
+    - Memoizes resolved (topic, language, industry) lookups
+    - Keeps the visible entries of every folder, so the UI tree can be served level by level
+    - Re-lists only the folders that changed (reported by a LibraryWatcher, or found by
+      their mtime) and records each change as a versioned delta for the UI
+    """
+
+    PAGE_SIZE = 200
+    # Deltas kept for clients catching up; older clients get a reset instead
+    JOURNAL_SIZE = 256
+    # Without a watcher, folder mtimes are checked at most this often (seconds)
+    CHECK_INTERVAL = LibraryWatcher.POLL_INTERVAL
+
+    _instances: Dict[str, "LibraryIndex"] = {}
+    _watchers: Dict[str, LibraryWatcher] = {}
+    _lock = threading.Lock()
+    # Versions are unique across indexes, so a client of a replaced index is told to reset
+    _versions = itertools.count(1)
+
+    def __init__(self, root: Path):
+        self.root = root
+        self._root = str(root.resolve())
+        self._stems: Dict[str, List[Path]] = {}
+        self._resolved: Dict[Tuple[str, str, Tuple[str, ...], Tuple[str, ...]], List[Path]] = {}
+        # Folder (relative to root, '' for the root) -> name -> (is_dir, inode) for every indexed entry
+        self._entries: Dict[str, Dict[str, Tuple[bool, int]]] = {}
+        self._dir_mtimes: Dict[str, int] = {}
+        # Folder -> visible entries as sorted (is_file, folded name, name)
+        self._listings: Dict[str, List[Tuple[bool, str, str]]] = {}
+        self._model_lock = threading.RLock()
+        self._journal: Deque[Tuple[int, List[Dict[str, Any]]]] = deque(maxlen=self.JOURNAL_SIZE)
+        self._build()
+        self.version = next(self._versions)
+        # Oldest version the journal can catch a client up from
+        self._journal_base = self.version
+        self._checked_at = time.monotonic()
+
+    # --- REGISTRY ---
+
+    @classmethod
+    def get(cls, root: Path) -> "LibraryIndex":
+        """
+        Returns the index for a library root, (re)building it when missing.
+        Without a watcher, folder mtimes are checked (at most every CHECK_INTERVAL)
+        and changed folders re-listed; a stat per folder is too much for every lookup.
+        """
+        key = str(root)
+        with cls._lock:
+            index = cls._instances.get(key)
+            if index is None:
+                index = cls(root)
+                cls._instances[key] = index
+            watcher = cls._watchers.get(key)
+        if (watcher is None or not watcher.is_alive()) and time.monotonic() - index._checked_at >= cls.CHECK_INTERVAL:
+            index._checked_at = time.monotonic()
+            index.refresh(index.changed_folders())
+        return index
+
+    @classmethod
+    def watch(cls, root: Path) -> "LibraryIndex":
+        """
+        Returns the index for `root` and keeps it current with a watcher.
+        Only one library is watched at a time; watchers of other roots are stopped.
+        """
+        index = cls.get(root)
+        key = str(root)
+        with cls._lock:
+            for other in [k for k in cls._watchers if k != key]:
+                cls._watchers.pop(other).stop()
+            watcher = cls._watchers.get(key)
+            if watcher is None or not watcher.is_alive():
+                watcher = LibraryWatcher(index)
+                watcher.start()
+                cls._watchers[key] = watcher
+        return index
+
+    @classmethod
+    def invalidate(cls, root: Optional[Path] = None):
+        """Drops the cached index (and its watcher) for one root, or for all roots."""
+        with cls._lock:
+            keys = list(cls._instances) if root is None else [str(root)]
+            for key in keys:
+                cls._instances.pop(key, None)
+                watcher = cls._watchers.pop(key, None)
+                if watcher:
+                    watcher.stop()
+
+    # --- BUILD ---
+
+    @staticmethod
+    def _join(rel: str, name: str) -> str:
+        return os.path.join(rel, name) if rel else name
+
+    @staticmethod
+    def _parent(rel: str) -> str:
+        return os.path.dirname(rel)
+
+    def _abs(self, rel: str) -> str:
+        return os.path.join(self._root, rel) if rel else self._root
+
+    def _list_folder(self, rel: str) -> Optional[Dict[str, Tuple[bool, int]]]:
+        """Indexed entries of one folder, or None when it is gone."""
+        return LibraryService.list_folder(self._abs(rel))
+
+    def _add_folder(self, rel: str, affected: Set[str], workers: int = 1) -> bool:
+        """Indexes a folder and everything below it. Returns False when it is gone."""
+        found = LibraryService.scan_folders(self._abs(rel), workers)
+        if '' not in found:
+            return False
+        for sub, (mtime, entries) in found.items():
+            folder = self._join(rel, sub) if sub else rel
+            self._entries[folder] = entries
+            self._dir_mtimes[folder] = mtime
+            affected.add(folder)
+            for name, (is_dir, _) in entries.items():
+                if not is_dir:
+                    self._add_stem(folder, name)
+        return True
+
+    def _remove_folder(self, rel: str, affected: Set[str]):
+        """Drops a folder and everything below it from the index."""
+        entries = self._entries.pop(rel, None)
+        self._dir_mtimes.pop(rel, None)
+        if entries is None:
+            return
+        affected.add(rel)
+        for name, (is_dir, _) in entries.items():
+            if is_dir:
+                self._remove_folder(self._join(rel, name), affected)
+            else:
+                self._remove_stem(rel, name)
+
+    def _add_stem(self, rel: str, name: str):
+        self._stems.setdefault(os.path.splitext(name)[0].casefold(), []).append(Path(self._abs(rel)) / name)
+
+    def _remove_stem(self, rel: str, name: str):
+        stem = os.path.splitext(name)[0].casefold()
+        paths = self._stems.get(stem, [])
+        target = Path(self._abs(rel)) / name
+        if target in paths:
+            paths.remove(target)
+        if not paths:
+            self._stems.pop(stem, None)
+
+    def _visible_listing(self, rel: str) -> List[Tuple[bool, str, str]]:
+        # Like the full tree scan, folders without any base file below them are hidden
+        return sorted(
+            (not is_dir, name.lower(), name)
+            for name, (is_dir, _) in self._entries[rel].items()
+            if (self._listings.get(self._join(rel, name)) if is_dir else LibraryService._is_base_name(name))
+        )
+
+    def _update_listings(self, affected: Set[str]):
+        """Recomputes the listings of `affected` folders, deepest first, so children settle before parents."""
+        for rel in sorted(affected, key=lambda r: r.count(os.sep) + (r != ''), reverse=True):
+            if rel in self._entries:
+                self._listings[rel] = self._visible_listing(rel)
+            else:
+                self._listings.pop(rel, None)
+
+    def _build(self):
+        affected: Set[str] = set()
+        # The initial walk lists top-level folders concurrently (see LibraryService.scan_folders)
+        self._add_folder('', affected, LibraryService.SCAN_WORKERS)
+        self._update_listings(affected)
+
+    def folders(self) -> List[str]:
+        """Every indexed folder, relative to the root ('' for the root)."""
+        with self._model_lock:
+            return list(self._entries)
+
+    def changed_folders(self) -> List[str]:
+        """Folders whose mtime changed (entries added, removed or renamed) or that are gone."""
+        changed = []
+        for rel, mtime in list(self._dir_mtimes.items()):
+            try:
+                if os.stat(self._abs(rel)).st_mtime_ns != mtime:
+                    changed.append(rel)
+            except OSError:
+                changed.append(rel)
+        return changed
+
+    # --- UPDATES ---
+
+    def refresh(self, folders: Iterable[str]) -> List[Dict[str, Any]]:
+        """
+        Re-lists the given folders (relative to the root) and applies what changed.
+        Returns the delta: 'added' nodes with their parent, 'removed' paths, and
+        'renamed' entries (an entry that kept its inode under a new path).
+        Non-empty deltas bump the version and are kept for changes_since().
+        """
+        folders = set(folders)
+        if not folders:
+            return []
+
+        with self._model_lock:
+            affected: Set[str] = set()
+            previous: Dict[str, Dict[str, Tuple[bool, int]]] = {}
+            # Shallow folders first: re-listing a parent may already drop or add its children
+            for rel in sorted(folders, key=lambda r: r.count(os.sep) + (r != '')):
+                old = self._entries.get(rel)
+                if old is None:
+                    continue
+                new = self._list_folder(rel)
+                if new is None:
+                    # Gone before its parent was re-listed: drop it from the parent as well
+                    self._remove_folder(rel, affected)
+                    parent = self._parent(rel)
+                    if rel and parent in self._entries:
+                        previous.setdefault(parent, dict(self._entries[parent]))
+                        self._entries[parent].pop(os.path.basename(rel), None)
+                        affected.add(parent)
+                    continue
+
+                previous[rel] = old
+                try:
+                    self._dir_mtimes[rel] = os.stat(self._abs(rel)).st_mtime_ns
+                except OSError:
+                    pass
+                self._entries[rel] = new
+                affected.add(rel)
+                for name, (is_dir, inode) in old.items():
+                    if new.get(name, (None, None))[0] is not is_dir:
+                        if is_dir:
+                            self._remove_folder(self._join(rel, name), affected)
+                        else:
+                            self._remove_stem(rel, name)
+                for name, (is_dir, inode) in new.items():
+                    if old.get(name, (None, None))[0] is not is_dir:
+                        if is_dir:
+                            self._add_folder(self._join(rel, name), affected)
+                        else:
+                            self._add_stem(rel, name)
+
+            if not affected:
+                return []
+
+            # Ancestors may switch between hidden and visible
+            for rel in list(affected):
+                while rel:
+                    rel = self._parent(rel)
+                    affected.add(rel)
+
+            before = {rel: self._listings.get(rel) for rel in affected}
+            self._update_listings(affected)
+            self._resolved.clear()
+
+            changes = self._diff(before, previous)
+            if changes:
+                if len(self._journal) == self._journal.maxlen:
+                    self._journal_base = self._journal[0][0]
+                self.version = next(self._versions)
+                self._journal.append((self.version, changes))
+            return changes
+
+    def _diff(self, before: Dict[str, Optional[List[Tuple[bool, str, str]]]],
+              previous: Dict[str, Dict[str, Tuple[bool, int]]]) -> List[Dict[str, Any]]:
+        """Visible entries that appeared or disappeared in folders that existed before and after."""
+        removed, added = [], []
+        for rel, old_listing in before.items():
+            new_listing = self._listings.get(rel)
+            if old_listing is None or new_listing is None:
+                # New or gone folders show up as an entry of their parent
+                continue
+            old_set, new_set = set(old_listing), set(new_listing)
+            old_entries = previous.get(rel, self._entries[rel])
+            for entry in sorted(old_set - new_set):
+                removed.append((rel, entry, old_entries.get(entry[2], (None, 0))[1]))
+            for entry in sorted(new_set - old_set):
+                added.append((rel, entry, self._entries[rel][entry[2]][1]))
+
+        changes = []
+        moved_from = {inode: (rel, entry) for rel, entry, inode in removed if inode}
+        renamed = set()
+        for rel, entry, inode in added:
+            source = moved_from.get(inode)
+            if source and source[1][0] == entry[0]:
+                renamed.add(inode)
+                changes.append({
+                    "op": "renamed",
+                    "from": os.path.join(self._abs(source[0]), source[1][2]),
+                    "to": os.path.join(self._abs(rel), entry[2]),
+                    "parent": self._abs(rel),
+                    "node": self._node(rel, entry)
+                })
+        for rel, entry, inode in removed:
+            if inode not in renamed or not inode:
+                changes.append({"op": "removed", "path": os.path.join(self._abs(rel), entry[2])})
+        for rel, entry, inode in added:
+            if inode not in renamed or not inode:
+                changes.append({"op": "added", "parent": self._abs(rel), "node": self._node(rel, entry)})
+        return changes
+
+    def changes_since(self, version: int) -> Dict[str, Any]:
+        """
+        Deltas after `version`, oldest first. `reset` is set when they are no longer
+        available (or the version belongs to another index): the client reloads the tree.
+        """
+        with self._model_lock:
+            if version == self.version:
+                return {"version": self.version, "reset": False, "changes": []}
+            if version != self._journal_base and all(v != version for v, _ in self._journal):
+                return {"version": self.version, "reset": True, "changes": []}
+            changes = [change for v, batch in self._journal if v > version for change in batch]
+            return {"version": self.version, "reset": False, "changes": changes}
+
+    # --- LOOKUP ---
+
+    def files_for_stem(self, stem: str) -> List[Path]:
+        return self._stems.get(stem.casefold(), [])
+
+    def resolve(self, topic: str, langs: Sequence[str], inds: Sequence[str]) -> List[Path]:
+        """
+        Finds the most specific variant of a topic and its '_solution' sibling.
+        Priority: Lang+Ind > Ind+Lang > Lang > Ind > Generic. Every code in
+        `langs` / `inds` is accepted, the first one being the preferred spelling.
+        """
+        with self._model_lock:
+            return self._resolve(topic, langs, inds)
+
+    def _resolve(self, topic: str, langs: Sequence[str], inds: Sequence[str]) -> List[Path]:
+        topic_path = Path(topic)
+        cache_key = (topic_path.stem.casefold(), topic_path.suffix.lower(), tuple(langs), tuple(inds))
+        cached = self._resolved.get(cache_key)
+        if cached is not None:
+            return cached
+
+        base_topic = topic_path.stem
+        candidates = []
+        candidates += [f"{base_topic}_{l}_{i}" for l in langs for i in inds]
+        candidates += [f"{base_topic}_{i}_{l}" for l in langs for i in inds]
+        candidates += [f"{base_topic}_{l}" for l in langs]
+        candidates += [f"{base_topic}_{i}" for i in inds]
+        candidates.append(base_topic)
+
+        # Prefer the same file type as the requested topic (e.g. .xlsx over .pptx), then any type
+        suffix = topic_path.suffix.lower()
+        best_file = None
+        for same_type in ((True, False) if suffix else (False,)):
+            for cand in candidates:
+                files = self.files_for_stem(cand)
+                if same_type:
+                    files = [f for f in files if f.suffix.lower() == suffix]
+                if files:
+                    best_file = files[0]
+                    break
+            if best_file:
+                break
+
+        found_files = []
+        if best_file:
+            found_files.append(best_file)
+            solution_stem = f"{best_file.stem}_solution"
+            for f in self.files_for_stem(solution_stem):
+                if f.parent == best_file.parent and f.suffix.lower() == best_file.suffix.lower():
+                    found_files.append(f)
+                    break
+
+        self._resolved[cache_key] = found_files
+        return found_files
+
+    # --- TREE LEVELS ---
+
+    @staticmethod
+    def _encode_cursor(entry: Tuple[bool, str, str]) -> str:
+        return base64.urlsafe_b64encode(json.dumps(list(entry)).encode('utf-8')).decode('ascii')
+
+    @staticmethod
+    def _decode_cursor(cursor: str) -> Tuple[bool, str, str]:
+        try:
+            is_file, folded, name = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+            return (bool(is_file), str(folded), str(name))
+        except (ValueError, TypeError) as e:
+            raise ValueError(f"Invalid cursor: {cursor}") from e
+
+    def _node(self, rel: str, entry: Tuple[bool, str, str]) -> Dict[str, Any]:
+        is_file, _, name = entry
+        node = LibraryService._create_tree_node(os.path.join(self._abs(rel), name), name, not is_file)
+        if not is_file:
+            children = self._listings[self._join(rel, name)]
+            node["leaf"] = False
+            node["child_count"] = len(children)
+            node["has_base_files"] = any(child[0] for child in children)
+        return node
+
+    def _relative(self, path: Path) -> Optional[str]:
+        """`path` relative to the root ('' for the root itself), or None when it lies outside."""
+        try:
+            rel = os.path.relpath(str(path.resolve()), self._root)
+        except ValueError:
+            # Another drive (Windows)
+            return None
+        if rel == os.pardir or rel.startswith(os.pardir + os.sep):
+            return None
+        return '' if rel == os.curdir else rel
+
+    def _rel(self, path: Optional[Path]) -> str:
+        rel = '' if path is None else self._relative(path)
+        if rel is None or rel not in self._listings:
+            raise KeyError(str(path))
+        return rel
+
+    def level(self, path: Optional[Path] = None, cursor: Optional[str] = None, limit: int = PAGE_SIZE) -> Dict[str, Any]:
+        """
+        One page of the visible children of a library folder (the root when `path` is None),
+        as UI tree nodes. Folders carry their child count and whether they hold base files
+        themselves. `next_cursor` continues after the last returned entry, so pages stay
+        consistent when entries are added or removed in between.
+        Raises KeyError for folders outside the library, ValueError for a bad cursor.
+        """
+        with self._model_lock:
+            rel = self._rel(path)
+            listing = self._listings[rel]
+            start = bisect_right(listing, self._decode_cursor(cursor)) if cursor else 0
+            page = listing[start:start + max(1, limit)]
+
+            more = start + len(page) < len(listing)
+            return {
+                "path": self._abs(rel),
+                "nodes": [self._node(rel, entry) for entry in page],
+                "total": len(listing),
+                "next_cursor": self._encode_cursor(page[-1]) if more else None,
+                "version": self.version
+            }
+
+    def resolve_drop(self, path: Path) -> Optional[List[Dict[str, Any]]]:
+        """
+        Base files at or below a dropped path, as LibraryService drop results:
+        a folder's own files first, then its subfolders, each by name.
+        Returns None for paths the index does not know (the caller checks the disk).
+        """
+        rel = self._relative(path)
+        if rel is None:
+            return None
+
+        with self._model_lock:
+            if rel in self._entries:
+                results: List[Dict[str, Any]] = []
+                self._collect_base_files(rel, results)
+                return results
+
+            parent, name = os.path.split(rel)
+            entry = self._entries.get(parent, {}).get(name)
+            if entry is None:
+                return None
+            if not LibraryService._is_base_name(name):
+                return []
+            return [LibraryService._simple_node(os.path.join(self._abs(parent), name), name)]
+
+    def _collect_base_files(self, rel: str, results: List[Dict[str, Any]]):
+        entries = sorted(self._entries[rel].items(), key=lambda item: (item[1][0], item[0].lower()))
+        folder = self._abs(rel)
+        for name, (is_dir, _) in entries:
+            if is_dir:
+                self._collect_base_files(self._join(rel, name), results)
+            elif LibraryService._is_base_name(name):
+                results.append(LibraryService._simple_node(os.path.join(folder, name), name))
+
+    def tree(self) -> List[Dict[str, Any]]:
+        """The whole visible tree, as nested UI nodes (folders without base files below them are left out)."""
+        def build(rel: str) -> List[Dict[str, Any]]:
+            nodes = []
+            for is_file, _, name in self._listings[rel]:
+                node = LibraryService._create_tree_node(os.path.join(self._abs(rel), name), name, not is_file)
+                if not is_file:
+                    node["children"] = build(self._join(rel, name))
+                nodes.append(node)
+            return nodes
+
+        with self._model_lock:
+            return build('') if '' in self._listings else []
+
+    def compact_tree(self) -> Dict[str, Any]:
+        """
+        The whole visible tree as parallel arrays, in depth-first order:
+        - `names`: node names; full paths are rebuilt from the parent chain and `root`
+        - `parents`: index of the parent node, -1 for top-level nodes
+        - `kinds`: index into `types` (LibraryService.TYPE_CODES)
+        Several times smaller than tree(), and much cheaper to build and encode.
+        """
+        codes = {kind: i for i, kind in enumerate(LibraryService.TYPE_CODES)}
+        folder = codes['folder']
+        payload = self.empty_compact_tree(self._root, self.version)
+        names, parents, kinds = payload["names"], payload["parents"], payload["kinds"]
+
+        def build(rel: str, parent: int):
+            for is_file, _, name in self._listings[rel]:
+                index = len(names)
+                names.append(name)
+                parents.append(parent)
+                if is_file:
+                    kinds.append(codes[LibraryService._file_type(name)[0]])
+                else:
+                    kinds.append(folder)
+                    build(self._join(rel, name), index)
+
+        with self._model_lock:
+            payload["version"] = self.version
+            if '' in self._listings:
+                build('', -1)
+        return payload
+
+    @staticmethod
+    def empty_compact_tree(root: str = "", version: int = 0) -> Dict[str, Any]:
+        return {
+            "format": "compact",
+            "root": root,
+            "sep": os.sep,
+            "version": version,
+            "types": list(LibraryService.TYPE_CODES),
+            "names": [],
+            "parents": [],
+            "kinds": []
+        }
@@ -1,6 +1,11 @@
 import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
+
+# scandir reports inodes for free on POSIX; on Windows each one costs a stat
+_CHEAP_INODES = sys.platform != "win32"
 
 class LibraryService:
     """
@@ -20,103 +25,146 @@ class LibraryService:
 
     FORBIDDEN_FILENAMES = {'intro.pptx', 'outro.pptx', 'translations.json'}
 
+    # Extension -> (UI type, PrimeReact icon)
+    FILE_TYPES = {
+        '.pptx': ('pptx', "pi pi-fw pi-file text-orange-500"),
+        '.ppt': ('pptx', "pi pi-fw pi-file text-orange-500"),
+        '.docx': ('docx', "pi pi-fw pi-file text-blue-500"),
+        '.doc': ('docx', "pi pi-fw pi-file text-blue-500"),
+        '.xlsx': ('xlsx', "pi pi-fw pi-file-excel text-green-500"),
+        '.xls': ('xlsx', "pi pi-fw pi-file-excel text-green-500"),
+        '.csv': ('xlsx', "pi pi-fw pi-file-excel text-green-500"),
+        '.pdf': ('pdf', "pi pi-fw pi-file-pdf text-red-500"),
+    }
+    DEFAULT_FILE_TYPE = ('file', "pi pi-fw pi-file")
+    FOLDER_ICON = "pi pi-fw pi-folder"
+
+    # Node kinds of the compact tree format, by position (the UI maps them back to icons)
+    TYPE_CODES = ('folder', 'pptx', 'docx', 'xlsx', 'pdf', 'file')
+
+    # Top-level folders scanned concurrently (helps most on network shares)
+    SCAN_WORKERS = 4
+
     @classmethod
-    def _is_base_file(cls, path: Path) -> bool:
+    def _is_base_name(cls, name: str) -> bool:
         """
-        Determines if a file is a 'Base' version that should be visible in the UI.
+        Determines if a file name is a 'Base' version that should be visible in the UI.
         Hides system files, ignored extensions, forbidden names, and variants (underscores).
         """
-        name = path.name.lower()
+        lower = name.lower()
+        stem, ext = os.path.splitext(lower)
 
-        if name.startswith('.'): return False
-        if path.suffix.lower() in cls.IGNORED_EXTENSIONS: return False
-        if name in cls.FORBIDDEN_FILENAMES: return False
+        if lower.startswith('.'): return False
+        if ext in cls.IGNORED_EXTENSIONS: return False
+        if lower in cls.FORBIDDEN_FILENAMES: return False
 
         # Hide variants (e.g., _NL, _Healthcare)
-        if "_" in path.stem: return False
+        if "_" in stem: return False
 
         return True
 
-    @staticmethod
-    def _create_tree_node(path: Path) -> Dict[str, Any]:
+    @classmethod
+    def _is_base_file(cls, path: Path) -> bool:
+        return cls._is_base_name(path.name)
+
+    @classmethod
+    def _file_type(cls, name: str):
+        return cls.FILE_TYPES.get(os.path.splitext(name)[1].lower(), cls.DEFAULT_FILE_TYPE)
+
+    @classmethod
+    def _create_tree_node(cls, full_path: str, name: str, is_dir: bool) -> Dict[str, Any]:
         """Creates a node structure for the UI Tree component."""
-        is_dir = path.is_dir()
         node = {
-            "key": str(path.resolve()),
-            "label": path.name,
-            "data": str(path.resolve()),
+            "key": full_path,
+            "label": name,
+            "data": full_path,
         }
 
         if is_dir:
-            node["icon"] = "pi pi-fw pi-folder"
+            node["icon"] = cls.FOLDER_ICON
         else:
-            ext = path.suffix.lower()
-            if ext in ['.pptx', '.ppt']:
-                node["icon"] = "pi pi-fw pi-file text-orange-500"
-                node["type"] = "pptx"
-            elif ext in ['.docx', '.doc']:
-                node["icon"] = "pi pi-fw pi-file text-blue-500"
-                node["type"] = "docx"
-            elif ext in ['.xlsx', '.xls', '.csv']:
-                node["icon"] = "pi pi-fw pi-file-excel text-green-500"
-                node["type"] = "xlsx"
-            elif ext == '.pdf':
-                node["icon"] = "pi pi-fw pi-file-pdf text-red-500"
-                node["type"] = "pdf"
-            else:
-                node["icon"] = "pi pi-fw pi-file"
-                node["type"] = "file"
+            node["type"], node["icon"] = cls._file_type(name)
         return node
 
-    @staticmethod
-    def _create_simple_node(path: Path) -> Dict[str, Any]:
+    @classmethod
+    def _create_simple_node(cls, path: Path) -> Dict[str, Any]:
         """Creates a simple file node object for drag-and-drop results."""
-        ext = path.suffix.lower()
-        file_type = 'file'
-        if ext in ['.pptx', '.ppt']: file_type = 'pptx'
-        elif ext in ['.docx', '.doc']: file_type = 'docx'
-        elif ext in ['.xlsx', '.xls', '.csv']: file_type = 'xlsx'
-        elif ext == '.pdf': file_type = 'pdf'
+        return cls._simple_node(str(path.resolve()), path.name)
 
+    @classmethod
+    def _simple_node(cls, full_path: str, name: str) -> Dict[str, Any]:
+        """Same as _create_simple_node, for a path that is already absolute and resolved."""
         return {
-            "name": path.name,
-            "path": str(path.resolve()),
-            "type": file_type
+            "name": name,
+            "path": full_path,
+            "type": cls._file_type(name)[0]
         }
 
     @classmethod
-    def scan_directory(cls, path: Path) -> List[Dict[str, Any]]:
+    def list_folder(cls, dir_path: str) -> Optional[Dict[str, Tuple[bool, int]]]:
         """
-        Recursively scans a directory and builds a tree structure.
+        Entries of one folder that are worth indexing, as name -> (is_dir, inode); None when the
+        folder is gone. Types come from the directory listing itself, so no extra stat per entry.
+        Variants are included (they are resolved, just not shown); ignored folders and extensions are not.
         """
-        nodes = []
-        if not path.exists(): return []
-
+        entries = {}
         try:
-            # Sort: Directories first, then files
-            items = sorted(path.iterdir(), key=lambda x: (not x.is_dir(), x.name.lower()))
-
-            for item in items:
-                if item.is_dir() and item.name.lower() in cls.IGNORED_FOLDERS:
-                    continue
-
-                if not item.is_dir() and not cls._is_base_file(item):
-                    continue
-
-                node = cls._create_tree_node(item)
-
-                if item.is_dir():
-                    children = cls.scan_directory(item)
-                    if children:
-                        node["children"] = children
-                        nodes.append(node)
-                else:
-                    nodes.append(node)
-
+            with os.scandir(dir_path) as it:
+                for entry in it:
+                    try:
+                        is_dir = entry.is_dir()
+                        # Inodes pair up renames; on Windows they would cost a stat per entry
+                        inode = entry.inode() if _CHEAP_INODES else 0
+                    except OSError:
+                        continue
+                    if is_dir:
+                        if entry.name.lower() not in cls.IGNORED_FOLDERS:
+                            entries[entry.name] = (True, inode)
+                    elif os.path.splitext(entry.name)[1].lower() not in cls.IGNORED_EXTENSIONS:
+                        entries[entry.name] = (False, inode)
+        except (FileNotFoundError, NotADirectoryError):
+            return None
         except PermissionError:
-            pass
+            return {}
+        return entries
 
-        return nodes
+    @classmethod
+    def scan_folders(cls, root: str, workers: Optional[int] = None) -> Dict[str, Tuple[int, Dict[str, Tuple[bool, int]]]]:
+        """
+        Lists `root` and every folder below it in a single pass, as folder (relative to root,
+        '' for root itself) -> (mtime, list_folder() entries). Folders that vanish meanwhile are left out.
+        With several `workers`, top-level folders are scanned on a thread pool.
+        """
+        workers = cls.SCAN_WORKERS if workers is None else workers
+
+        def scan(rel: str, found: Dict[str, Tuple[int, Dict[str, Tuple[bool, int]]]], recurse: bool = True):
+            path = os.path.join(root, rel) if rel else root
+            try:
+                mtime = os.stat(path).st_mtime_ns
+            except OSError:
+                return found
+            entries = cls.list_folder(path)
+            if entries is None:
+                return found
+            found[rel] = (mtime, entries)
+            if recurse:
+                for name, (is_dir, _) in entries.items():
+                    if is_dir:
+                        scan(os.path.join(rel, name) if rel else name, found)
+            return found
+
+        found = scan('', {}, recurse=False)
+        if '' not in found:
+            return found
+        folders = [name for name, (is_dir, _) in found[''][1].items() if is_dir]
+        if workers > 1 and len(folders) > 1:
+            with ThreadPoolExecutor(max_workers=min(workers, len(folders)), thread_name_prefix="sap-scan") as pool:
+                subtrees = list(pool.map(lambda name: scan(name, {}), folders))
+        else:
+            subtrees = [scan(name, {}) for name in folders]
+        for subtree in subtrees:
+            found.update(subtree)
+        return found
 
     @classmethod
     def resolve_dropped_path(cls, path_str: str) -> List[Dict[str, Any]]:
@@ -141,4 +189,22 @@ class LibraryService:
             if cls._is_base_file(path):
                 results.append(cls._create_simple_node(path))
 
-        return results
\ No newline at end of file
+        return results
+
+    @classmethod
+    def resolve_dropped_paths(cls, paths: List[str], index=None) -> List[Dict[str, Any]]:
+        """
+        Resolves several dragged paths in one go, in the order given, listing every file once.
+        Paths inside `index` (a LibraryIndex) are answered from memory; others are walked on disk.
+        """
+        results = []
+        seen = set()
+        for path_str in paths:
+            nodes = index.resolve_drop(Path(path_str)) if index is not None else None
+            if nodes is None:
+                nodes = cls.resolve_dropped_path(path_str)
+            for node in nodes:
+                if node["path"] not in seen:
+                    seen.add(node["path"])
+                    results.append(node)
+        return results
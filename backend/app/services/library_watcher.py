@@ -0,0 +1,216 @@
+import os
+import sys
+import errno
+import select
+import struct
+import threading
+from typing import Dict, Optional, Set
+
+class LibraryWatcher:
+    """
+    Keeps a LibraryIndex current while the library changes on disk:
+    - inotify on Linux (one watch per folder), read on a background thread
+    - Folder mtime polling everywhere else, and on network shares, where inotify
+      never hears about changes made by other machines
+    - Events are gathered for a short moment and applied as a single delta
+    """
+
+    POLL_INTERVAL = 5.0
+    DEBOUNCE = 0.3
+
+    # Filesystems whose changes may come from elsewhere (as listed in /proc/mounts)
+    NETWORK_FILESYSTEMS = {'nfs', 'nfs4', 'cifs', 'smb3', 'smbfs', 'fuse.sshfs', '9p', 'afs', 'davfs', 'fuse.rclone'}
+
+    # inotify(7)
+    _IN_MOVED_FROM = 0x40
+    _IN_MOVED_TO = 0x80
+    _IN_CREATE = 0x100
+    _IN_DELETE = 0x200
+    _IN_DELETE_SELF = 0x400
+    _IN_MOVE_SELF = 0x800
+    _IN_Q_OVERFLOW = 0x4000
+    _IN_IGNORED = 0x8000
+    _IN_ONLYDIR = 0x1000000
+    _WATCH_MASK = _IN_MOVED_FROM | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE | _IN_DELETE_SELF | _IN_MOVE_SELF | _IN_ONLYDIR
+    _EVENT = struct.Struct('iIII')
+
+    def __init__(self, index, poll_interval: Optional[float] = None):
+        self.index = index
+        self.poll_interval = poll_interval or self.POLL_INTERVAL
+        self.mode = "polling"
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._libc = None
+        self._fd = -1
+        self._wds: Dict[int, str] = {}
+        self._watched: Dict[str, int] = {}
+
+    # --- LIFECYCLE ---
+
+    def start(self):
+        if self._inotify_usable():
+            try:
+                self._open_inotify()
+                self.mode = "inotify"
+            except OSError as e:
+                print(f"WARNING: inotify unavailable ({e}), polling the library instead")
+                self._close_inotify()
+        self._thread = threading.Thread(target=self._run, name="sap-library-watch", daemon=True)
+        self._thread.start()
+        print(f"INFO: Watching library {self.index.root} ({self.mode})")
+
+    def stop(self):
+        self._stop.set()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout=2)
+
+    def is_alive(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def _run(self):
+        try:
+            if self.mode == "inotify":
+                self._run_inotify()
+                self._close_inotify()
+                self.mode = "polling"
+            if not self._stop.is_set():
+                self._run_polling()
+        except Exception as e:
+            print(f"ERROR: Library watcher stopped: {e}")
+        finally:
+            self._close_inotify()
+
+    def _apply(self, folders):
+        changes = self.index.refresh(folders)
+        if changes:
+            print(f"INFO: Library changed ({len(changes)} entries, version {self.index.version})")
+
+    # --- POLLING ---
+
+    def _run_polling(self):
+        while not self._stop.wait(self.poll_interval):
+            self._apply(self.index.changed_folders())
+
+    # --- INOTIFY ---
+
+    def _inotify_usable(self) -> bool:
+        if not sys.platform.startswith("linux"):
+            return False
+        fs_type = self._filesystem_type(str(self.index.root.resolve()))
+        return fs_type is not None and fs_type not in self.NETWORK_FILESYSTEMS
+
+    @staticmethod
+    def _filesystem_type(path: str) -> Optional[str]:
+        """Type of the filesystem holding `path`: the longest matching mount point wins."""
+        best, fs_type = "", None
+        try:
+            with open("/proc/mounts", "r") as f:
+                for line in f:
+                    parts = line.split()
+                    if len(parts) < 3:
+                        continue
+                    mount_point = parts[1].replace("\\040", " ")
+                    if (path == mount_point or path.startswith(mount_point.rstrip("/") + "/")) and len(mount_point) >= len(best):
+                        best, fs_type = mount_point, parts[2]
+        except OSError:
+            return None
+        return fs_type
+
+    def _open_inotify(self):
+        import ctypes
+        self._libc = ctypes.CDLL(None, use_errno=True)
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        self._sync_watches()
+        # Changes between building the index and watching it
+        self._apply(self.index.changed_folders())
+
+    def _close_inotify(self):
+        if self._fd >= 0:
+            os.close(self._fd)
+        self._fd = -1
+        self._wds.clear()
+        self._watched.clear()
+
+    def _sync_watches(self) -> Set[str]:
+        """
+        Watches every indexed folder, and forgets folders that left the index.
+        Returns the newly watched folders.
+        """
+        import ctypes
+        folders = set(self.index.folders())
+        for rel in [r for r in self._watched if r not in folders]:
+            # Renamed folders keep their watch descriptor; release it before re-adding
+            self._libc.inotify_rm_watch(self._fd, self._watched[rel])
+            self._wds.pop(self._watched.pop(rel), None)
+
+        added = folders - set(self._watched)
+        for rel in added:
+            path = os.path.join(str(self.index.root.resolve()), rel) if rel else str(self.index.root.resolve())
+            wd = self._libc.inotify_add_watch(self._fd, os.fsencode(path), self._WATCH_MASK)
+            if wd < 0:
+                err = ctypes.get_errno()
+                if err == errno.ENOENT:
+                    continue
+                # ENOSPC: out of watches (fs.inotify.max_user_watches)
+                raise OSError(err, os.strerror(err))
+            self._wds[wd] = rel
+            self._watched[rel] = wd
+        return added
+
+    def _catch_up(self, folders: Set[str]):
+        """
+        Entries created before a folder's watch existed raised no event:
+        re-list newly watched folders until no new folders turn up.
+        """
+        while folders:
+            self._apply(folders)
+            folders = self._sync_watches()
+
+    def _read_events(self, dirty: Set[str]) -> bool:
+        """Adds the folders named by pending events to `dirty`. Returns False on overflow."""
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return True
+        offset = 0
+        while offset + self._EVENT.size <= len(data):
+            wd, mask, _, length = self._EVENT.unpack_from(data, offset)
+            offset += self._EVENT.size + length
+            if mask & self._IN_Q_OVERFLOW:
+                return False
+            if mask & self._IN_IGNORED:
+                rel = self._wds.pop(wd, None)
+                if rel is not None and self._watched.get(rel) == wd:
+                    self._watched.pop(rel)
+                continue
+            rel = self._wds.get(wd)
+            if rel is not None:
+                dirty.add(rel)
+        return True
+
+    def _run_inotify(self):
+        while not self._stop.is_set():
+            ready, _, _ = select.select([self._fd], [], [], 1.0)
+            if not ready:
+                continue
+
+            dirty: Set[str] = set()
+            complete = self._read_events(dirty)
+            # Let a burst (copying a folder, a sync client) settle into one delta
+            while complete and not self._stop.wait(self.DEBOUNCE):
+                if not select.select([self._fd], [], [], 0)[0]:
+                    break
+                complete = self._read_events(dirty)
+
+            if not complete:
+                print("WARNING: Library watch queue overflowed, checking every folder")
+                dirty = set(self.index.changed_folders())
+            self._apply(dirty)
+            try:
+                self._catch_up(self._sync_watches())
+            except OSError as e:
+                print(f"WARNING: Cannot watch every library folder ({e}), polling instead")
+                return
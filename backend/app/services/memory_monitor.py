@@ -0,0 +1,84 @@
+import os
+import sys
+import threading
+from typing import Callable, Iterable, Optional
+
+class MemoryMonitor:
+    """
+    Peak resident memory while a piece of work runs (e.g. one session), sampled on a thread:
+    - Sums this process and the worker processes named by `worker_pids` (asked on every sample)
+    - Reads current RSS from /proc on Linux and GetProcessMemoryInfo on Windows; reports 0 elsewhere
+    - Unlike ru_maxrss, the peak belongs to this run only, and includes the workers
+    """
+
+    INTERVAL = 0.05
+
+    def __init__(self, worker_pids: Optional[Callable[[], Iterable[int]]] = None):
+        self.worker_pids = worker_pids
+        self.peak_bytes = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def __enter__(self) -> "MemoryMonitor":
+        self._sample()
+        self._thread = threading.Thread(target=self._run, name="sap-memory", daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+        self._sample()
+
+    @property
+    def peak_mb(self) -> float:
+        return round(self.peak_bytes / (1024 * 1024), 1)
+
+    def _run(self):
+        while not self._stop.wait(self.INTERVAL):
+            self._sample()
+
+    def _sample(self):
+        pids = [os.getpid()]
+        if self.worker_pids:
+            pids += list(self.worker_pids())
+        self.peak_bytes = max(self.peak_bytes, sum(self.rss_bytes(pid) for pid in pids))
+
+    @staticmethod
+    def rss_bytes(pid: int) -> int:
+        """Current resident memory of a process (0 when it is gone or the platform does not tell)."""
+        if sys.platform.startswith("linux"):
+            try:
+                with open(f"/proc/{pid}/statm", "r") as f:
+                    return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+            except (OSError, ValueError, IndexError):
+                return 0
+
+        if sys.platform == "win32":
+            try:
+                import ctypes
+                from ctypes import wintypes
+
+                class ProcessMemoryCounters(ctypes.Structure):
+                    _fields_ = [
+                        ("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD),
+                        ("PeakWorkingSetSize", ctypes.c_size_t), ("WorkingSetSize", ctypes.c_size_t),
+                        ("QuotaPeakPagedPoolUsage", ctypes.c_size_t), ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                        ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t), ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                        ("PagefileUsage", ctypes.c_size_t), ("PeakPagefileUsage", ctypes.c_size_t)
+                    ]
+
+                # PROCESS_QUERY_LIMITED_INFORMATION
+                handle = ctypes.windll.kernel32.OpenProcess(0x1000, False, pid)
+                if not handle:
+                    return 0
+                try:
+                    counters = ProcessMemoryCounters()
+                    counters.cb = ctypes.sizeof(counters)
+                    if ctypes.windll.psapi.GetProcessMemoryInfo(handle, ctypes.byref(counters), counters.cb):
+                        return counters.WorkingSetSize
+                finally:
+                    ctypes.windll.kernel32.CloseHandle(handle)
+            except (ImportError, AttributeError, OSError):
+                pass
+        return 0
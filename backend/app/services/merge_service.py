@@ -0,0 +1,214 @@
+import re
+import hashlib
+from copy import deepcopy
+from typing import List, Dict, Set, Optional
+from pptx.opc.constants import RELATIONSHIP_TYPE as RT, RELATIONSHIP_TARGET_MODE as RTM
+from pptx.opc.package import Part, XmlPart, _Relationship
+from pptx.opc.packuri import PackURI
+from pptx.parts.image import Image, ImagePart
+from pptx.parts.slide import SlidePart, NotesSlidePart
+
+class SlideMerger:
+    """
+    Appends slides of other presentations to a target presentation at the OPC level:
+    - Slide XML is deep-copied as-is, relationship ids are preserved
+    - Related parts (media, charts, embeddings, diagrams...) are copied once per source deck
+    - Layouts are remapped by name onto the target's masters
+    - Notes slides are cloned onto the target's notes master
+    - Media is content-addressed: identical images from any deck share one part
+    """
+
+    MEDIA_CONTENT_TYPES = ('image/', 'video/', 'audio/')
+
+    # Relationships that point at package-level structure instead of slide content
+    STRUCTURAL_RELTYPES = {
+        RT.SLIDE_LAYOUT, RT.SLIDE_MASTER, RT.NOTES_SLIDE, RT.NOTES_MASTER,
+        RT.HANDOUT_MASTER, RT.THEME, RT.OFFICE_DOCUMENT
+    }
+
+    _PARTNAME_PATTERN = re.compile(r'^(.*?)(\d*)(\.[^./]+)$')
+
+    def __init__(self, prs):
+        self.prs = prs
+        self.package = prs.part.package
+        self._partnames: Set[str] = {str(p.partname) for p in self.package.iter_parts()}
+        self._counters: Dict[str, int] = {}
+        self._notes_master_part: Optional[Part] = None
+        self._media: Optional[Dict[str, Part]] = None
+
+        self._layouts_by_name: Dict[str, Part] = {}
+        for master in prs.slide_masters:
+            for layout in master.slide_layouts:
+                self._layouts_by_name.setdefault(layout.name, layout.part)
+
+    # --- PUBLIC ---
+
+    def append_presentation(self, source) -> List:
+        """Appends every slide of `source` (a Presentation) and returns the new Slide objects."""
+        copied: Dict[Part, Part] = {}
+        pairs = []
+
+        # Create all slide parts first so slide-to-slide links (hyperlinks) can be remapped
+        for src_slide in source.slides:
+            src_part = src_slide.part
+            new_part = SlidePart(
+                self._next_partname(src_part.partname), src_part.content_type,
+                self.package, deepcopy(src_part._element)
+            )
+            copied[src_part] = new_part
+            pairs.append((src_part, new_part))
+
+        sld_id_lst = self.prs.slides._sldIdLst
+        new_slides = []
+        for src_part, new_part in pairs:
+            self._copy_rels(src_part, new_part, copied)
+            self._clone_notes(src_part, new_part, copied)
+            rId = self.prs.part.rels._next_rId
+            self._add_rel(self.prs.part, rId, RT.SLIDE, new_part)
+            sld_id_lst.add_sldId(rId)
+            new_slides.append(new_part.slide)
+
+        return new_slides
+
+    # --- PARTS ---
+
+    def _next_partname(self, partname: str) -> PackURI:
+        """Next free partname following the numbering scheme of `partname`."""
+        match = self._PARTNAME_PATTERN.match(str(partname))
+        tmpl = f"{match.group(1)}%d{match.group(3)}"
+
+        n = self._counters.get(tmpl, 0)
+        while True:
+            n += 1
+            candidate = tmpl % n
+            if candidate not in self._partnames:
+                break
+
+        self._counters[tmpl] = n
+        self._partnames.add(candidate)
+        return PackURI(candidate)
+
+    def _copy_part(self, part: Part, copied: Dict[Part, Part]) -> Part:
+        """Copies a content part (and everything it relates to) into the target package."""
+        if part in copied:
+            return copied[part]
+
+        if self._is_media(part):
+            new_part = self._get_or_add_media(part.blob, lambda: type(part)(
+                self._next_partname(part.partname), part.content_type, self.package, part.blob
+            ))
+            copied[part] = new_part
+            return new_part
+
+        partname = self._next_partname(part.partname)
+        if isinstance(part, XmlPart):
+            new_part = type(part)(partname, part.content_type, self.package, deepcopy(part._element))
+        else:
+            new_part = type(part)(partname, part.content_type, self.package, part.blob)
+
+        copied[part] = new_part
+        self._copy_rels(part, new_part, copied)
+        return new_part
+
+    # --- MEDIA ---
+
+    @classmethod
+    def _is_media(cls, part: Part) -> bool:
+        return (
+            not isinstance(part, XmlPart)
+            and part.content_type.startswith(cls.MEDIA_CONTENT_TYPES)
+            and not len(part.rels)
+        )
+
+    def _get_or_add_media(self, blob: bytes, factory) -> Part:
+        """Returns the output part holding `blob`, creating it with `factory()` on first use."""
+        if self._media is None:
+            # Seed with the media already in the target (the master deck)
+            self._media = {}
+            for existing in self.package.iter_parts():
+                if self._is_media(existing):
+                    self._media.setdefault(hashlib.sha1(existing.blob).hexdigest(), existing)
+
+        digest = hashlib.sha1(blob).hexdigest()
+        part = self._media.get(digest)
+        if part is None:
+            part = factory()
+            self._media[digest] = part
+        return part
+
+    def get_or_add_image_part(self, image_file) -> ImagePart:
+        """Like python-pptx's package.get_or_add_image_part, without rescanning every part."""
+        image = Image.from_file(image_file)
+        return self._get_or_add_media(image.blob, lambda: ImagePart(
+            self._next_partname(f"/ppt/media/image1.{image.ext}"),
+            image.content_type, self.package, image.blob, image.filename
+        ))
+
+    def add_picture(self, slide, image_file, left: int, top: int, width: Optional[int] = None, height: Optional[int] = None):
+        """slide.shapes.add_picture() backed by the content-addressed media registry."""
+        image_part = self.get_or_add_image_part(image_file)
+        rId = slide.part.relate_to(image_part, RT.IMAGE)
+        pic = slide.shapes._add_pic_from_image_part(image_part, rId, left, top, width, height)
+        return slide.shapes._shape_factory(pic)
+
+    # --- RELATIONSHIPS ---
+
+    @staticmethod
+    def _add_rel(part: Part, rId: str, reltype: str, target, is_external: bool = False):
+        """Adds a relationship under a fixed rId so the copied XML keeps resolving."""
+        rels = part.rels
+        rels._rels[rId] = _Relationship(
+            rels._base_uri, rId, reltype,
+            RTM.EXTERNAL if is_external else RTM.INTERNAL, target
+        )
+
+    def _copy_rels(self, src_part: Part, new_part: Part, copied: Dict[Part, Part]):
+        for rId, rel in src_part.rels.items():
+            if rel.is_external:
+                self._add_rel(new_part, rId, rel.reltype, rel.target_ref, is_external=True)
+            elif rel.reltype == RT.SLIDE_LAYOUT:
+                self._add_rel(new_part, rId, rel.reltype, self._map_layout(rel.target_part))
+            elif rel.reltype not in self.STRUCTURAL_RELTYPES:
+                self._add_rel(new_part, rId, rel.reltype, self._copy_part(rel.target_part, copied))
+
+    def _map_layout(self, src_layout_part: Part) -> Part:
+        """Target layout with the same name, else the same position, else the first one."""
+        src_layout = src_layout_part.slide_layout
+        target = self._layouts_by_name.get(src_layout.name)
+        if target is not None:
+            return target
+
+        target_layouts = self.prs.slide_layouts
+        try:
+            idx = src_layout.slide_master.slide_layouts.index(src_layout)
+            return target_layouts[idx].part
+        except (ValueError, IndexError):
+            return target_layouts[0].part
+
+    def _clone_notes(self, src_part: Part, new_part: Part, copied: Dict[Part, Part]):
+        notes_rels = [(rId, rel) for rId, rel in src_part.rels.items() if rel.reltype == RT.NOTES_SLIDE]
+        if not notes_rels:
+            return
+        rId, rel = notes_rels[0]
+        src_notes = rel.target_part
+
+        if self._notes_master_part is None:
+            # Created from the default template when the target has none yet
+            self._notes_master_part = self.prs.part.notes_master_part
+            self._partnames.update(str(p.partname) for p in self.package.iter_parts())
+
+        new_notes = NotesSlidePart(
+            self._next_partname(src_notes.partname), src_notes.content_type,
+            self.package, deepcopy(src_notes._element)
+        )
+        for notes_rId, notes_rel in src_notes.rels.items():
+            if notes_rel.is_external:
+                self._add_rel(new_notes, notes_rId, notes_rel.reltype, notes_rel.target_ref, is_external=True)
+            elif notes_rel.reltype == RT.NOTES_MASTER:
+                self._add_rel(new_notes, notes_rId, notes_rel.reltype, self._notes_master_part)
+            elif notes_rel.reltype == RT.SLIDE:
+                self._add_rel(new_notes, notes_rId, notes_rel.reltype, new_part)
+            elif notes_rel.reltype not in self.STRUCTURAL_RELTYPES:
+                self._add_rel(new_notes, notes_rId, notes_rel.reltype, self._copy_part(notes_rel.target_part, copied))
+
+        self._add_rel(new_part, rId, RT.NOTES_SLIDE, new_notes)
@@ -0,0 +1,126 @@
+import os
+import json
+import time
+import threading
+from pathlib import Path
+from typing import Dict, Any, Optional, Tuple
+
+try:
+    from app.models import SettingsModel
+except ImportError:
+    from models import SettingsModel
+
+class SettingsStore:
+    """
+    The settings file, parsed once and served from memory:
+    - Reloaded only when the file changes on disk (mtime, size or inode), e.g. edited by hand
+    - Writes go to a temp file that is renamed over the original, so readers never see half a file
+    - get() hands out a validated SettingsModel; raw() the stored dict (for the settings dialog)
+    """
+
+    # Windows refuses to replace a file another process has open; such readers are brief
+    REPLACE_ATTEMPTS = 5
+    REPLACE_DELAY = 0.05
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._signature: Optional[Tuple[int, int, int]] = None
+        self._data: Optional[Dict[str, Any]] = None
+        self._model: Optional[SettingsModel] = None
+        self._error: Optional[ValueError] = None
+        # The file is not valid JSON: raised by raw() and get() until it changes
+        self._parse_error: Optional[json.JSONDecodeError] = None
+
+    def _stat_signature(self) -> Optional[Tuple[int, int, int]]:
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+    def _refresh(self):
+        """Re-reads the file when it changed since the last read. Caller holds the lock."""
+        signature = self._stat_signature()
+        if signature is not None and signature == self._signature:
+            return
+
+        self._signature = None
+        self._data = self._model = self._error = self._parse_error = None
+        if signature is None:
+            return
+
+        # A read that fails (OSError) is retried on the next call, a parse error only once the file changes
+        with open(self.path, "r", encoding="utf-8") as f:
+            text = f.read()
+        self._signature = signature
+        try:
+            self._data = json.loads(text)
+        except json.JSONDecodeError as e:
+            self._parse_error = e
+            raise
+        try:
+            self._model = SettingsModel.model_validate(self._data)
+        except ValueError as e:
+            # Still served by raw(), so the settings dialog can repair it
+            self._error = e
+
+    def raw(self) -> Optional[Dict[str, Any]]:
+        """
+        A copy of the stored settings as written, or None when there is no settings file yet.
+        Raises OSError / json.JSONDecodeError when the file cannot be read.
+        """
+        with self._lock:
+            self._refresh()
+            if self._parse_error is not None:
+                raise self._parse_error
+            return json.loads(json.dumps(self._data)) if self._data is not None else None
+
+    def get(self) -> Optional[SettingsModel]:
+        """
+        The validated settings, or None when there is no settings file yet.
+        Raises OSError / ValueError (invalid JSON or settings) when they cannot be used.
+        """
+        with self._lock:
+            self._refresh()
+            if self._parse_error is not None:
+                raise self._parse_error
+            if self._error is not None:
+                raise self._error
+            # Callers get their own copy, so the cached model is never modified
+            return self._model.model_copy(deep=True) if self._model is not None else None
+
+    def save(self, settings: SettingsModel):
+        """Writes the settings atomically and serves them from memory right away."""
+        data = settings.model_dump()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(f".{self.path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+
+        with self._lock:
+            try:
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(data, f, indent=4)
+                    f.flush()
+                    os.fsync(f.fileno())
+                self._replace(tmp_path)
+            except BaseException:
+                try:
+                    tmp_path.unlink()
+                except OSError:
+                    pass
+                raise
+
+            self._signature = self._stat_signature()
+            self._data = data
+            self._model = settings.model_copy(deep=True)
+            self._error = self._parse_error = None
+
+    def _replace(self, tmp_path: Path):
+        for attempt in range(self.REPLACE_ATTEMPTS):
+            try:
+                os.replace(tmp_path, self.path)
+                return
+            except PermissionError:
+                if attempt == self.REPLACE_ATTEMPTS - 1:
+                    raise
+                time.sleep(self.REPLACE_DELAY)
@@ -0,0 +1,368 @@
+import os
+import re
+import hashlib
+import zipfile
+import posixpath
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+from lxml import etree
+
+try:
+    from app.services.zip_utils import copy_raw_entry
+except ImportError:
+    from .zip_utils import copy_raw_entry
+
+_CT_NS = 'http://schemas.openxmlformats.org/package/2006/content-types'
+_REL_NS = 'http://schemas.openxmlformats.org/package/2006/relationships'
+_P_NS = 'http://schemas.openxmlformats.org/presentationml/2006/main'
+_R_NS = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+
+_RT = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships/'
+RT_SLIDE = _RT + 'slide'
+RT_SLIDE_LAYOUT = _RT + 'slideLayout'
+RT_NOTES_MASTER = _RT + 'notesMaster'
+RT_OFFICE_DOCUMENT = _RT + 'officeDocument'
+# Package-level structure that is never copied along with a slide
+STRUCTURAL_RELTYPES = {
+    RT_SLIDE_LAYOUT, _RT + 'slideMaster', RT_NOTES_MASTER,
+    _RT + 'handoutMaster', _RT + 'theme', RT_OFFICE_DOCUMENT
+}
+
+_XML_PARSER = etree.XMLParser(resolve_entities=False, remove_blank_text=False)
+
+def _parse(data: bytes):
+    return etree.fromstring(data, _XML_PARSER)
+
+def _serialize(root) -> bytes:
+    return etree.tostring(root, xml_declaration=True, encoding='UTF-8', standalone=True)
+
+def _rels_name(partname: str) -> str:
+    """Zip name of the relationships of a part ('ppt/slides/slide1.xml' -> 'ppt/slides/_rels/slide1.xml.rels')."""
+    directory, name = posixpath.split(partname)
+    return posixpath.join(directory, '_rels', name + '.rels')
+
+class _SourcePackage:
+    """Read-side view of one fragment: zip entries, content types and relationships, parsed on demand."""
+
+    def __init__(self, path: Path):
+        self.zip = zipfile.ZipFile(path)
+        self.raw = open(path, 'rb')
+        self.names = set(self.zip.namelist())
+        self._layout_keys: Dict[str, Tuple[str, str]] = {}
+
+        types = _parse(self.zip.read('[Content_Types].xml'))
+        self.defaults = {d.get('Extension').lower(): d.get('ContentType') for d in types.iter(f'{{{_CT_NS}}}Default')}
+        self.overrides = {o.get('PartName').lstrip('/'): o.get('ContentType') for o in types.iter(f'{{{_CT_NS}}}Override')}
+
+    def content_type(self, name: str) -> Optional[str]:
+        return self.overrides.get(name) or self.defaults.get(posixpath.splitext(name)[1][1:].lower())
+
+    def rels(self, name: str) -> List[Tuple[str, str, str, bool]]:
+        """(rId, type, target, external) of a part; internal targets are resolved to zip names."""
+        rels_name = _rels_name(name)
+        if rels_name not in self.names:
+            return []
+        base = posixpath.dirname(name)
+        result = []
+        for rel in _parse(self.zip.read(rels_name)).iter(f'{{{_REL_NS}}}Relationship'):
+            external = rel.get('TargetMode') == 'External'
+            target = rel.get('Target')
+            if not external:
+                target = target.lstrip('/') if target.startswith('/') else posixpath.normpath(posixpath.join(base, target))
+            result.append((rel.get('Id'), rel.get('Type'), target, external))
+        return result
+
+    def presentation_name(self) -> str:
+        for _, reltype, target, _ in self.rels(''):
+            if reltype == RT_OFFICE_DOCUMENT:
+                return target
+        return 'ppt/presentation.xml'
+
+    def slide_names(self) -> List[str]:
+        """Slides in presentation order."""
+        pres_name = self.presentation_name()
+        targets = {rId: target for rId, _, target, _ in self.rels(pres_name)}
+        root = _parse(self.zip.read(pres_name))
+        return [targets[s.get(f'{{{_R_NS}}}id')] for s in root.iter(f'{{{_P_NS}}}sldId')]
+
+    def layout_key(self, name: str) -> Tuple[str, str]:
+        """(name, type) of a slide layout, used to find its counterpart in the output."""
+        if name not in self._layout_keys:
+            root = _parse(self.zip.read(name))
+            c_sld = root.find(f'{{{_P_NS}}}cSld')
+            self._layout_keys[name] = (c_sld.get('name', '') if c_sld is not None else '', root.get('type', ''))
+        return self._layout_keys[name]
+
+    def close(self):
+        self.raw.close()
+        self.zip.close()
+
+
+class StreamingMerger:
+    """
+    Appends the slides of other decks to a master deck at the zip level, with bounded memory:
+    - Entries are streamed into the output as raw compressed bytes, one source deck at a time
+    - Part XML is never rewritten (relationship ids are kept), only the small .rels files are
+    - Layouts are matched by name, then by layout type, then the first layout is used
+    - Media is content-addressed: identical images from any deck share one entry
+    Only presentation.xml, its relationships and [Content_Types].xml are held until close().
+    """
+
+    _PARTNAME_PATTERN = re.compile(r'^(.*?)(\d*)(\.[^./]+)$')
+    MEDIA_CONTENT_TYPES = ('image/', 'video/', 'audio/')
+
+    def __init__(self, master_path: Path, output_path: Path):
+        self.output_path = output_path
+        self.tmp_path = output_path.parent / f".{output_path.name}.{os.getpid()}.{threading.get_ident()}.tmp"
+        self.zout = zipfile.ZipFile(self.tmp_path, 'w', zipfile.ZIP_DEFLATED)
+
+        self._names: Set[str] = set()
+        self._counters: Dict[str, int] = {}
+        self._media: Dict[str, str] = {}
+        self._overrides: Dict[str, str] = {}
+        self.slides_added = 0
+
+        try:
+            self._start(master_path)
+        except BaseException:
+            self.abort()
+            raise
+
+    def _start(self, master_path: Path):
+        """Copies the master deck, keeping back the parts that are rewritten on close()."""
+        master = _SourcePackage(master_path)
+        try:
+            self._defaults = dict(master.defaults)
+            self._overrides = dict(master.overrides)
+            self._pres_name = master.presentation_name()
+            self._pres_rels_name = _rels_name(self._pres_name)
+            self._presentation = _parse(master.zip.read(self._pres_name))
+            self._pres_rels = _parse(master.zip.read(self._pres_rels_name))
+
+            self._layouts: Dict[Tuple[str, str], str] = {}
+            self._notes_master: Optional[str] = None
+            for _, reltype, target, _ in master.rels(self._pres_name):
+                if reltype == RT_NOTES_MASTER:
+                    self._notes_master = target
+            for name in sorted(master.names, key=self._natural_key):
+                if master.content_type(name) == 'application/vnd.openxmlformats-officedocument.presentationml.slideLayout+xml':
+                    self._layouts.setdefault(master.layout_key(name), name)
+
+            held = {'[Content_Types].xml', self._pres_name, self._pres_rels_name}
+            for info in master.zip.infolist():
+                self._names.add(info.filename)
+                if info.filename in held:
+                    continue
+                copy_raw_entry(master.raw, info, self.zout)
+                if self._is_media(master, info.filename):
+                    self._media.setdefault(self._digest(master, info.filename), info.filename)
+        finally:
+            master.close()
+
+    # --- PUBLIC ---
+
+    def append(self, path: Path) -> int:
+        """Appends every slide of the deck at `path`. Returns the number of slides added."""
+        source = _SourcePackage(path)
+        try:
+            slide_names = source.slide_names()
+            # Allocate all slide names first so slide-to-slide links can be remapped
+            mapped = {name: self._next_name(name) for name in slide_names}
+            for name in slide_names:
+                self._copy_part(source, name, mapped)
+                self._add_slide(mapped[name])
+            return len(slide_names)
+        finally:
+            source.close()
+
+    def close(self):
+        """Writes the presentation, its relationships and the content types, and moves the deck into place."""
+        self.zout.writestr(self._pres_name, _serialize(self._presentation))
+        self.zout.writestr(self._pres_rels_name, _serialize(self._pres_rels))
+
+        types = etree.Element(f'{{{_CT_NS}}}Types', nsmap={None: _CT_NS})
+        for ext, content_type in sorted(self._defaults.items()):
+            etree.SubElement(types, f'{{{_CT_NS}}}Default', Extension=ext, ContentType=content_type)
+        for name, content_type in sorted(self._overrides.items()):
+            etree.SubElement(types, f'{{{_CT_NS}}}Override', PartName='/' + name, ContentType=content_type)
+        self.zout.writestr('[Content_Types].xml', _serialize(types))
+
+        self.zout.close()
+        os.replace(self.tmp_path, self.output_path)
+
+    def abort(self):
+        self.zout.close()
+        if os.path.exists(self.tmp_path):
+            os.unlink(self.tmp_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    # --- NAMES ---
+
+    @staticmethod
+    def _natural_key(name: str):
+        return [int(part) if part.isdigit() else part for part in re.split(r'(\d+)', name)]
+
+    def _next_name(self, name: str) -> str:
+        """Next free zip name following the numbering scheme of `name`."""
+        match = self._PARTNAME_PATTERN.match(name)
+        tmpl = f"{match.group(1)}%d{match.group(3)}"
+        n = self._counters.get(tmpl, 0)
+        while True:
+            n += 1
+            candidate = tmpl % n
+            if candidate not in self._names:
+                break
+        self._counters[tmpl] = n
+        self._names.add(candidate)
+        return candidate
+
+    # --- PARTS ---
+
+    def _is_media(self, source: _SourcePackage, name: str) -> bool:
+        content_type = source.content_type(name) or ''
+        return content_type.startswith(self.MEDIA_CONTENT_TYPES) and _rels_name(name) not in source.names
+
+    @staticmethod
+    def _digest(source: _SourcePackage, name: str) -> str:
+        sha1 = hashlib.sha1()
+        with source.zip.open(name) as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                sha1.update(chunk)
+        return sha1.hexdigest()
+
+    def _register_type(self, source: _SourcePackage, name: str, new_name: str):
+        content_type = source.content_type(name)
+        if not content_type:
+            return
+        ext = posixpath.splitext(new_name)[1][1:].lower()
+        if ext not in self._defaults and source.defaults.get(ext) == content_type:
+            self._defaults[ext] = content_type
+        if self._defaults.get(ext) != content_type:
+            self._overrides[new_name] = content_type
+
+    def _copy_part(self, source: _SourcePackage, name: str, mapped: Dict[str, str]) -> str:
+        """Copies a part and everything it relates to; `mapped` holds source -> output names of this deck."""
+        if name in mapped and mapped[name] in self.zout.NameToInfo:
+            return mapped[name]
+
+        if name not in mapped and self._is_media(source, name):
+            digest = self._digest(source, name)
+            if digest in self._media:
+                mapped[name] = self._media[digest]
+                return mapped[name]
+            mapped[name] = self._media[digest] = self._next_name(name)
+        if name not in mapped:
+            # Only now: _next_name() uses up a part number on every call
+            mapped[name] = self._next_name(name)
+        new_name = mapped[name]
+
+        # Write the part itself first, so cycles (slide <-> notes) find it mapped and written
+        copy_raw_entry(source.raw, source.zip.getinfo(name), self.zout, new_name)
+        self._register_type(source, name, new_name)
+
+        rels = source.rels(name)
+        if not rels:
+            return new_name
+
+        root = etree.Element(f'{{{_REL_NS}}}Relationships', nsmap={None: _REL_NS})
+        new_base = posixpath.dirname(new_name)
+        for rId, reltype, target, external in rels:
+            attrs = {'Id': rId, 'Type': reltype}
+            if external:
+                attrs.update(Target=target, TargetMode='External')
+            else:
+                new_target = self._map_target(source, reltype, target, mapped)
+                if new_target is None:
+                    continue
+                attrs['Target'] = posixpath.relpath(new_target, new_base)
+            etree.SubElement(root, f'{{{_REL_NS}}}Relationship', **attrs)
+        self.zout.writestr(_rels_name(new_name), _serialize(root))
+        return new_name
+
+    def _map_target(self, source: _SourcePackage, reltype: str, target: str, mapped: Dict[str, str]) -> Optional[str]:
+        if reltype == RT_SLIDE_LAYOUT:
+            return self._map_layout(source, target)
+        if reltype == RT_NOTES_MASTER:
+            return self._notes_master or self._add_notes_master(source, target)
+        if reltype == RT_SLIDE:
+            # Links to slides of the same deck follow them; links outside it are dropped
+            return mapped.get(target)
+        if reltype in STRUCTURAL_RELTYPES or target not in source.names:
+            return None
+        return self._copy_part(source, target, mapped)
+
+    def _map_layout(self, source: _SourcePackage, target: str) -> str:
+        name, layout_type = source.layout_key(target)
+        for key, layout in self._layouts.items():
+            if key[0] == name:
+                return layout
+        for key, layout in self._layouts.items():
+            if layout_type and key[1] == layout_type:
+                return layout
+        return next(iter(self._layouts.values()))
+
+    def _add_notes_master(self, source: _SourcePackage, target: str) -> str:
+        """Copies the notes master (and its theme) of the first deck with notes, when the master deck has none."""
+        mapped: Dict[str, str] = {}
+        new_name = mapped[target] = self._next_name(target)
+        self._notes_master = new_name
+        copy_raw_entry(source.raw, source.zip.getinfo(target), self.zout, new_name)
+        self._register_type(source, target, new_name)
+
+        root = etree.Element(f'{{{_REL_NS}}}Relationships', nsmap={None: _REL_NS})
+        for rId, reltype, rel_target, external in source.rels(target):
+            if external or rel_target not in source.names:
+                continue
+            new_target = self._copy_part(source, rel_target, mapped)
+            etree.SubElement(
+                root, f'{{{_REL_NS}}}Relationship', Id=rId, Type=reltype,
+                Target=posixpath.relpath(new_target, posixpath.dirname(new_name))
+            )
+        self.zout.writestr(_rels_name(new_name), _serialize(root))
+
+        rId = self._add_pres_rel(RT_NOTES_MASTER, new_name)
+        id_lst = self._presentation.find(f'{{{_P_NS}}}notesMasterIdLst')
+        if id_lst is None:
+            id_lst = etree.Element(f'{{{_P_NS}}}notesMasterIdLst')
+            # Schema order: sldMasterIdLst, notesMasterIdLst, handoutMasterIdLst, sldIdLst...
+            self._presentation.find(f'{{{_P_NS}}}sldMasterIdLst').addnext(id_lst)
+        etree.SubElement(id_lst, f'{{{_P_NS}}}notesMasterId', {f'{{{_R_NS}}}id': rId})
+        return new_name
+
+    # --- PRESENTATION ---
+
+    def _add_pres_rel(self, reltype: str, name: str) -> str:
+        used = {rel.get('Id') for rel in self._pres_rels}
+        n = len(used) + 1
+        while f"rId{n}" in used:
+            n += 1
+        rId = f"rId{n}"
+        etree.SubElement(
+            self._pres_rels, f'{{{_REL_NS}}}Relationship', Id=rId, Type=reltype,
+            Target=posixpath.relpath(name, posixpath.dirname(self._pres_name))
+        )
+        return rId
+
+    def _add_slide(self, name: str):
+        rId = self._add_pres_rel(RT_SLIDE, name)
+        sld_id_lst = self._presentation.find(f'{{{_P_NS}}}sldIdLst')
+        if sld_id_lst is None:
+            sld_id_lst = etree.Element(f'{{{_P_NS}}}sldIdLst')
+            anchor = self._presentation.find(f'{{{_P_NS}}}handoutMasterIdLst')
+            if anchor is None:
+                anchor = self._presentation.find(f'{{{_P_NS}}}notesMasterIdLst')
+            if anchor is None:
+                anchor = self._presentation.find(f'{{{_P_NS}}}sldMasterIdLst')
+            anchor.addnext(sld_id_lst)
+        ids = [int(s.get('id')) for s in sld_id_lst]
+        etree.SubElement(sld_id_lst, f'{{{_P_NS}}}sldId', {'id': str(max(ids + [255]) + 1), f'{{{_R_NS}}}id': rId})
+        self.slides_added += 1
@@ -0,0 +1,194 @@
+import os
+import re
+import zipfile
+import threading
+from bisect import bisect_right
+from pathlib import Path
+from typing import Dict, List, Optional, Any, Tuple
+from lxml import etree
+from pptx.oxml.ns import qn
+
+try:
+    from app.services.zip_utils import copy_raw_entry
+except ImportError:
+    from .zip_utils import copy_raw_entry
+
+class PlaceholderSubstitutor:
+    """
+    Replaces [% key %] placeholders in one pass per paragraph, at run level:
+    - Placeholders split over several runs are still found
+    - Replacement text lands in the run where the placeholder starts, so fonts and colours survive
+    - Paragraphs (and whole parts) without a '[%' marker are skipped after one string check
+    Works on any XML made of paragraphs of text nodes (DrawingML, WordprocessingML, SpreadsheetML).
+    """
+
+    MARKER = '[%'
+    PATTERN = re.compile(r'\[%\s*([\w\-]+)\s*%]')
+
+    # DrawingML (slides, notes, tables, groups)
+    PPTX_PARAGRAPH = qn('a:p')
+    PPTX_TEXT = qn('a:t')
+
+    # WordprocessingML and SpreadsheetML (shared strings, inline strings)
+    _W = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+    _X = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+    _XML_SPACE = '{http://www.w3.org/XML/1998/namespace}space'
+
+    # Package parts that hold document text -> (paragraph tag, text tag)
+    PACKAGE_TEXT_PARTS: List[Tuple[Any, str, str]] = [
+        (re.compile(r'^word/(document|header\d*|footer\d*|footnotes|endnotes|comments)\.xml$'), _W + 'p', _W + 't'),
+        (re.compile(r'^xl/sharedStrings\.xml$'), _X + 'si', _X + 't'),
+        (re.compile(r'^xl/worksheets/sheet\d+\.xml$'), _X + 'is', _X + 't'),
+    ]
+
+    def __init__(self, context: Dict[str, Any]):
+        self._values = {key: str(value) for key, value in context.items() if value is not None}
+
+    def _lookup(self, key: str) -> Optional[str]:
+        value = self._values.get(key)
+        if value is None:
+            value = self._values.get(key.lower())
+        return value
+
+    # --- CORE ---
+
+    def substitute_text(self, text: str) -> str:
+        """Replaces placeholders in a plain string; unknown keys are left untouched."""
+        if self.MARKER not in text:
+            return text
+
+        def replace(match):
+            value = self._lookup(match.group(1))
+            return match.group(0) if value is None else value
+
+        return self.PATTERN.sub(replace, text)
+
+    def substitute_nodes(self, nodes: List) -> int:
+        """
+        Rewrites the text of consecutive nodes (the runs of one paragraph) as if they
+        were one string. Returns the number of placeholders replaced.
+        """
+        texts = [node.text or '' for node in nodes]
+        full = ''.join(texts)
+        if self.MARKER not in full:
+            return 0
+
+        matches = [(m, self._lookup(m.group(1))) for m in self.PATTERN.finditer(full)]
+        matches = [(m, value) for m, value in matches if value is not None]
+        if not matches:
+            return 0
+
+        starts = []
+        offset = 0
+        for text in texts:
+            starts.append(offset)
+            offset += len(text)
+
+        changed = set()
+        # Right to left, so the offsets of earlier matches stay valid
+        for match, value in reversed(matches):
+            begin, end = match.span()
+            # Last run starting at or before an offset is the one holding that character
+            first = bisect_right(starts, begin) - 1
+            last = bisect_right(starts, end - 1) - 1
+
+            if first == last:
+                local = begin - starts[first]
+                texts[first] = texts[first][:local] + value + texts[first][local + (end - begin):]
+            else:
+                texts[first] = texts[first][:begin - starts[first]] + value
+                for i in range(first + 1, last):
+                    texts[i] = ''
+                texts[last] = texts[last][end - starts[last]:]
+            changed.update(range(first, last + 1))
+
+        for i in changed:
+            nodes[i].text = texts[i]
+        return len(matches)
+
+    def substitute_element(self, root, paragraph_tag: str = PPTX_PARAGRAPH, text_tag: str = PPTX_TEXT) -> int:
+        """Substitutes every paragraph below `root`. Returns the number of placeholders replaced."""
+        text_nodes = list(root.iter(text_tag))
+        if not text_nodes or self.MARKER not in ''.join(t.text or '' for t in text_nodes):
+            return 0
+
+        # Group text nodes by their nearest paragraph (Word text boxes nest paragraphs)
+        paragraphs: Dict[Any, List] = {}
+        for node in text_nodes:
+            parent = node.getparent()
+            while parent is not None and parent.tag != paragraph_tag:
+                parent = parent.getparent()
+            paragraphs.setdefault(parent, []).append(node)
+
+        return sum(self.substitute_nodes(nodes) for nodes in paragraphs.values())
+
+    # --- PRESENTATIONS ---
+
+    def substitute_slide(self, slide) -> int:
+        """Shapes, tables, groups and the speaker notes of a python-pptx slide."""
+        count = self.substitute_element(slide._element)
+        if slide.has_notes_slide:
+            count += self.substitute_element(slide.notes_slide._element)
+        return count
+
+    # --- OFFICE PACKAGES (docx / xlsx) ---
+
+    @classmethod
+    def _text_part_tags(cls, name: str) -> Optional[Tuple[str, str]]:
+        for pattern, paragraph_tag, text_tag in cls.PACKAGE_TEXT_PARTS:
+            if pattern.match(name):
+                return paragraph_tag, text_tag
+        return None
+
+    def _substitute_part(self, data: bytes, paragraph_tag: str, text_tag: str) -> Optional[bytes]:
+        """New XML for a text part, or None when it holds no known placeholder."""
+        # Every placeholder contains '%', so parts without one need no parsing
+        if b'%' not in data:
+            return None
+        root = etree.fromstring(data, etree.XMLParser(resolve_entities=False, huge_tree=True))
+        if not self.substitute_element(root, paragraph_tag, text_tag):
+            return None
+
+        # Word and Excel drop leading/trailing spaces unless the text node says otherwise
+        for node in root.iter(text_tag):
+            text = node.text or ''
+            if text != text.strip():
+                node.set(self._XML_SPACE, 'preserve')
+        return etree.tostring(root, xml_declaration=True, encoding='UTF-8', standalone=True)
+
+    def substitute_package(self, src: Path, dest: Path) -> int:
+        """
+        Writes a copy of the docx/xlsx `src` to `dest` with placeholders filled in.
+        Only text parts with placeholders are parsed and recompressed; every other
+        entry is copied as its raw compressed bytes. Returns the number of parts
+        rewritten; when that is 0, nothing is written.
+        """
+        rewritten: Dict[str, bytes] = {}
+        with zipfile.ZipFile(src) as zin:
+            for info in zin.infolist():
+                tags = self._text_part_tags(info.filename)
+                if tags:
+                    data = self._substitute_part(zin.read(info), *tags)
+                    if data is not None:
+                        rewritten[info.filename] = data
+            if not rewritten:
+                return 0
+
+            tmp_path = dest.parent / f".{dest.name}.{os.getpid()}.{threading.get_ident()}.tmp"
+            try:
+                with open(src, 'rb') as raw, zipfile.ZipFile(tmp_path, 'w') as zout:
+                    for info in zin.infolist():
+                        if info.filename in rewritten:
+                            new_info = zipfile.ZipInfo(info.filename, info.date_time)
+                            new_info.compress_type = zipfile.ZIP_DEFLATED
+                            new_info.external_attr = info.external_attr
+                            zout.writestr(new_info, rewritten[info.filename])
+                        else:
+                            copy_raw_entry(raw, info, zout)
+                os.replace(tmp_path, dest)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.unlink(tmp_path)
+                raise
+        return len(rewritten)
+
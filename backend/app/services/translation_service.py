@@ -1,12 +1,18 @@
 import json
+import threading
 from pathlib import Path
-from typing import Dict, Any, List
+from typing import Dict, Any, Iterable, List, Tuple
 
 class TranslationService:
     """
     Handles loading, parsing, and saving translation files (translations.json).
+    Parsed files are kept in memory per path and invalidated by mtime.
     """
 
+    # path -> ((mtime_ns, size), normalized data, {(LANG, industry): flattened view})
+    _store: Dict[str, Tuple[Tuple[int, int], Dict, Dict[Tuple[str, str], Dict[str, str]]]] = {}
+    _lock = threading.Lock()
+
     @staticmethod
     def load_json_safely(path: Path) -> Dict[str, Any]:
         """Reads a JSON file safely, returning an empty dict on failure."""
@@ -19,73 +25,121 @@ class TranslationService:
             print(f"ERROR: Corrupt JSON at {path}: {e}")
             return {}
 
-    @staticmethod
-    def save_json(path: Path, data: Dict[str, Any]) -> bool:
+    @classmethod
+    def save_json(cls, path: Path, data: Dict[str, Any]) -> bool:
         """Writes data to a JSON file."""
         try:
             with open(path, 'w', encoding='utf-8') as f:
                 json.dump(data, f, indent=4, ensure_ascii=False)
+            with cls._lock:
+                cls._store.pop(str(path), None)
             return True
         except OSError as e:
             print(f"ERROR: Could not save JSON to {path}: {e}")
             return False
 
     @staticmethod
-    def flatten_translation(data: Dict, lang: str, industry: str) -> Dict[str, str]:
+    def _normalize(data: Dict) -> Dict[str, Tuple[Dict[str, Dict[str, Any]], Dict[str, Any]]]:
         """
-        Flattens nested JSON (Key -> Default/Industries -> Language) into a simple Key-Value pair
-        based on the specific language and industry context.
+        Pre-normalizes a translation file for fast lookups:
+        Key -> ({industry (lower): {LANG: value}}, {LANG: value})
+        The first spelling wins when keys only differ in case, like the original scans did.
         """
-        result = {}
-        target_lang = lang.upper().strip()
-        target_ind = industry.lower().strip()
-
+        def lang_map(block) -> Dict[str, Any]:
+            result = {}
+            if isinstance(block, dict):
+                for l_key, l_val in block.items():
+                    result.setdefault(l_key.upper(), l_val)
+            return result
+
+        normalized = {}
         for key, content in data.items():
             if not isinstance(content, dict):
                 continue
 
+            industries = {}
+            if isinstance(content.get('industries'), dict):
+                for k, v in content['industries'].items():
+                    industries.setdefault(k.lower(), lang_map(v))
+
+            normalized[key] = (industries, lang_map(content.get('default')))
+        return normalized
+
+    @staticmethod
+    def _flatten_normalized(normalized: Dict, lang: str, industry: str) -> Dict[str, str]:
+        result = {}
+        target_lang = lang.upper().strip()
+        target_ind = industry.lower().strip()
+
+        for key, (industries, default) in normalized.items():
             value_found = None
 
-            # 1. Check Industry Specifics
-            if 'industries' in content and isinstance(content['industries'], dict):
-                ind_block = None
-                # Case-insensitive industry lookup
-                for k, v in content['industries'].items():
-                    if k.lower() == target_ind:
-                        ind_block = v
-                        break
-
-                if ind_block:
-                    # Try target language
-                    for l_key, l_val in ind_block.items():
-                        if l_key.upper() == target_lang:
-                            value_found = l_val
-                            break
-                    # Fallback to English
-                    if not value_found:
-                        for l_key, l_val in ind_block.items():
-                            if l_key.upper() == 'EN':
-                                value_found = l_val
-                                break
+            # 1. Check Industry Specifics (target language, then English)
+            ind_block = industries.get(target_ind)
+            if ind_block:
+                value_found = ind_block.get(target_lang) or ind_block.get('EN')
 
             # 2. Check Defaults (if no industry match found)
-            if not value_found and 'default' in content:
-                def_block = content['default']
-                for l_key, l_val in def_block.items():
-                    if l_key.upper() == target_lang:
-                        value_found = l_val
-                        break
-                if not value_found:
-                    for l_key, l_val in def_block.items():
-                        if l_key.upper() == 'EN':
-                            value_found = l_val
-                            break
+            if not value_found:
+                value_found = default.get(target_lang) or default.get('EN')
 
             if value_found:
                 result[key] = value_found
 
         return result
 
+    @classmethod
+    def flatten_translation(cls, data: Dict, lang: str, industry: str) -> Dict[str, str]:
+        """
+        Flattens nested JSON (Key -> Default/Industries -> Language) into a simple Key-Value pair
+        based on the specific language and industry context.
+        """
+        return cls._flatten_normalized(cls._normalize(data), lang, industry)
+
+    @classmethod
+    def _entry(cls, path: Path):
+        """The parsed file at `path` (re-read when it changed), or None when it is missing. Caller holds the lock."""
+        try:
+            stat = path.stat()
+        except OSError:
+            return None
+        signature = (stat.st_mtime_ns, stat.st_size)
+        key = str(path)
+
+        entry = cls._store.get(key)
+        if not entry or entry[0] != signature:
+            entry = (signature, cls._normalize(cls.load_json_safely(path)), {})
+            cls._store[key] = entry
+        return entry
+
+    @classmethod
+    def preload(cls, paths: Iterable[Path]) -> int:
+        """Parses the given translations.json files ahead of the first generation. Returns how many exist."""
+        loaded = 0
+        for path in paths:
+            with cls._lock:
+                loaded += cls._entry(path) is not None
+        return loaded
+
+    @classmethod
+    def _cached_translations(cls, path: Path, lang: str, ind: str) -> Dict[str, str]:
+        """
+        Flattened view of a translations.json for (lang, ind).
+        Each file is parsed and normalized once; every view is cached and
+        invalidated when the file's mtime or size changes.
+        """
+        with cls._lock:
+            entry = cls._entry(path)
+            if entry is None:
+                return {}
+
+            view_key = (lang.upper().strip(), ind.lower().strip())
+            view = entry[2].get(view_key)
+            if view is None:
+                view = cls._flatten_normalized(entry[1], lang, ind)
+                entry[2][view_key] = view
+            return view
+
     @classmethod
     def build_file_context(cls, library_root: Path, file_path: Path, lang: str, ind: str, base_vars: Dict) -> Dict[str, str]:
         """
@@ -95,17 +149,10 @@ class TranslationService:
         context = {}
 
         # 1. Global Translations
-        global_trans_path = library_root / "translations.json"
-        if global_trans_path.exists():
-            raw_global = cls.load_json_safely(global_trans_path)
-            context.update(cls.flatten_translation(raw_global, lang, ind))
+        context.update(cls._cached_translations(library_root / "translations.json", lang, ind))
 
         # 2. Local Translations
-        local_trans_path = file_path.parent / "translations.json"
-        if local_trans_path.exists():
-            raw_local = cls.load_json_safely(local_trans_path)
-            if raw_local:
-                context.update(cls.flatten_translation(raw_local, lang, ind))
+        context.update(cls._cached_translations(file_path.parent / "translations.json", lang, ind))
 
         # 3. System Variables (Highest Priority)
         context.update(base_vars)
@@ -0,0 +1,75 @@
+import time
+import threading
+from typing import Dict, Any, Callable, Optional
+
+class WarmupService:
+    """
+    Prepares slow things in the background once the server is answering requests:
+    - Runs named tasks one after another on a daemon thread (heavy imports, the library index, ...)
+    - Keeps the state of every task for the /health endpoint
+    - A failed task is only logged: whatever it would have prepared happens on first use instead
+    """
+
+    # How often to check whether the server is listening before starting
+    START_POLL = 0.05
+
+    _tasks: Dict[str, Dict[str, Any]] = {}
+    _lock = threading.Lock()
+    _thread: Optional[threading.Thread] = None
+    _skipped = False
+
+    @classmethod
+    def start(cls, tasks: Dict[str, Callable[[], Any]], after: Optional[Callable[[], bool]] = None):
+        """Runs `tasks` in order on a background thread, once `after()` is true (e.g. the port is bound)."""
+        with cls._lock:
+            if cls._thread is not None:
+                return
+            cls._tasks = {name: {"status": "pending"} for name in tasks}
+            cls._thread = threading.Thread(target=cls._run, args=(tasks, after), name="sap-warmup", daemon=True)
+        cls._thread.start()
+
+    @classmethod
+    def skip(cls):
+        """Records that warm-up is turned off, so /health reports ready without it."""
+        with cls._lock:
+            if cls._thread is None:
+                cls._skipped = True
+
+    @classmethod
+    def _run(cls, tasks: Dict[str, Callable[[], Any]], after: Optional[Callable[[], bool]]):
+        while after is not None and not after():
+            time.sleep(cls.START_POLL)
+
+        started = time.perf_counter()
+        for name, task in tasks.items():
+            cls._update(name, status="running")
+            task_started = time.perf_counter()
+            try:
+                result = task()
+            except Exception as e:
+                print(f"WARNING: Warm-up of {name} failed: {e}")
+                cls._update(name, status="failed", error=str(e), seconds=round(time.perf_counter() - task_started, 3))
+                continue
+            cls._update(name, status="done", result=result, seconds=round(time.perf_counter() - task_started, 3))
+        print(f"INFO: Warm-up finished in {time.perf_counter() - started:.2f}s")
+
+    @classmethod
+    def _update(cls, name: str, **state):
+        with cls._lock:
+            cls._tasks[name] = {k: v for k, v in state.items() if v is not None}
+
+    @classmethod
+    def state(cls) -> Dict[str, Any]:
+        """{"status": idle | skipped | running | done, "tasks": {name: {status, seconds, result | error}}}"""
+        with cls._lock:
+            tasks = {name: dict(task) for name, task in cls._tasks.items()}
+            skipped = cls._skipped
+        if skipped:
+            status = "skipped"
+        elif not tasks:
+            status = "idle"
+        elif all(task["status"] in ("done", "failed") for task in tasks.values()):
+            status = "done"
+        else:
+            status = "running"
+        return {"status": status, "tasks": tasks}
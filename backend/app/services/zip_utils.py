@@ -0,0 +1,66 @@
+import os
+import copy
+import struct
+import zipfile
+from typing import Optional
+
+_LOCAL_HEADER = struct.Struct('<4s2B4HL2L2H')
+_EXTRA_HEADER = struct.Struct('<2H')
+_ZIP64_EXTRA_ID = 0x0001
+_USE_DATA_DESCRIPTOR = 0x08
+# Same limit as zipfile: sizes and offsets past it need ZIP64 records
+_ZIP64_LIMIT = (1 << 31) - 1
+_CHUNK_SIZE = 1024 * 1024
+
+def _strip_zip64_extra(extra: bytes) -> bytes:
+    """The extra field without its ZIP64 record (FileHeader() writes a fresh one when needed)."""
+    kept, i = [], 0
+    while i + _EXTRA_HEADER.size <= len(extra):
+        header_id, size = _EXTRA_HEADER.unpack_from(extra, i)
+        end = i + _EXTRA_HEADER.size + size
+        if header_id != _ZIP64_EXTRA_ID:
+            kept.append(extra[i:end])
+        i = end
+    return b''.join(kept)
+
+def copy_raw_entry(raw, info: zipfile.ZipInfo, zout: zipfile.ZipFile, arcname: Optional[str] = None):
+    """
+    Appends a zip entry to `zout` (optionally renamed) without decompressing it:
+    the compressed bytes are streamed from the source file `raw` after a fresh local header.
+    Entries or outputs that need ZIP64 raise zipfile.LargeZipFile (a presentation never gets
+    near 2GB); callers treat that like any other unreadable part.
+    Writes through ZipFile internals (fp, start_dir, _didModify), see tests/test_zip_utils.py.
+    """
+    if (info.file_size > _ZIP64_LIMIT or info.compress_size > _ZIP64_LIMIT
+            or zout.fp.tell() + info.compress_size > _ZIP64_LIMIT):
+        raise zipfile.LargeZipFile(f"{info.filename} needs ZIP64, which raw copies do not support")
+
+    raw.seek(info.header_offset)
+    header = _LOCAL_HEADER.unpack(raw.read(_LOCAL_HEADER.size))
+    if header[0] != b"PK\x03\x04":
+        raise zipfile.BadZipFile(f"Bad local header for {info.filename}")
+    # The local header's own name/extra lengths (they can differ from the central directory)
+    raw.seek(header[10] + header[11], os.SEEK_CUR)
+
+    out_info = copy.copy(info)
+    if arcname is not None:
+        out_info.filename = out_info.orig_filename = arcname
+    # The central directory's extra, minus a ZIP64 record that no longer matches the sizes or offset
+    out_info.extra = _strip_zip64_extra(info.extra)
+    # Sizes and CRC are known up front, so no data descriptor follows the data
+    out_info.flag_bits &= ~_USE_DATA_DESCRIPTOR
+    out_info.header_offset = zout.fp.tell()
+    zout.fp.write(out_info.FileHeader(zip64=False))
+
+    remaining = info.compress_size
+    while remaining:
+        chunk = raw.read(min(_CHUNK_SIZE, remaining))
+        if not chunk:
+            raise zipfile.BadZipFile(f"Truncated entry {info.filename}")
+        zout.fp.write(chunk)
+        remaining -= len(chunk)
+
+    zout.filelist.append(out_info)
+    zout.NameToInfo[out_info.filename] = out_info
+    zout.start_dir = zout.fp.tell()
+    zout._didModify = True
@@ -0,0 +1,359 @@
+"""
+Repeatable microbenchmarks for the library, matching, translation and generation paths.
+
+Every benchmark runs against a synthetic library (see synthetic_library), reused between
+runs while its parameters stay the same. Each one is timed over several rounds and the
+results are written to benchmarks/results/, so a later run can be compared against them.
+
+Usage (from backend/):
+    python -m benchmarks.run                         run everything, save the results
+    python -m benchmarks.run --only scan,match       benchmarks whose name starts with one of these
+    python -m benchmarks.run --compare latest        compare against the previous saved run
+    python -m benchmarks.run --compare results/x.json --fail-on-regression
+"""
+import gc
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import contextlib
+import platform
+import statistics
+import subprocess
+import tempfile
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Any, List, Optional, Tuple
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+from app.models import SettingsModel, KeyLabel, GenerateRequest, SectionRequest
+from app.services.library_service import LibraryService
+from app.services.library_index import LibraryIndex
+from app.services.translation_service import TranslationService
+from app.services.generator_service import GeneratorService
+from app.services.image_service import ImageService
+from app.services.deck_cache import DeckCache
+
+try:
+    from benchmarks.synthetic_library import load_or_build, add_library_arguments, library_arguments, SCREENSHOT_SHAPE
+except ImportError:
+    from synthetic_library import load_or_build, add_library_arguments, library_arguments, SCREENSHOT_SHAPE
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+DEFAULT_LIBRARY = Path(tempfile.gettempdir()) / "sap-benchmark-library"
+
+# A benchmark prepares its inputs (untimed) and returns (setup before every round or None, timed operation)
+Case = Tuple[Optional[Callable[[], Any]], Callable[[], Any]]
+BENCHMARKS: Dict[str, Callable[["Context"], Case]] = {}
+
+def benchmark(name: str):
+    def register(fn: Callable[["Context"], Case]):
+        BENCHMARKS[name] = fn
+        return fn
+    return register
+
+class Context:
+    """The library under test and what the benchmarks derive from it."""
+
+    def __init__(self, root: Path, manifest: Dict[str, Any], playlist: int, work_dir: Path):
+        self.root = root
+        self.manifest = manifest
+        self.topics: List[str] = manifest["topics"]
+        self.playlist = playlist
+        self.work_dir = work_dir
+        params = manifest["params"]
+        self.settings = SettingsModel(
+            library_path=str(root), output_path=str(work_dir / "out"),
+            languages=[KeyLabel(code=code, label=code) for code in params["languages"]],
+            industries=[KeyLabel(code=code, label=code) for code in params["industries"]],
+            deck_workers=1
+        )
+        # Every (language, industry) pair once, so each variant rule is exercised
+        self.combos = [(lang, ind) for lang in params["languages"] for ind in params["industries"]]
+
+    def topic_folders(self, limit: Optional[int] = None) -> List[Path]:
+        per_tool = self.manifest["params"]["topics_per_tool"]
+        names = self.topics[:limit] if limit else self.topics
+        return [self.root / f"Tool{n // per_tool:03d}" / name for n, name in enumerate(names)]
+
+    def tools(self) -> List[Path]:
+        return sorted(p for p in self.root.iterdir() if p.is_dir())
+
+    def fresh_dir(self, name: str) -> Path:
+        path = self.work_dir / name
+        shutil.rmtree(path, ignore_errors=True)
+        path.mkdir(parents=True)
+        return path
+
+# --- SCAN ---
+
+@benchmark("scan.scan_folders")
+def bench_scan_folders(ctx: Context) -> Case:
+    return None, lambda: LibraryService.scan_folders(str(ctx.root.resolve()))
+
+@benchmark("scan.index_build")
+def bench_index_build(ctx: Context) -> Case:
+    return None, lambda: LibraryIndex(ctx.root)
+
+# --- RESOLVE (drag & drop) ---
+
+@benchmark("resolve.drop_indexed")
+def bench_resolve_indexed(ctx: Context) -> Case:
+    index = LibraryIndex(ctx.root)
+    paths = [str(p) for p in ctx.tools()]
+    return None, lambda: LibraryService.resolve_dropped_paths(paths, index)
+
+@benchmark("resolve.drop_disk")
+def bench_resolve_disk(ctx: Context) -> Case:
+    paths = [str(p) for p in ctx.tools()]
+    return None, lambda: LibraryService.resolve_dropped_paths(paths)
+
+# --- VARIANT MATCHING ---
+
+def _match_all(ctx: Context):
+    for topic in ctx.topics:
+        for lang, ind in ctx.combos[::3]:
+            GeneratorService.find_best_matches(ctx.root, f"{topic}.pptx", lang, ind, ctx.settings)
+
+@benchmark("match.find_best_matches.cold")
+def bench_match_cold(ctx: Context) -> Case:
+    # Watched like the app's library, so lookups do not re-check folder mtimes
+    index = LibraryIndex.watch(ctx.root)
+    return index._resolved.clear, lambda: _match_all(ctx)
+
+@benchmark("match.find_best_matches.warm")
+def bench_match_warm(ctx: Context) -> Case:
+    LibraryIndex.watch(ctx.root)
+    _match_all(ctx)
+    return None, lambda: _match_all(ctx)
+
+# --- SCREENSHOTS ---
+
+@benchmark("screenshot.index")
+def bench_screenshot_index(ctx: Context) -> Case:
+    folders = ctx.topic_folders()
+    return ImageService._indexes.clear, lambda: [ImageService.screenshot_index(f) for f in folders]
+
+@benchmark("screenshot.find")
+def bench_screenshot_find(ctx: Context) -> Case:
+    indexes = [ImageService.screenshot_index(f) for f in ctx.topic_folders()]
+    shapes = [SCREENSHOT_SHAPE, "Title 1", "Content Placeholder 2"]
+
+    def run():
+        for index in indexes:
+            for lang, ind in ctx.combos:
+                for shape in shapes:
+                    ImageService.find_screenshot(index, shape, lang, ind)
+    return None, run
+
+# --- TRANSLATIONS & CONTEXT ---
+
+@benchmark("translations.flatten")
+def bench_flatten(ctx: Context) -> Case:
+    files = [ctx.root / "translations.json"] + [f / "translations.json" for f in ctx.topic_folders()]
+    data = [TranslationService.load_json_safely(p) for p in files if p.exists()]
+
+    def run():
+        for item in data:
+            for lang, ind in ctx.combos:
+                TranslationService.flatten_translation(item, lang, ind)
+    return None, run
+
+def _build_contexts(ctx: Context, decks: List[Path]):
+    base_vars = {"customer_name": "ACME", "date": "2026-01-01"}
+    for deck in decks:
+        for lang, ind in ctx.combos[::5]:
+            TranslationService.build_file_context(ctx.root, deck, lang, ind, base_vars)
+
+@benchmark("context.build.cold")
+def bench_context_cold(ctx: Context) -> Case:
+    decks = [f / f"{f.name}.pptx" for f in ctx.topic_folders()]
+    return TranslationService._store.clear, lambda: _build_contexts(ctx, decks)
+
+@benchmark("context.build.warm")
+def bench_context_warm(ctx: Context) -> Case:
+    decks = [f / f"{f.name}.pptx" for f in ctx.topic_folders()]
+    _build_contexts(ctx, decks)
+    return None, lambda: _build_contexts(ctx, decks)
+
+# --- GENERATION ---
+
+def _session_request(ctx: Context) -> GenerateRequest:
+    step = max(1, len(ctx.topics) // max(1, ctx.playlist))
+    folders = ctx.topic_folders()[::step][:ctx.playlist]
+    half = len(folders) // 2
+    # Exercises only where the topic has one; otherwise the deck would be matched instead
+    exercises = [f"{f.name}.xlsx" for f in folders[:half] if (f / f"{f.name}.xlsx").exists()]
+    sections = [
+        SectionRequest(title="Basics", topics=[f"{f.name}.pptx" for f in folders[:half]] + exercises),
+        SectionRequest(title="Advanced", topics=[f"{f.name}.pptx" for f in folders[half:]])
+    ]
+    lang, ind = ctx.combos[len(ctx.combos) // 2]
+    return GenerateRequest(
+        session_name="Bench", date="2026-01-01", customer_name="ACME", customer_industry=ind,
+        industry_code=ind, language_code=lang, sections=sections
+    )
+
+def _point_caches(ctx: Context):
+    """Empty fragment, output and image caches, so nothing from an earlier round is reused."""
+    GeneratorService.FRAGMENTS.root = ctx.fresh_dir("fragments")
+    GeneratorService.OUTPUTS.root = ctx.fresh_dir("outputs")
+    ImageService.CACHE.root = ctx.fresh_dir("images")
+    DeckCache.clear()
+
+def _generate(ctx: Context, req: GenerateRequest) -> Dict[str, Any]:
+    result = GeneratorService.generate_session(req, ctx.root, ctx.work_dir / "out", ctx.settings, deck_workers=1)
+    if result.get("status") != "success":
+        raise RuntimeError(f"Generation failed: {result}")
+    return result
+
+@benchmark("generate.session.cold")
+def bench_generate_cold(ctx: Context) -> Case:
+    req = _session_request(ctx)
+
+    def setup():
+        _point_caches(ctx)
+        ctx.fresh_dir("out")
+        gc.collect()
+    return setup, lambda: _generate(ctx, req)
+
+@benchmark("generate.session.cached")
+def bench_generate_cached(ctx: Context) -> Case:
+    req = _session_request(ctx)
+    _point_caches(ctx)
+    _generate(ctx, req)
+    return None, lambda: _generate(ctx, req)
+
+# --- RUNNER ---
+
+def run_case(name: str, ctx: Context, rounds: int, warmup: int, verbose: bool = False) -> Dict[str, Any]:
+    times = []
+    # The services log every step; keep the report readable unless asked for
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(sys.stdout if verbose else devnull):
+        setup, operation = BENCHMARKS[name](ctx)
+        for i in range(warmup + rounds):
+            if setup:
+                setup()
+            started = time.perf_counter()
+            operation()
+            elapsed = time.perf_counter() - started
+            if i >= warmup:
+                times.append(elapsed)
+    return {
+        "median": statistics.median(times),
+        "mean": statistics.fmean(times),
+        "min": min(times),
+        "stdev": statistics.stdev(times) if len(times) > 1 else 0.0,
+        "rounds": rounds
+    }
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def _load_baseline(spec: str) -> Tuple[Path, Dict[str, Any]]:
+    if spec == "latest":
+        saved = sorted(RESULTS_DIR.glob("*.json"))
+        if not saved:
+            raise FileNotFoundError(f"No saved results in {RESULTS_DIR}")
+        path = saved[-1]
+    else:
+        path = Path(spec)
+    with open(path, "r", encoding="utf-8") as f:
+        return path, json.load(f)
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """Prints median changes per benchmark; returns the names that got slower than `threshold` allows."""
+    if baseline.get("library") != current["library"]:
+        print("WARNING: The baseline used a different library; timings are not comparable")
+
+    regressions = []
+    print(f"\n{'benchmark':<32} {'baseline':>10} {'current':>10} {'change':>8}")
+    for name, result in current["results"].items():
+        before = baseline.get("results", {}).get(name)
+        if not before:
+            print(f"{name:<32} {'-':>10} {result['median'] * 1000:>8.1f}ms {'new':>8}")
+            continue
+        ratio = result["median"] / before["median"] if before["median"] else float("inf")
+        flag = ""
+        if ratio > 1 + threshold:
+            flag = "  SLOWER"
+            regressions.append(name)
+        elif ratio < 1 - threshold:
+            flag = "  faster"
+        print(f"{name:<32} {before['median'] * 1000:>8.1f}ms {result['median'] * 1000:>8.1f}ms {ratio - 1:>+7.0%}{flag}")
+    return regressions
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Run the backend benchmarks")
+    parser.add_argument("--library", type=Path, default=DEFAULT_LIBRARY, help="where the synthetic library is built")
+    add_library_arguments(parser)
+    parser.add_argument("--playlist", type=int, default=12, help="topics in the generated session")
+    parser.add_argument("--only", default="", help="comma separated name prefixes")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--compare", help="saved results to compare against, or 'latest'")
+    parser.add_argument("--threshold", type=float, default=0.10, help="median change reported as a regression")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    parser.add_argument("--no-save", action="store_true")
+    parser.add_argument("--verbose", action="store_true", help="show what the services log")
+    args = parser.parse_args()
+
+    baseline = _load_baseline(args.compare) if args.compare else None
+
+    started = time.perf_counter()
+    manifest = load_or_build(args.library, **library_arguments(args))
+    print(f"INFO: Library {args.library}: {json.dumps(manifest['counts'])} ({time.perf_counter() - started:.1f}s)")
+
+    prefixes = [p.strip() for p in args.only.split(",") if p.strip()]
+    names = [n for n in BENCHMARKS if not prefixes or any(n.startswith(p) for p in prefixes)]
+
+    work_dir = Path(tempfile.mkdtemp(prefix="sap-benchmark-"))
+    results: Dict[str, Any] = {}
+    try:
+        ctx = Context(args.library, manifest, args.playlist, work_dir)
+        for name in names:
+            results[name] = run_case(name, ctx, args.rounds, args.warmup, args.verbose)
+            r = results[name]
+            print(f"{name:<32} median {r['median'] * 1000:9.2f}ms   min {r['min'] * 1000:9.2f}ms   stdev {r['stdev'] * 1000:7.2f}ms")
+    finally:
+        LibraryIndex.invalidate()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    run = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "library": manifest["params"],
+        "playlist": args.playlist,
+        "results": results
+    }
+
+    regressions = []
+    if baseline:
+        path, data = baseline
+        print(f"\nINFO: Compared with {path} ({data.get('commit')}, {data.get('created')})")
+        regressions = compare(run, data, args.threshold)
+
+    if not args.no_save:
+        RESULTS_DIR.mkdir(exist_ok=True)
+        out = RESULTS_DIR / f"{datetime.now():%Y%m%d-%H%M%S}-{run['commit'] or 'local'}.json"
+        with open(out, "w", encoding="utf-8") as f:
+            json.dump(run, f, indent=2)
+        print(f"INFO: Results saved to {out}")
+
+    return 1 if regressions and args.fail_on_regression else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
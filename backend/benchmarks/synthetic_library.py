@@ -0,0 +1,202 @@
+"""
+Builds synthetic training libraries for the benchmarks, laid out like a real one:
+
+    <root>/Intro.pptx, Intro_<LANG>.pptx, Outro.pptx, translations.json
+    <root>/Tool007/translations.json
+    <root>/Tool007/Topic00350/Topic00350.pptx               generic deck
+                             /Topic00350_NL.pptx            language variant
+                             /Topic00350_NL_health.pptx     language + industry variant
+                             /Topic00350.xlsx, Topic00350_solution.xlsx
+                             /screenshots/shot.png, shot_NL.png, ...
+                             /translations.json
+
+Decks are real (small) PPTX files with placeholders and a named screenshot shape;
+exercises are real XLSX files. Everything is derived from `seed`, so a library
+built twice with the same parameters is identical.
+
+Usage: python -m benchmarks.synthetic_library <root> [--topics 1000] [--seed 0]
+"""
+import io
+import json
+import random
+import shutil
+import argparse
+from pathlib import Path
+from typing import Dict, Any, List, Sequence
+
+from PIL import Image
+from pptx import Presentation
+from pptx.util import Inches
+import xlsxwriter
+
+# Written next to the library, so a matching library can be reused instead of rebuilt
+MANIFEST = ".benchmark-library.json"
+
+SCREENSHOT_SHAPE = "shot"
+
+DEFAULT_PARAMS: Dict[str, Any] = {
+    "topics": 1000,
+    "topics_per_tool": 50,
+    "languages": ["EN", "NL", "FR", "DE"],
+    "industries": ["health", "finance", "retail", "public"],
+    # Chance of each language variant (and, split over the industries, language + industry variant)
+    "variant_ratio": 0.4,
+    # Chance of a topic having an exercise + solution workbook
+    "exercise_ratio": 0.5,
+    "slides": 3,
+    "translation_keys": 20,
+    "seed": 0
+}
+
+def _deck_bytes(slides: int) -> bytes:
+    """A small deck with placeholders in titles, bodies and notes, and a shape named after a screenshot."""
+    prs = Presentation()
+    for i in range(slides):
+        slide = prs.slides.add_slide(prs.slide_layouts[1])
+        slide.shapes.title.text = f"[% topic_title %] for [% customer_name %] ({i + 1})"
+        slide.placeholders[1].text = "[% greeting %], [% customer_name %] - [% date %]"
+        shape = slide.shapes.add_shape(1, Inches(5), Inches(1.5), Inches(4), Inches(2.25))
+        shape.name = SCREENSHOT_SHAPE
+        slide.notes_slide.notes_text_frame.text = "[% label_0 %] [% industry %]"
+    buffer = io.BytesIO()
+    prs.save(buffer)
+    return buffer.getvalue()
+
+def _workbook_bytes(solution: bool) -> bytes:
+    buffer = io.BytesIO()
+    workbook = xlsxwriter.Workbook(buffer, {"in_memory": True})
+    sheet = workbook.add_worksheet("Exercise")
+    sheet.write(0, 0, "[% customer_name %]")
+    sheet.write(1, 0, "[% greeting %]")
+    for row in range(2, 12):
+        sheet.write(row, 0, f"Question {row - 1}")
+        sheet.write(row, 1, row * 7 if solution else "")
+    workbook.close()
+    return buffer.getvalue()
+
+def _image_bytes(shade: int) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (1280, 720), (shade, 120, 200)).save(buffer, "PNG")
+    return buffer.getvalue()
+
+def _translations(rng: random.Random, keys: int, languages: Sequence[str], industries: Sequence[str]) -> Dict[str, Any]:
+    """A translations.json: every key has defaults per language, some have industry overrides."""
+    data = {}
+    names = ["greeting", "topic_title"] + [f"label_{i}" for i in range(max(0, keys - 2))]
+    for name in names:
+        entry: Dict[str, Any] = {"default": {lang: f"{name} ({lang})" for lang in languages}}
+        if rng.random() < 0.3:
+            entry["industries"] = {
+                ind: {lang: f"{name} ({lang}, {ind})" for lang in rng.sample(list(languages), 2)}
+                for ind in rng.sample(list(industries), 2)
+            }
+        data[name] = entry
+    return data
+
+def _write_json(path: Path, data: Dict[str, Any]):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+
+def library_params(**overrides) -> Dict[str, Any]:
+    """DEFAULT_PARAMS with `overrides` applied; unknown names raise TypeError."""
+    unknown = set(overrides) - set(DEFAULT_PARAMS)
+    if unknown:
+        raise TypeError(f"Unknown library parameters: {', '.join(sorted(unknown))}")
+    params = dict(DEFAULT_PARAMS, **overrides)
+    params["languages"] = list(params["languages"])
+    params["industries"] = list(params["industries"])
+    return params
+
+def build_library(root: Path, **overrides) -> Dict[str, Any]:
+    """
+    (Re)creates a library at `root` (see DEFAULT_PARAMS for the parameters) and
+    returns its manifest: parameters, file counts and topic names ("Topic00042").
+    """
+    params = library_params(**overrides)
+    topics, topics_per_tool = params["topics"], params["topics_per_tool"]
+    languages, industries = params["languages"], params["industries"]
+    variant_ratio, translation_keys = params["variant_ratio"], params["translation_keys"]
+    rng = random.Random(params["seed"])
+    shutil.rmtree(root, ignore_errors=True)
+    root.mkdir(parents=True)
+
+    deck = _deck_bytes(params["slides"])
+    exercise, solution = _workbook_bytes(False), _workbook_bytes(True)
+    images = [_image_bytes(shade) for shade in (40, 120, 200)]
+    counts = {"decks": 0, "exercises": 0, "screenshots": 0, "translations": 0, "folders": 0}
+
+    def write(path: Path, data: bytes, kind: str):
+        path.write_bytes(data)
+        counts[kind] += 1
+
+    for name in ["Intro"] + [f"Intro_{lang}" for lang in languages] + ["Outro"]:
+        write(root / f"{name}.pptx", deck, "decks")
+    _write_json(root / "translations.json", _translations(rng, translation_keys, languages, industries))
+    counts["translations"] += 1
+
+    names: List[str] = []
+    for n in range(topics):
+        tool = root / f"Tool{n // topics_per_tool:03d}"
+        if n % topics_per_tool == 0:
+            tool.mkdir()
+            _write_json(tool / "translations.json", _translations(rng, translation_keys // 2, languages, industries))
+            counts["translations"] += 1
+            counts["folders"] += 1
+
+        topic = f"Topic{n:05d}"
+        folder = tool / topic
+        (folder / "screenshots").mkdir(parents=True)
+        counts["folders"] += 2
+        names.append(topic)
+
+        write(folder / f"{topic}.pptx", deck, "decks")
+        write(folder / "screenshots" / f"{SCREENSHOT_SHAPE}.png", images[n % len(images)], "screenshots")
+        for lang in languages:
+            if rng.random() < variant_ratio:
+                write(folder / f"{topic}_{lang}.pptx", deck, "decks")
+                write(folder / "screenshots" / f"{SCREENSHOT_SHAPE}_{lang}.png", images[(n + 1) % len(images)], "screenshots")
+            for ind in industries:
+                if rng.random() < variant_ratio / len(industries):
+                    write(folder / f"{topic}_{lang}_{ind}.pptx", deck, "decks")
+        if rng.random() < params["exercise_ratio"]:
+            write(folder / f"{topic}.xlsx", exercise, "exercises")
+            write(folder / f"{topic}_solution.xlsx", solution, "exercises")
+        if rng.random() < 0.5:
+            _write_json(folder / "translations.json", _translations(rng, translation_keys // 4, languages, industries))
+            counts["translations"] += 1
+
+    manifest = {"params": params, "counts": counts, "topics": names}
+    _write_json(root / MANIFEST, manifest)
+    return manifest
+
+def load_or_build(root: Path, **overrides) -> Dict[str, Any]:
+    """The library at `root` when it was built with the same parameters, otherwise a fresh one."""
+    try:
+        with open(root / MANIFEST, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest["params"] == library_params(**overrides):
+            return manifest
+    except (OSError, ValueError, KeyError):
+        pass
+    return build_library(root, **overrides)
+
+def add_library_arguments(parser: argparse.ArgumentParser):
+    """--topics, --topics-per-tool, ... for every parameter in DEFAULT_PARAMS except the code lists."""
+    for name, default in DEFAULT_PARAMS.items():
+        if not isinstance(default, list):
+            parser.add_argument(f"--{name.replace('_', '-')}", type=type(default), default=default)
+
+def library_arguments(args: argparse.Namespace) -> Dict[str, Any]:
+    return {name: getattr(args, name) for name, default in DEFAULT_PARAMS.items() if not isinstance(default, list)}
+
+def main():
+    parser = argparse.ArgumentParser(description="Build a synthetic training library")
+    parser.add_argument("root", type=Path)
+    add_library_arguments(parser)
+    args = parser.parse_args()
+
+    manifest = build_library(args.root, **library_arguments(args))
+    print(f"INFO: Built {args.root}: {json.dumps(manifest['counts'])}")
+
+if __name__ == "__main__":
+    main()
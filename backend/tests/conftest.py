@@ -0,0 +1,29 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+# The backend imports itself as `app.…`, the way main.py runs it
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from benchmarks.synthetic_library import build_library
+
+@pytest.fixture(scope="session")
+def synthetic_library(tmp_path_factory):
+    """A small synthetic library (see benchmarks/synthetic_library.py) and its manifest."""
+    root = tmp_path_factory.mktemp("library")
+    manifest = build_library(root, topics=6, topics_per_tool=3, variant_ratio=0.5, exercise_ratio=1.0)
+    return root, manifest
+
+@pytest.fixture
+def cache_dirs(tmp_path, monkeypatch):
+    """Points the generator's disk caches at a fresh folder, so tests neither share nor reuse outputs."""
+    from app.services.deck_cache import DeckCache
+    from app.services.generator_service import GeneratorService
+    from app.services.image_service import ImageService
+
+    for name, cache in (("fragments", GeneratorService.FRAGMENTS), ("outputs", GeneratorService.OUTPUTS),
+                        ("images", ImageService.CACHE)):
+        monkeypatch.setattr(cache, "root", tmp_path / "cache" / name)
+    DeckCache.clear()
+    return tmp_path / "cache"
@@ -0,0 +1,55 @@
+import os
+from pathlib import Path
+
+import pytest
+
+from app.services.library_index import LibraryIndex
+
+TOPIC_FILES = [
+    "Topic.pptx", "Topic_NL.pptx", "Topic_health.pptx", "Topic_NL_health.pptx", "Topic_health_NL.pptx",
+    "Topic.xlsx", "Topic_solution.xlsx", "Topic_NL.xlsx"
+]
+
+@pytest.fixture
+def library(tmp_path):
+    folder = tmp_path / "Tool" / "Topic"
+    folder.mkdir(parents=True)
+    for name in TOPIC_FILES:
+        (folder / name).write_bytes(b"x")
+    return tmp_path
+
+def _resolve(root: Path, topic="Topic.pptx", langs=("NL",), inds=("health",)):
+    return [path.name for path in LibraryIndex(root).resolve(topic, list(langs), list(inds))]
+
+def test_language_and_industry_variant_wins(library):
+    assert _resolve(library) == ["Topic_NL_health.pptx"]
+
+@pytest.mark.parametrize("removed, expected", [
+    (["Topic_NL_health.pptx"], "Topic_health_NL.pptx"),
+    (["Topic_NL_health.pptx", "Topic_health_NL.pptx"], "Topic_NL.pptx"),
+    (["Topic_NL_health.pptx", "Topic_health_NL.pptx", "Topic_NL.pptx"], "Topic_health.pptx"),
+    (["Topic_NL_health.pptx", "Topic_health_NL.pptx", "Topic_NL.pptx", "Topic_health.pptx"], "Topic.pptx"),
+])
+def test_priority_falls_back_in_order(library, removed, expected):
+    for name in removed:
+        (library / "Tool" / "Topic" / name).unlink()
+    assert _resolve(library) == [expected]
+
+def test_aliases_and_case_are_accepted(library):
+    # Any listed code may match; the topic name is case-insensitive
+    assert _resolve(library, topic="topic.pptx", langs=("nl-BE", "NL"), inds=("HOSPITAL", "health")) == ["Topic_NL_health.pptx"]
+
+def test_same_file_type_is_preferred_and_brings_its_solution(library):
+    assert _resolve(library, topic="Topic.xlsx", inds=()) == ["Topic_NL.xlsx"]
+    assert _resolve(library, topic="Topic.xlsx", langs=("FR",), inds=()) == ["Topic.xlsx", "Topic_solution.xlsx"]
+
+def test_unknown_topic_resolves_to_nothing(library):
+    assert _resolve(library, topic="Missing.pptx") == []
+
+def test_refresh_picks_up_new_variants(library):
+    index = LibraryIndex(library)
+    # Memoized before the change, so the refresh has to drop it
+    assert [p.name for p in index.resolve("Topic.pptx", ["FR"], [])] == ["Topic.pptx"]
+    (library / "Tool" / "Topic" / "Topic_FR.pptx").write_bytes(b"x")
+    index.refresh([os.path.join("Tool", "Topic")])
+    assert [p.name for p in index.resolve("Topic.pptx", ["FR"], [])] == ["Topic_FR.pptx"]
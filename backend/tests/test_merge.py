@@ -0,0 +1,78 @@
+import hashlib
+import zipfile
+
+import pytest
+from pptx import Presentation
+from pptx.enum.shapes import MSO_SHAPE_TYPE
+
+from app.models import GenerateRequest, SectionRequest, SettingsModel
+from app.services.generator_service import GeneratorService
+from app.services.image_service import ImageService
+
+def _request(manifest, name):
+    topics = manifest["topics"]
+    return GenerateRequest(
+        session_name=name, date="2026-01-01", customer_name="ACME", customer_industry="health",
+        industry_code="health", language_code="NL",
+        sections=[
+            SectionRequest(title="Basics", topics=[f"{t}.pptx" for t in topics[:3]] + [f"{topics[0]}.xlsx"]),
+            SectionRequest(title="Advanced", topics=[f"{t}.pptx" for t in topics[3:]])
+        ]
+    )
+
+def _generate(library, cache_dirs, tmp_path, streaming):
+    name = "Streaming" if streaming else "InMemory"
+    # Separate caches per run, so the second merge does not reuse the first one's fragments or output
+    GeneratorService.FRAGMENTS.root = cache_dirs / name / "fragments"
+    GeneratorService.OUTPUTS.root = cache_dirs / name / "outputs"
+    ImageService.CACHE.root = cache_dirs / name / "images"
+
+    root, manifest = library
+    settings = SettingsModel(library_path=str(root), output_path=str(tmp_path), streaming_merge=streaming, deck_workers=1)
+    result = GeneratorService.generate_session(_request(manifest, name), root, tmp_path / "out", settings, deck_workers=1)
+    assert result["status"] == "success" and result["errors"] == 0
+    return tmp_path / "out" / GeneratorService._folder_name(_request(manifest, name)) / "slides.pptx"
+
+def _texts(path):
+    prs = Presentation(str(path))
+    slides = []
+    for slide in prs.slides:
+        texts = [shape.text_frame.text for shape in slide.shapes if shape.has_text_frame]
+        notes = slide.notes_slide.notes_text_frame.text if slide.has_notes_slide else None
+        slides.append((texts, notes))
+    return slides
+
+def _media(path):
+    with zipfile.ZipFile(path) as z:
+        return [hashlib.sha256(z.read(name)).hexdigest() for name in z.namelist() if name.startswith("ppt/media/")]
+
+def _pictures(path):
+    return sum(1 for slide in Presentation(str(path)).slides for shape in slide.shapes if shape.shape_type == MSO_SHAPE_TYPE.PICTURE)
+
+@pytest.fixture
+def outputs(synthetic_library, cache_dirs, tmp_path):
+    return {streaming: _generate(synthetic_library, cache_dirs, tmp_path, streaming) for streaming in (False, True)}
+
+def test_streaming_and_in_memory_merges_match(outputs):
+    in_memory, streaming = _texts(outputs[False]), _texts(outputs[True])
+    # Intro, six topics and the outro, three slides each
+    assert len(in_memory) == 8 * 3
+    assert streaming == in_memory
+    assert sorted(_media(outputs[True])) == sorted(_media(outputs[False]))
+    for path in outputs.values():
+        with zipfile.ZipFile(path) as z:
+            assert z.testzip() is None
+
+def test_placeholders_are_filled(outputs):
+    for texts, notes in _texts(outputs[True]):
+        assert not any("[%" in text for text in texts)
+        assert notes is None or "[%" not in notes
+    titles = [texts[0] for texts, _ in _texts(outputs[True])]
+    assert all("ACME" in title for title in titles)
+
+@pytest.mark.parametrize("streaming", [False, True])
+def test_screenshots_are_stored_once(outputs, streaming):
+    media = _media(outputs[streaming])
+    # Three distinct screenshots in the library, placed on every topic slide
+    assert len(media) == len(set(media))
+    assert 0 < len(media) < _pictures(outputs[streaming])
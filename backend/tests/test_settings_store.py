@@ -0,0 +1,65 @@
+import json
+import os
+
+import pytest
+
+from app.models import SettingsModel
+from app.services.settings_store import SettingsStore
+
+VALID = {"library_path": "/library", "output_path": "/output"}
+
+def _write(path, text):
+    path.write_text(text, encoding="utf-8")
+    # A distinct mtime, even on filesystems with coarse timestamps
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+def test_missing_file_is_none(tmp_path):
+    store = SettingsStore(tmp_path / "settings.json")
+    assert store.raw() is None
+    assert store.get() is None
+
+def test_corrupt_file_keeps_failing_until_it_is_fixed(tmp_path):
+    path = tmp_path / "settings.json"
+    _write(path, '{"library_path": ')
+    store = SettingsStore(path)
+
+    for _ in range(3):
+        with pytest.raises(json.JSONDecodeError):
+            store.raw()
+        with pytest.raises(ValueError):
+            store.get()
+
+    _write(path, json.dumps(VALID))
+    assert store.raw() == VALID
+    assert store.get().library_path == "/library"
+
+def test_invalid_settings_are_still_served_raw(tmp_path):
+    path = tmp_path / "settings.json"
+    _write(path, json.dumps({"library_path": "/library"}))
+    store = SettingsStore(path)
+
+    assert store.raw() == {"library_path": "/library"}
+    with pytest.raises(ValueError):
+        store.get()
+
+def test_save_replaces_a_corrupt_file(tmp_path):
+    path = tmp_path / "settings.json"
+    _write(path, "not json")
+    store = SettingsStore(path)
+    with pytest.raises(ValueError):
+        store.get()
+
+    store.save(SettingsModel(**VALID))
+    assert store.get().output_path == "/output"
+    assert json.loads(path.read_text(encoding="utf-8"))["library_path"] == "/library"
+    assert [p.name for p in tmp_path.iterdir()] == ["settings.json"]
+
+def test_copies_do_not_change_the_store(tmp_path):
+    store = SettingsStore(tmp_path / "settings.json")
+    store.save(SettingsModel(**VALID))
+
+    store.get().library_path = "/elsewhere"
+    store.raw()["library_path"] = "/elsewhere"
+    assert store.get().library_path == "/library"
+    assert store.raw()["library_path"] == "/library"
@@ -0,0 +1,70 @@
+import zipfile
+
+from lxml import etree
+from pptx import Presentation
+
+from app.services.substitution_service import PlaceholderSubstitutor
+
+CONTEXT = {"customer_name": "ACME", "greeting": "Hello"}
+W = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+
+def _paragraph(runs):
+    prs = Presentation()
+    slide = prs.slides.add_slide(prs.slide_layouts[5])
+    paragraph = slide.shapes.title.text_frame.paragraphs[0]
+    for text, bold in runs:
+        run = paragraph.add_run()
+        run.text = text
+        run.font.bold = bold
+    return slide, paragraph
+
+def test_placeholder_split_over_runs_is_replaced_in_its_first_run():
+    slide, paragraph = _paragraph([("Dear [% cust", True), ("omer_na", False), ("me %], ", False), ("[% greeting %]!", None)])
+
+    assert PlaceholderSubstitutor(CONTEXT).substitute_slide(slide) == 2
+    assert paragraph.text == "Dear ACME, Hello!"
+    # The value lands in the run the placeholder starts in, so that run's formatting applies
+    assert [(run.text, run.font.bold) for run in paragraph.runs] == [
+        ("Dear ACME", True), ("", False), (", ", False), ("Hello!", None)
+    ]
+
+def test_unknown_and_malformed_placeholders_are_left_alone():
+    slide, paragraph = _paragraph([("[% unknown %] [% custo", None), ("mer_name", None), (" [% greeting", None)])
+
+    assert PlaceholderSubstitutor(CONTEXT).substitute_slide(slide) == 0
+    assert paragraph.text == "[% unknown %] [% customer_name [% greeting"
+
+def test_keys_fall_back_to_lower_case():
+    assert PlaceholderSubstitutor(CONTEXT).substitute_text("[%Customer_Name%] / [%  GREETING  %]") == "ACME / Hello"
+
+def _docx(path, paragraphs):
+    """A bare-bones Word package: one document part with the given runs per paragraph."""
+    body = "".join("<w:p>" + "".join(f"<w:r><w:t xml:space=\"preserve\">{text}</w:t></w:r>" for text in runs) + "</w:p>"
+                   for runs in paragraphs)
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zout:
+        zout.writestr("[Content_Types].xml", "<Types/>")
+        zout.writestr("word/document.xml", f'<w:document xmlns:w="{W}"><w:body>{body}</w:body></w:document>')
+        zout.writestr("word/media/image1.png", b"\x89PNG" + bytes(range(256)))
+
+def _docx_paragraphs(path):
+    with zipfile.ZipFile(path) as zin:
+        root = etree.fromstring(zin.read("word/document.xml"))
+    return [[t.text or "" for t in p.iter(f"{{{W}}}t")] for p in root.iter(f"{{{W}}}p")]
+
+def test_word_package_is_rewritten_with_split_runs(tmp_path):
+    src, dest = tmp_path / "src.docx", tmp_path / "dest.docx"
+    _docx(src, [["Hi [% cus", "tomer_name %]", " "], ["No placeholders here"]])
+
+    assert PlaceholderSubstitutor(CONTEXT).substitute_package(src, dest) == 1
+    assert _docx_paragraphs(dest) == [["Hi ACME", "", " "], ["No placeholders here"]]
+    with zipfile.ZipFile(src) as before, zipfile.ZipFile(dest) as after:
+        assert after.testzip() is None
+        assert before.namelist() == after.namelist()
+        assert before.read("word/media/image1.png") == after.read("word/media/image1.png")
+
+def test_package_without_placeholders_is_not_written(tmp_path):
+    src, dest = tmp_path / "src.docx", tmp_path / "dest.docx"
+    _docx(src, [["100% done"]])
+
+    assert PlaceholderSubstitutor(CONTEXT).substitute_package(src, dest) == 0
+    assert not dest.exists()
@@ -0,0 +1,81 @@
+import io
+import zipfile
+
+import pytest
+
+from app.services import zip_utils
+from app.services.zip_utils import copy_raw_entry
+
+class _Unseekable(io.RawIOBase):
+    """A write-only stream without seek(), so zipfile writes data descriptors."""
+
+    def __init__(self):
+        self.buffer = io.BytesIO()
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        return self.buffer.write(data)
+
+def _source(path, force_zip64=False, descriptors=False):
+    members = {"a.xml": b"<a>" + b"x" * 5000 + b"</a>", "media/b.bin": bytes(range(256)) * 40}
+    if descriptors:
+        stream = _Unseekable()
+        with zipfile.ZipFile(stream, "w", zipfile.ZIP_DEFLATED) as z:
+            for name, data in members.items():
+                z.writestr(name, data)
+        path.write_bytes(stream.buffer.getvalue())
+    else:
+        with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as z:
+            z.writestr(zipfile.ZipInfo("stored.txt"), b"plain")
+            for name, data in members.items():
+                with z.open(name, "w", force_zip64=force_zip64) as f:
+                    f.write(data)
+    return path
+
+def _copy_all(src, dest, rename=None):
+    with open(src, "rb") as raw, zipfile.ZipFile(src) as zin, zipfile.ZipFile(dest, "w") as zout:
+        zout.writestr("first.txt", b"written normally")
+        for info in zin.infolist():
+            copy_raw_entry(raw, info, zout, rename(info.filename) if rename else None)
+        zout.writestr("last.txt", b"written normally")
+
+def _extra_ids(extra):
+    ids, i = [], 0
+    while i + 4 <= len(extra):
+        header_id, size = int.from_bytes(extra[i:i + 2], "little"), int.from_bytes(extra[i + 2:i + 4], "little")
+        ids.append(header_id)
+        i += 4 + size
+    return ids
+
+@pytest.mark.parametrize("options", [{}, {"descriptors": True}, {"force_zip64": True}])
+def test_copied_entries_read_back_identical(tmp_path, options):
+    src = _source(tmp_path / "src.zip", **options)
+    dest = tmp_path / "dest.zip"
+    _copy_all(src, dest, rename=lambda name: "copied/" + name)
+
+    with zipfile.ZipFile(src) as zin, zipfile.ZipFile(dest) as zout:
+        assert zout.testzip() is None
+        for info in zin.infolist():
+            assert zout.read("copied/" + info.filename) == zin.read(info)
+        assert zout.read("last.txt") == b"written normally"
+        for info in zout.infolist():
+            assert not info.flag_bits & 0x08
+            assert 0x0001 not in _extra_ids(info.extra)
+
+def test_zip64_sizes_are_refused(tmp_path):
+    src = _source(tmp_path / "src.zip")
+    with open(src, "rb") as raw, zipfile.ZipFile(src) as zin, zipfile.ZipFile(tmp_path / "dest.zip", "w") as zout:
+        info = zin.getinfo("a.xml")
+        info.file_size = 1 << 32
+        with pytest.raises(zipfile.LargeZipFile):
+            copy_raw_entry(raw, info, zout)
+
+def test_output_past_the_zip64_limit_is_refused(tmp_path, monkeypatch):
+    src = _source(tmp_path / "src.zip")
+    monkeypatch.setattr(zip_utils, "_ZIP64_LIMIT", 6000)
+    with open(src, "rb") as raw, zipfile.ZipFile(src) as zin, zipfile.ZipFile(tmp_path / "dest.zip", "w") as zout:
+        zout.writestr("filler.bin", b"f" * 6000)
+        with pytest.raises(zipfile.LargeZipFile):
+            copy_raw_entry(raw, zin.getinfo("a.xml"), zout)
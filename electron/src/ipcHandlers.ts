@@ -24,11 +24,56 @@ export function registerIpcHandlers(mainBrowserWindow: Electron.BrowserWindow |
     ipcMain.handle('settings:save', (_, data) => PythonClient.request('POST', '/settings', data));
 
     // --- LIBRARY ---
-    ipcMain.handle('library:get', () => PythonClient.request('GET', '/library'));
+    ipcMain.handle('library:get', (_, format?: string) =>
+        PythonClient.request('GET', format ? `/library?format=${encodeURIComponent(format)}` : '/library'));
     ipcMain.handle('library:resolve', (_, pathStr) => PythonClient.request('POST', '/library/resolve', { path: pathStr }));
+    ipcMain.handle('library:resolveBatch', (_, paths: string[]) => PythonClient.request('POST', '/library/resolve/batch', { paths }));
+    ipcMain.handle('library:level', (_, args: { path?: string; cursor?: string }) => {
+        const query = new URLSearchParams({ path: args?.path ?? '', cursor: args?.cursor ?? '' });
+        return PythonClient.request('GET', `/library/level?${query.toString()}`);
+    });
+
+    // Forwards library deltas pushed by the backend; a new watch replaces the previous one
+    let libraryWatch: AbortController | null = null;
+    ipcMain.handle('library:watch', (_, since: number) => {
+        libraryWatch?.abort();
+        const controller = new AbortController();
+        libraryWatch = controller;
+
+        PythonClient.stream(`/library/events?since=${since}`, (delta) => {
+            mainBrowserWindow?.webContents.send('library-changes', delta);
+        }, controller.signal).catch((error) => console.error('Library watch ended:', error));
+        return true;
+    });
 
     // --- GENERATION ---
-    ipcMain.handle('session:generate', (_, payload) => PythonClient.request('POST', '/session/generate', payload));
+    let activeJobId: string | null = null;
+
+    // Starts a backend job, forwards its progress to the ConsolePanel and resolves with its result
+    const runJob = async (endpoint: string, payload: any) => {
+        const { job_id } = await PythonClient.request('POST', endpoint, payload);
+        activeJobId = job_id;
+
+        await PythonClient.stream(`/session/jobs/${job_id}/events`, (event) => {
+            mainBrowserWindow?.webContents.send('app-console', {
+                timestamp: new Date().toLocaleTimeString('en-GB'),
+                level: event.status === 'error' ? 'ERROR' : 'INFO',
+                message: event.message
+            });
+        });
+
+        const job = await PythonClient.request('GET', `/session/jobs/${job_id}`);
+        if (activeJobId === job_id) activeJobId = null;
+        if (job.status === 'error') throw new Error(job.error);
+        return job.result ?? { status: job.status };
+    };
+
+    ipcMain.handle('session:generate', (_, payload) => runJob('/session/generate', payload));
+    ipcMain.handle('session:generateBatch', (_, payload) => runJob('/session/generate/batch', payload));
+    ipcMain.handle('session:cancel', () => {
+        if (!activeJobId) return { cancelled: false };
+        return PythonClient.request('DELETE', `/session/jobs/${activeJobId}`);
+    });
 
     // --- TRANSLATIONS ---
     ipcMain.handle('trans:folders', (_, args) => PythonClient.request('POST', '/library/translations/folders', args));
@@ -13,11 +13,22 @@ contextBridge.exposeInMainWorld('electronAPI', {
     saveSettings: (data: any) => ipcRenderer.invoke('settings:save', data),
 
     // --- LIBRARY ---
-    getLibrary: () => ipcRenderer.invoke('library:get'),
+    getLibrary: (format?: string) => ipcRenderer.invoke('library:get', format),
     resolveDrop: (path: string) => ipcRenderer.invoke('library:resolve', path),
+    resolveDropBatch: (paths: string[]) => ipcRenderer.invoke('library:resolveBatch', paths),
+    getLibraryLevel: (path?: string, cursor?: string) => ipcRenderer.invoke('library:level', { path, cursor }),
+    watchLibrary: (since: number) => ipcRenderer.invoke('library:watch', since),
+    onLibraryChanges: (callback: (delta: any) => void) => {
+        const subscription = (_event: any, data: any) => callback(data);
+        ipcRenderer.on('library-changes', subscription);
+
+        return () => ipcRenderer.removeListener('library-changes', subscription);
+    },
 
     // --- SESSION GENERATION ---
     generateSession: (payload: any) => ipcRenderer.invoke('session:generate', payload),
+    generateBatch: (payload: any) => ipcRenderer.invoke('session:generateBatch', payload),
+    cancelGeneration: () => ipcRenderer.invoke('session:cancel'),
 
     // --- TRANSLATIONS ---
     getTransFolders: (rootPath: string) => ipcRenderer.invoke('trans:folders', { rootPath }),
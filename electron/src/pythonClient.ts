@@ -3,8 +3,22 @@ import { PYTHON_PORT } from './constants';
 
 export class PythonClient {
     private static baseUrl = '127.0.0.1';
+    // Settles once the backend answers /health (see pythonManager); requests wait for it
+    private static ready: Promise<void> = Promise.resolve();
+
+    static setReady(ready: Promise<void>) {
+        this.ready = ready;
+    }
 
     static async request(method: string, endpoint: string, body: any = null): Promise<any> {
+        await this.ready;
+        return this.send(method, endpoint, body);
+    }
+
+    /**
+     * Sends a request right away, without waiting for the backend to be ready.
+     */
+    static async send(method: string, endpoint: string, body: any = null): Promise<any> {
         return new Promise((resolve, reject) => {
             const request = net.request({
                 method,
@@ -40,4 +54,51 @@ export class PythonClient {
             request.end();
         });
     }
-}
\ No newline at end of file
+
+    /**
+     * Consumes a Server-Sent Events endpoint, calling onEvent for every message.
+     * Resolves when the backend closes the stream, or when `signal` aborts it.
+     */
+    static async stream(endpoint: string, onEvent: (event: any) => void, signal?: AbortSignal): Promise<void> {
+        await this.ready;
+        return new Promise((resolve, reject) => {
+            const request = net.request({
+                method: 'GET',
+                protocol: 'http:',
+                hostname: this.baseUrl,
+                port: PYTHON_PORT,
+                path: endpoint
+            });
+
+            request.on('response', (response) => {
+                let buffer = '';
+                response.on('data', (chunk) => {
+                    buffer += chunk.toString();
+                    let boundary = buffer.indexOf('\n\n');
+                    while (boundary !== -1) {
+                        const message = buffer.slice(0, boundary);
+                        buffer = buffer.slice(boundary + 2);
+                        const data = message.split('\n')
+                            .filter(line => line.startsWith('data:'))
+                            .map(line => line.slice(5).trim())
+                            .join('\n');
+                        if (data) {
+                            try {
+                                onEvent(JSON.parse(data));
+                            } catch {
+                                onEvent(data);
+                            }
+                        }
+                        boundary = buffer.indexOf('\n\n');
+                    }
+                });
+                response.on('end', () => resolve());
+            });
+
+            request.on('error', (error) => reject(error));
+            request.on('abort', () => resolve());
+            signal?.addEventListener('abort', () => request.abort());
+            request.end();
+        });
+    }
+}
@@ -1,9 +1,14 @@
 import { spawn, ChildProcess } from 'child_process';
 import { IS_DEV, PATHS, PYTHON_PORT } from './constants';
 import { BrowserWindow } from 'electron';
+import { PythonClient } from './pythonClient';
 
 let pythonProcess: ChildProcess | null = null;
 
+const READY_TIMEOUT_MS = 30000;
+const READY_POLL_MS = 100;
+const WARMUP_POLL_MS = 500;
+
 /**
  * Sends logs from the Python process to the UI console
  */
@@ -29,6 +34,45 @@ function sendLogToWindow(message: string) {
     });
 }
 
+/**
+ * Polls /health until the backend answers, so the first UI calls do not race its startup.
+ * Requests go through once it is up; whether it is warm (ready) is only logged, see waitForWarmup.
+ */
+async function waitForBackend(): Promise<void> {
+    const started = Date.now();
+    while (pythonProcess && Date.now() - started < READY_TIMEOUT_MS) {
+        try {
+            const health = await PythonClient.send('GET', '/health');
+            console.log(`Python backend up after ${Date.now() - started} ms`);
+            if (!health?.ready) waitForWarmup(started).then();
+            return;
+        } catch {
+            await new Promise(resolve => setTimeout(resolve, READY_POLL_MS));
+        }
+    }
+    // Let requests through anyway; they report their own errors
+    sendLogToWindow('WARNING: Python backend did not become ready');
+}
+
+/**
+ * Polls /health until the warm-up has finished (requests before that still work, just slower)
+ */
+async function waitForWarmup(started: number): Promise<void> {
+    while (pythonProcess && Date.now() - started < READY_TIMEOUT_MS) {
+        await new Promise(resolve => setTimeout(resolve, WARMUP_POLL_MS));
+        try {
+            const health = await PythonClient.send('GET', '/health');
+            if (health?.ready) {
+                // Failed warm-up tasks are logged by the backend itself
+                console.log(`Python backend warm after ${Date.now() - started} ms`);
+                return;
+            }
+        } catch {
+            // Still starting, or gone; the close handler reports an exit
+        }
+    }
+}
+
 export function createPythonProcess() {
     if (!IS_DEV) {
         console.warn('Production python path not configured.');
@@ -40,6 +84,8 @@ export function createPythonProcess() {
 
     pythonProcess = spawn(PATHS.PYTHON_VENV, [PATHS.PYTHON_SCRIPT, `${PYTHON_PORT}`]);
 
+    PythonClient.setReady(waitForBackend());
+
     pythonProcess.stdout?.on('data', (data) => {
         const msg = data.toString();
         console.log('py:stdout:', msg);
@@ -10,6 +10,7 @@ import SettingsDialog from "./components/Settings/SettingsDialog";
 
 // Utils & Types
 import { handleQuit, handleHelp, handleToggleDev, handleFullScreen } from './utils/electron-bridge';
+import { fetchLibraryLevel, fetchLibraryTree } from './utils/library-tree';
 import type { Section, SessionSettings } from "./types/session";
 
 export default function App() {
@@ -27,6 +28,7 @@ export default function App() {
 
     // Session Data
     const [libraryNodes, setLibraryNodes] = useState<TreeNode[]>([]);
+    const [libraryRoot, setLibraryRoot] = useState('');
     const [sections, setSections] = useState<Section[]>([
         { id: 'intro', title: 'Introduction', isLocked: true, items: [] },
         { id: 'outro', title: 'Outro', isLocked: true, items: [] }
@@ -45,11 +47,16 @@ export default function App() {
      * LOGIC
      * --------------------------------------------------------------------------------- */
 
-    const loadLibrary = async () => {
+    // `full` (the refresh button) loads the whole tree in the compact format; otherwise only
+    // the top level, so the first paint does not depend on the size of the library
+    const loadLibrary = async (full = false) => {
         setIsLibraryLoading(true);
         try {
-            const data = await window.electronAPI.getLibrary();
-            setLibraryNodes(data);
+            const page = full ? await fetchLibraryTree() : await fetchLibraryLevel();
+            setLibraryNodes(page.nodes);
+            setLibraryRoot(page.path);
+            // Changes on disk from here on arrive as deltas (see LibraryPanel)
+            if (page.path) await window.electronAPI.watchLibrary(page.version);
         } catch (e) {
             console.error("Failed to load library", e);
             toast.current?.show({
@@ -105,6 +112,7 @@ export default function App() {
 
                 // Library Props
                 libraryNodes={libraryNodes}
+                libraryRoot={libraryRoot}
                 isLibraryLoading={isLibraryLoading}
                 onLibraryRefresh={loadLibrary}
 
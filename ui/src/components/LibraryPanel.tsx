@@ -1,29 +1,118 @@
-import React from 'react';
+import React, { useEffect, useRef, useState } from 'react';
 import { Tree } from 'primereact/tree';
+import type { TreeEventNodeEvent, TreeMultipleSelectionKeys } from 'primereact/tree';
 import { Button } from 'primereact/button';
 import type { TreeNode } from 'primereact/treenode';
+import { LOAD_MORE_TYPE, fetchLibraryLevel, setNodeChildren, replaceNode, applyLibraryChanges } from '../utils/library-tree';
 
 interface LibraryPanelProps {
     nodes: TreeNode[];
-    onRefresh: () => void;
+    rootPath: string;
+    // `full` asks for the whole tree instead of the top level
+    onRefresh: (full?: boolean) => void;
     loading?: boolean;
 }
 
-export default function LibraryPanel({ nodes, onRefresh, loading = false }: LibraryPanelProps) {
+export default function LibraryPanel({ nodes, rootPath, onRefresh, loading = false }: LibraryPanelProps) {
+    // Local copy, since deltas change it (and folders added by them load their children when expanded)
+    const [tree, setTree] = useState<TreeNode[]>(nodes);
+    const [pendingKeys, setPendingKeys] = useState<Set<string>>(new Set());
+    const [selectionKeys, setSelectionKeys] = useState<TreeMultipleSelectionKeys | null>(null);
+
+    useEffect(() => setTree(nodes), [nodes]);
+
+    // The backend pushes what changed on disk; a reset means it can no longer tell
+    const refreshRef = useRef(onRefresh);
+    refreshRef.current = onRefresh;
+
+    useEffect(() => {
+        return window.electronAPI.onLibraryChanges((delta) => {
+            if (delta.reset) {
+                refreshRef.current();
+            } else if (delta.changes.length > 0) {
+                setTree(prev => applyLibraryChanges(prev, rootPath, delta.changes));
+            }
+        });
+    }, [rootPath]);
+
+    const withPending = async (key: string, load: () => Promise<void>) => {
+        if (pendingKeys.has(key)) return;
+        setPendingKeys(prev => new Set(prev).add(key));
+        try {
+            await load();
+        } catch (e) {
+            console.error("Failed to load library folder", e);
+        } finally {
+            setPendingKeys(prev => {
+                const next = new Set(prev);
+                next.delete(key);
+                return next;
+            });
+        }
+    };
+
+    const handleExpand = (e: TreeEventNodeEvent) => {
+        const node = e.node;
+        if (node.leaf !== false || node.children) return;
+        const key = String(node.key);
+        withPending(key, async () => {
+            const { nodes: children } = await fetchLibraryLevel(key);
+            setTree(prev => setNodeChildren(prev, key, children));
+        }).then();
+    };
+
+    const handleLoadMore = (node: TreeNode) => {
+        const key = String(node.key);
+        withPending(key, async () => {
+            const { nodes: page } = await fetchLibraryLevel(node.data.path, node.data.cursor);
+            setTree(prev => replaceNode(prev, key, page));
+        }).then();
+    };
+
+    // Selected paths in tree order, so a dropped multi-selection keeps the order shown
+    const selectedPaths = (): string[] => {
+        const paths: string[] = [];
+        const visit = (level: TreeNode[]) => level.forEach(node => {
+            if (node.type === LOAD_MORE_TYPE) return;
+            if (selectionKeys?.[String(node.key)]) paths.push(node.data);
+            if (node.children) visit(node.children);
+        });
+        visit(tree);
+        return paths;
+    };
 
     const handleDragStart = (e: React.DragEvent, node: TreeNode) => {
-        // PlaylistPanel expects JSON.parse(json).label AND JSON.parse(json).data
-        e.dataTransfer.setData('application/json', JSON.stringify(node));
+        // PlaylistPanel expects JSON.parse(json).label AND JSON.parse(json).data;
+        // `paths` carries the whole selection when the dragged node is part of it
+        const paths = selectionKeys?.[String(node.key)] ? selectedPaths() : [node.data];
+        e.dataTransfer.setData('application/json', JSON.stringify({ ...node, paths }));
         e.dataTransfer.effectAllowed = 'copy';
     };
 
     const nodeTemplate = (node: TreeNode, options: any) => {
+        const pending = pendingKeys.has(String(node.key));
+
+        if (node.type === LOAD_MORE_TYPE) {
+            return (
+                <div
+                    className="flex align-items-center w-full cursor-pointer text-gray-500 hover:text-white p-1"
+                    onClick={() => handleLoadMore(node)}
+                >
+                    <i className={`${pending ? 'pi pi-spin pi-spinner' : 'pi pi-angle-double-down'} mr-2`}></i>
+                    <span className="text-sm select-none">{node.label}</span>
+                </div>
+            );
+        }
+
         let iconClass = node.icon || 'pi pi-file text-gray-400';
 
-        // Visual cue for folders
-        if (node.children && node.children.length > 0) {
+        // Visual cue for folders (lazy ones have no children until expanded)
+        if (node.leaf === false || (node.children && node.children.length > 0)) {
             iconClass = options.expanded ? 'pi pi-folder-open text-yellow-500' : 'pi pi-folder text-yellow-500';
         }
+        if (pending) {
+            iconClass = 'pi pi-spin pi-spinner text-gray-400';
+        }
 
         return (
             <div
@@ -48,7 +137,7 @@ export default function LibraryPanel({ nodes, onRefresh, loading = false }: Libr
 
                 <Button
                     icon={loading ? "pi pi-spin pi-spinner" : "pi pi-refresh"}
-                    onClick={onRefresh}
+                    onClick={() => onRefresh(true)}
                     disabled={loading}
                     text
                     rounded
@@ -60,13 +149,17 @@ export default function LibraryPanel({ nodes, onRefresh, loading = false }: Libr
 
             {/* TREE AREA */}
             <div className="flex-grow-1 overflow-y-auto custom-scrollbar p-2">
-                {nodes.length === 0 && !loading ? (
+                {tree.length === 0 && !loading ? (
                     <div className="text-center p-4 text-gray-500 text-xs italic select-none">
                         No files found or library path not set.
                     </div>
                 ) : (
                     <Tree
-                        value={nodes}
+                        value={tree}
+                        onExpand={handleExpand}
+                        selectionMode="multiple"
+                        selectionKeys={selectionKeys}
+                        onSelectionChange={(e) => setSelectionKeys(e.value as TreeMultipleSelectionKeys)}
                         className="w-full border-none bg-transparent p-0 m-0 text-sm"
                         contentClassName="p-0"
                         nodeTemplate={nodeTemplate}
@@ -194,7 +194,8 @@ export default function PlaylistPanel({ sections, setSections, settings }: Playl
 
         try {
             const node = JSON.parse(json);
-            const droppedPath = node.data;
+            // A multi-selection arrives as `paths`; a single node only has `data`
+            const droppedPaths: string[] = node.paths ?? [node.data];
             const droppedLabel = node.label;
 
             const dropTarget = document.elementFromPoint(e.clientX, e.clientY);
@@ -204,7 +205,7 @@ export default function PlaylistPanel({ sections, setSections, settings }: Playl
             const sectionElement = dropTarget?.closest('[data-section-id]');
             const targetSectionId = sectionElement?.getAttribute('data-section-id');
 
-            const resolvedFiles = await window.electronAPI.resolveDrop(droppedPath);
+            const resolvedFiles = await window.electronAPI.resolveDropBatch(droppedPaths);
 
             if (!resolvedFiles || resolvedFiles.length === 0) {
                 toast.current?.show({ severity: 'warn', summary: 'Ignored', detail: 'No generic base files found.' });
@@ -11,8 +11,9 @@ interface WorkspaceProps {
     onSettingChange: (field: keyof SessionSettings, value: any) => void;
     refreshTrigger: number;
     libraryNodes: TreeNode[];
+    libraryRoot: string;
     isLibraryLoading: boolean;
-    onLibraryRefresh: () => void;
+    onLibraryRefresh: (full?: boolean) => void;
     sections: Section[];
     setSections: (sections: Section[]) => void;
 }
@@ -20,7 +21,7 @@ interface WorkspaceProps {
 export default function Workspace(props: WorkspaceProps) {
     const {
         settings, onSettingChange, refreshTrigger,
-        libraryNodes, isLibraryLoading, onLibraryRefresh,
+        libraryNodes, libraryRoot, isLibraryLoading, onLibraryRefresh,
         sections, setSections
     } = props;
     return (
@@ -41,6 +42,7 @@ export default function Workspace(props: WorkspaceProps) {
                 <SplitterPanel size={30} minSize={20} className="flex overflow-hidden border-round-sm">
                     <LibraryPanel
                         nodes={libraryNodes}
+                        rootPath={libraryRoot}
                         loading={isLibraryLoading}
                         onRefresh={onLibraryRefresh}
                     />
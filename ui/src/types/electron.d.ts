@@ -15,8 +15,25 @@ declare global {
             saveSettings: (data: any) => Promise<any>;
 
             // Library & Drag-Drop
-            getLibrary: () => Promise<any[]>;
+            getLibrary: {
+                (): Promise<any[]>;
+                (format: 'compact'): Promise<import('../utils/library-tree').CompactLibraryTree>;
+            };
             resolveDrop: (path: string) => Promise<any[]>;
+            resolveDropBatch: (paths: string[]) => Promise<any[]>;
+            getLibraryLevel: (path?: string, cursor?: string) => Promise<{
+                path: string;
+                nodes: any[];
+                total: number;
+                next_cursor: string | null;
+                version: number;
+            }>;
+            watchLibrary: (since: number) => Promise<boolean>;
+            onLibraryChanges: (callback: (delta: {
+                version: number;
+                reset: boolean;
+                changes: import('../utils/library-tree').LibraryChange[];
+            }) => void) => () => void;
 
             // --- SESSION GENERATION ---
             generateSession: (payload: {
@@ -28,6 +45,18 @@ declare global {
                 language_code: string;
                 sections: { title: string; topics: string[] }[];
             }) => Promise<any>;
+            generateBatch: (payload: {
+                session_name: string;
+                date: string;
+                sections: { title: string; topics: string[] }[];
+                targets: {
+                    customer_name: string;
+                    customer_industry: string;
+                    industry_code: string;
+                    language_code: string;
+                }[];
+            }) => Promise<any>;
+            cancelGeneration: () => Promise<{ cancelled: boolean }>;
 
             // --- TRANSLATION MODULE ---
             getTransFolders: (rootPath: string) => Promise<any[]>;
@@ -11,6 +11,12 @@ export interface AppSettings {
     hubspot_api_key: string;
     languages: KeyLabel[];
     industries: KeyLabel[];
+    image_dpi?: number;
+    image_recompress?: boolean;
+    exercise_copy_mode?: "copy" | "hardlink" | "reflink";
+    streaming_merge?: boolean;
+    deck_workers?: number;
+    warmup_on_start?: boolean;
 }
 
 export interface FolderOption {
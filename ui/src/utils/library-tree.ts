@@ -0,0 +1,144 @@
+import type { TreeNode } from 'primereact/treenode';
+
+// Pseudo-node appended to a level when the backend has more pages
+export const LOAD_MORE_TYPE = 'load-more';
+
+export interface LibraryPage {
+    path: string;
+    version: number;
+    nodes: TreeNode[];
+}
+
+export interface LibraryChange {
+    op: 'added' | 'removed' | 'renamed';
+    path?: string;
+    from?: string;
+    to?: string;
+    parent?: string;
+    node?: TreeNode;
+}
+
+export interface CompactLibraryTree {
+    format: 'compact';
+    root: string;
+    sep: string;
+    version: number;
+    types: string[];
+    names: string[];
+    parents: number[];
+    kinds: number[];
+}
+
+// Same icons as LibraryService.FILE_TYPES on the backend
+const TYPE_ICONS: Record<string, string> = {
+    folder: 'pi pi-fw pi-folder',
+    pptx: 'pi pi-fw pi-file text-orange-500',
+    docx: 'pi pi-fw pi-file text-blue-500',
+    xlsx: 'pi pi-fw pi-file-excel text-green-500',
+    pdf: 'pi pi-fw pi-file-pdf text-red-500',
+    file: 'pi pi-fw pi-file'
+};
+
+// Rebuilds the nested tree (keys, paths, icons) from the compact /library format
+export const expandCompactTree = (tree: CompactLibraryTree): TreeNode[] => {
+    const roots: TreeNode[] = [];
+    const nodes: TreeNode[] = new Array(tree.names.length);
+    tree.names.forEach((name, i) => {
+        const parent = tree.parents[i];
+        const base = String(parent < 0 ? tree.root : nodes[parent].key);
+        const path = base.endsWith(tree.sep) ? base + name : `${base}${tree.sep}${name}`;
+        const type = tree.types[tree.kinds[i]];
+        const node: TreeNode = { key: path, label: name, data: path, icon: TYPE_ICONS[type] ?? TYPE_ICONS.file };
+        if (type === 'folder') {
+            // Loaded already, so expanding it does not fetch the level
+            node.leaf = false;
+            node.children = [];
+        } else {
+            node.type = type;
+        }
+        nodes[i] = node;
+        (parent < 0 ? roots : nodes[parent].children!).push(node);
+    });
+    return roots;
+};
+
+// The whole library in one request; folders added later (see applyLibraryChanges) load by level
+export const fetchLibraryTree = async (): Promise<LibraryPage> => {
+    const tree = await window.electronAPI.getLibrary('compact');
+    return { path: tree.root, version: tree.version, nodes: expandCompactTree(tree) };
+};
+
+export const fetchLibraryLevel = async (path?: string, cursor?: string): Promise<LibraryPage> => {
+    const level = await window.electronAPI.getLibraryLevel(path, cursor);
+    const nodes: TreeNode[] = [...level.nodes];
+    if (level.next_cursor) {
+        nodes.push({
+            key: `${level.path}::more::${level.next_cursor}`,
+            label: 'Load more…',
+            type: LOAD_MORE_TYPE,
+            leaf: true,
+            selectable: false,
+            data: { path: level.path, cursor: level.next_cursor }
+        });
+    }
+    return { path: level.path, version: level.version, nodes };
+};
+
+// Sets the children of the node with `key`, wherever it sits in the tree
+export const setNodeChildren = (nodes: TreeNode[], key: string, children: TreeNode[]): TreeNode[] =>
+    nodes.map(node => {
+        if (node.key === key) return { ...node, children };
+        if (node.children) return { ...node, children: setNodeChildren(node.children, key, children) };
+        return node;
+    });
+
+// Swaps the node with `key` (a "load more" entry) for the given nodes
+export const replaceNode = (nodes: TreeNode[], key: string, replacement: TreeNode[]): TreeNode[] =>
+    nodes.flatMap(node => {
+        if (node.key === key) return replacement;
+        if (node.children) return [{ ...node, children: replaceNode(node.children, key, replacement) }];
+        return [node];
+    });
+
+const findNode = (nodes: TreeNode[], key: string): TreeNode | undefined => {
+    for (const node of nodes) {
+        if (node.key === key) return node;
+        const found = node.children ? findNode(node.children, key) : undefined;
+        if (found) return found;
+    }
+    return undefined;
+};
+
+// Same order as the backend: folders first, then by name
+const sortKey = (node: TreeNode) => `${node.leaf === false ? 0 : 1}${String(node.label).toLowerCase()}`;
+
+// Inserts a node among loaded siblings. Entries sorting past the loaded pages are left to "load more".
+const insertSorted = (siblings: TreeNode[], node: TreeNode): TreeNode[] => {
+    const rest = siblings.filter(sibling => sibling.key !== node.key);
+    const index = rest.findIndex(sibling => sibling.type === LOAD_MORE_TYPE || sortKey(node) < sortKey(sibling));
+    if (index === -1) return [...rest, node];
+    if (rest[index].type === LOAD_MORE_TYPE) return rest;
+    return [...rest.slice(0, index), node, ...rest.slice(index)];
+};
+
+const addNode = (nodes: TreeNode[], rootPath: string, parent: string, node: TreeNode): TreeNode[] => {
+    if (parent === rootPath) return insertSorted(nodes, node);
+    // Folders that were never expanded fetch their children when they are
+    const children = findNode(nodes, parent)?.children;
+    return children ? setNodeChildren(nodes, parent, insertSorted(children, node)) : nodes;
+};
+
+// Applies backend deltas (see /library/changes) to the loaded part of the tree
+export const applyLibraryChanges = (nodes: TreeNode[], rootPath: string, changes: LibraryChange[]): TreeNode[] =>
+    changes.reduce((tree, change) => {
+        switch (change.op) {
+            case 'removed':
+                return replaceNode(tree, change.path!, []);
+            case 'renamed':
+                return addNode(replaceNode(tree, change.from!, []), rootPath, change.parent!, change.node!);
+            case 'added':
+                return addNode(tree, rootPath, change.parent!, change.node!);
+            default:
+                return tree;
+        }
+    }, nodes);